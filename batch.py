@@ -0,0 +1,265 @@
+"""
+Headless batch mode for NoteGenius.
+Processes a manifest of sources through ContentProcessor without the GUI
+(customtkinter is never imported).
+
+Manifest formats:
+- JSONL: one JSON object per line
+- CSV: a header row with the same field names
+
+Fields per job:
+    source        PDF path or URL (empty for manual input)
+    type          pdf | youtube | url | manual
+    output        note filename (or absolute path)
+    layout        a key of LAYOUTS
+    language      a key of LANGUAGES
+    instructions  optional
+    page_range    optional, e.g. "3-10" or "7"
+    start_time    optional, MM:SS
+    end_time      optional, MM:SS
+    policy        optional: skip | link | force, for sources already
+                  summarized with the same settings (see source_ledger.py)
+    id            optional stable job id (defaults to a hash of the row)
+
+Progress is checkpointed to <manifest>.checkpoint.jsonl, so a rerun skips
+jobs that already succeeded. The summary reports the extractions and model
+calls the source ledger avoided.
+
+Usage:
+    python batch.py manifest.jsonl --workers 4
+    python batch.py manifest.jsonl --pipeline   # overlap extraction and LLM stages
+    python batch.py manifest.jsonl --policy force   # summarize known sources again
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from processor import ContentProcessor
+from source_ledger import get_source_ledger
+
+SOURCE_TYPES = {
+    "pdf": "file",
+    "file": "file",
+    "youtube": "youtube",
+    "url": "url",
+    "manual": "Manual Input",
+}
+
+
+def load_manifest(path):
+    """Reads a JSONL or CSV manifest into a list of job dicts."""
+    path = Path(path)
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    jobs = []
+    for row in rows:
+        row = {k: v for k, v in row.items() if v not in (None, "")}
+        if "id" not in row:
+            row["id"] = hashlib.sha1(json.dumps(row, sort_keys=True).encode()).hexdigest()[:12]
+        jobs.append(row)
+    return jobs
+
+
+def parse_page_range(value):
+    """Parses "3-10" or "7" into a (start, end) tuple."""
+    if not value:
+        return None
+    parts = str(value).split("-")
+    try:
+        if len(parts) == 2:
+            return (int(parts[0]), int(parts[1]))
+        if len(parts) == 1:
+            return (int(parts[0]), int(parts[0]))
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid page range format: {value}")
+
+
+class Checkpoint:
+    def __init__(self, path):
+        """Append-only record of finished jobs."""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.done = set()
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        if record.get("success"):
+                            self.done.add(record["id"])
+
+    def record(self, job_id, success, message, seconds):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({
+                    'id': job_id,
+                    'success': success,
+                    'message': message,
+                    'seconds': round(seconds, 3),
+                    'finished_at': time.strftime("%Y-%m-%dT%H:%M:%S")
+                }) + "\n")
+                f.flush()
+            if success:
+                self.done.add(job_id)
+
+
+def job_params(job, policy=None):
+    """
+    Converts a manifest job into process_content keyword arguments.
+    policy is the ledger policy for jobs that don't set their own.
+    """
+    source_type = SOURCE_TYPES.get(str(job.get("type", "")).lower())
+    if not source_type:
+        raise ValueError(f"Invalid source type: {job.get('type')}")
+    if "output" not in job:
+        raise ValueError("Missing output filename")
+
+    return dict(
+        input_type=source_type,
+        input_value=job.get("source"),
+        output_filename=job["output"],
+        layout=job.get("layout", ""),
+        language=job.get("language", ""),
+        instructions=job.get("instructions", ""),
+        page_range=parse_page_range(job.get("page_range")),
+        start_time=job.get("start_time", "0:00") if source_type == "youtube" else None,
+        end_time=job.get("end_time"),
+        policy=job.get("policy", policy)
+    )
+
+
+def run_job(processor, job, policy=None):
+    """Runs one manifest job and returns (success, message)."""
+    return processor.process_content(**job_params(job, policy))
+
+
+def run_batch(manifest_path, workers=2, checkpoint_path=None, processor=None, use_pipeline=False, policy=None):
+    """
+    Processes every pending job of a manifest. Returns a summary dict.
+    With use_pipeline, jobs go through the staged ProcessingPipeline instead
+    of a pool running whole jobs.
+    policy: ledger policy for jobs that don't set one (default: LEDGER_SETTINGS).
+    """
+    jobs = load_manifest(manifest_path)
+    checkpoint = Checkpoint(checkpoint_path or f"{manifest_path}.checkpoint.jsonl")
+    pending = [job for job in jobs if job["id"] not in checkpoint.done]
+    processor = processor or ContentProcessor()
+
+    summary = {
+        'total': len(jobs),
+        'skipped': len(jobs) - len(pending),
+        'succeeded': 0,
+        'failed': 0,
+        'job_seconds': 0.0
+    }
+    print(f"{len(pending)} job(s) to run, {summary['skipped']} already done")
+
+    ledger = get_source_ledger()
+    avoided_before = ledger.avoided_snapshot()
+    start = time.perf_counter()
+
+    def timed(job):
+        job_start = time.perf_counter()
+        try:
+            success, message = run_job(processor, job, policy)
+        except Exception as e:
+            success, message = False, str(e)
+        return success, message, time.perf_counter() - job_start
+
+    def finish(job, success, message, seconds):
+        checkpoint.record(job["id"], success, message, seconds)
+        summary['succeeded' if success else 'failed'] += 1
+        summary['job_seconds'] += seconds
+        status = "ok" if success else "FAILED"
+        print(f"[{status}] {job['id']} ({seconds:.1f}s): {message}")
+
+    if use_pipeline:
+        run_pipeline(processor, pending, finish, policy)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(timed, job): job for job in pending}
+            for future in as_completed(futures):
+                finish(futures[future], *future.result())
+
+    summary['elapsed'] = time.perf_counter() - start
+    avoided = ledger.avoided_snapshot()
+    summary['ledger'] = {name: avoided[name] - avoided_before[name] for name in avoided}
+    return summary
+
+
+def run_pipeline(processor, jobs, finish, policy=None):
+    """Feeds jobs through the staged pipeline, reporting each through finish."""
+    from pipeline import ProcessingPipeline
+
+    pipeline = ProcessingPipeline(processor)
+    futures = {}
+    submitted = {}
+    for job in jobs:
+        try:
+            params = job_params(job, policy)
+        except ValueError as e:
+            finish(job, False, str(e), 0.0)
+            continue
+        submitted[job["id"]] = time.perf_counter()
+        # submit blocks while the pipeline is full, which throttles intake
+        futures[pipeline.submit(**params)] = job
+
+    for future in as_completed(futures):
+        job = futures[future]
+        success, message = future.result()
+        finish(job, success, message, time.perf_counter() - submitted[job["id"]])
+
+    pipeline.close()
+    print()
+    print(pipeline.format_metrics())
+
+
+def print_summary(summary):
+    finished = summary['succeeded'] + summary['failed']
+    elapsed = summary['elapsed']
+    print()
+    print(f"Jobs:        {summary['total']} total, {summary['skipped']} skipped (checkpoint)")
+    print(f"Finished:    {summary['succeeded']} succeeded, {summary['failed']} failed")
+    print(f"Elapsed:     {elapsed:.1f}s")
+    if finished:
+        print(f"Throughput:  {finished / elapsed * 60:.1f} jobs/min")
+        print(f"Avg per job: {summary['job_seconds'] / finished:.1f}s")
+    ledger = summary.get('ledger')
+    if ledger and ledger['skipped'] + ledger['linked']:
+        print(f"Ledger:      {ledger['skipped']} skipped, {ledger['linked']} linked to existing notes")
+        print(
+            f"Avoided:     {ledger['extractions']} extractions ({ledger['extract_seconds']:.1f}s), "
+            f"{ledger['summaries']} summaries ({ledger['summarize_seconds']:.1f}s, "
+            f"~{ledger['tokens'] / 1000:.1f}k prompt tokens)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process a manifest of sources without the GUI.")
+    parser.add_argument("manifest", help="JSONL or CSV manifest")
+    parser.add_argument("--workers", type=int, default=2, help="Jobs processed in parallel")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <manifest>.checkpoint.jsonl)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Run extraction, LLM and writing as overlapping stages (sizes in PIPELINE_SETTINGS)")
+    parser.add_argument("--policy", choices=["skip", "link", "force"],
+                        help="For sources already summarized with the same settings (default: LEDGER_SETTINGS)")
+    args = parser.parse_args()
+
+    summary = run_batch(args.manifest, args.workers, args.checkpoint, use_pipeline=args.pipeline, policy=args.policy)
+    print_summary(summary)
+    sys.exit(1 if summary['failed'] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+HTML fallback benchmark.
+Times the lxml fallback of the URL extractor against the previous
+BeautifulSoup/html.parser implementation over a corpus of pages, and checks
+that both produce the same text.
+
+The corpus is a directory of saved pages (*.html, *.htm); without one, a
+synthetic corpus is generated, including one very large single-page doc.
+
+Usage:
+    python -m benchmarks.bench_html
+    python -m benchmarks.bench_html --corpus saved_pages/ --repeat 5
+"""
+
+import argparse
+import random
+import time
+from pathlib import Path
+from bs4 import BeautifulSoup
+from benchmarks.fixtures import generate_html
+from extractors.url_extractor import fallback_extract
+
+
+def legacy_extract(html):
+    """The previous fallback, kept as the reference output."""
+    soup = BeautifulSoup(html, 'html.parser')
+    for element in soup(['script', 'style', 'nav', 'header', 'footer']):
+        element.decompose()
+    title = soup.find('title').text if soup.find('title') else ''
+    article = soup.find('article') or soup.find('main') or soup.find('body')
+    content = article.get_text(separator='\n', strip=True)
+    return f"{title.strip()}\n\n{content}" if title.strip() else content
+
+
+def load_corpus(directory=None, pages=30, seed=0):
+    """Returns a list of (name, html bytes)."""
+    if directory:
+        paths = sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in (".html", ".htm"))
+        return [(p.name, p.read_bytes()) for p in paths]
+
+    rng = random.Random(seed)
+    corpus = [
+        (f"page-{n}.html", generate_html(rng, f"Page {n}", rng.randint(5, 60)).encode("utf-8"))
+        for n in range(1, pages + 1)
+    ]
+    corpus.append(("single-page-docs.html", generate_html(rng, "Full Reference", 5000).encode("utf-8")))
+    return corpus
+
+
+def timed(extract, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = extract(html)
+    return result, (time.perf_counter() - start) / repeat
+
+
+def run(corpus, repeat=3):
+    results = []
+    for name, html in corpus:
+        fast, fast_seconds = timed(fallback_extract, html, repeat)
+        try:
+            legacy, legacy_seconds = timed(legacy_extract, html, repeat)
+        except Exception as e:
+            # e.g. the old fallback crashed on fragments without a <body>
+            print(f"legacy fallback failed on {name}: {e!r}")
+            continue
+        results.append({
+            'page': name,
+            'kb': len(html) / 1024,
+            'legacy_seconds': legacy_seconds,
+            'fast_seconds': fast_seconds,
+            'match': legacy == fast
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HTML fallback extraction.")
+    parser.add_argument("--corpus", help="Directory of saved .html pages (default: synthetic pages)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per page, averaged")
+    args = parser.parse_args()
+
+    results = run(load_corpus(args.corpus), args.repeat)
+    largest = max(results, key=lambda r: r['kb'])
+    legacy_total = sum(r['legacy_seconds'] for r in results)
+    fast_total = sum(r['fast_seconds'] for r in results)
+
+    print(f"{'pages':<22} {'legacy s':>9} {'lxml s':>9} {'speedup':>8}")
+    print(f"{'all ({})'.format(len(results)):<22} {legacy_total:>9.3f} {fast_total:>9.3f} {legacy_total / fast_total:>7.1f}x")
+    print(
+        f"{'largest ({:.0f} KB)'.format(largest['kb']):<22} {largest['legacy_seconds']:>9.3f} "
+        f"{largest['fast_seconds']:>9.3f} {largest['legacy_seconds'] / largest['fast_seconds']:>7.1f}x"
+    )
+
+    mismatches = [r['page'] for r in results if not r['match']]
+    print(f"\nOutput parity: {len(results) - len(mismatches)}/{len(results)} pages identical")
+    for page in mismatches:
+        print(f"    differs: {page}")
+
+
+if __name__ == "__main__":
+    main()
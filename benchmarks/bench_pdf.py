@@ -0,0 +1,83 @@
+"""
+PDF extraction benchmark.
+Generates a synthetic PDF and reports pages per second and peak memory for
+the serial, streaming and parallel extraction modes of PDFExtractor.
+
+Usage:
+    python -m benchmarks.bench_pdf --pages 1000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from benchmarks.fixtures import generate_pdf
+from extractors.pdf_extractor import PDFExtractor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def measure(label, pages, run):
+    """
+    Runs one mode twice: once for timing, once under tracemalloc for peak
+    Python memory (tracing slows the main process down too much to time it).
+    """
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'mode': label,
+        'seconds': elapsed,
+        'pages_per_second': pages / elapsed,
+        'peak_mb': peak / 1_000_000
+    }
+
+
+def run(pages):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = generate_pdf(os.path.join(temp_dir, "bench.pdf"), pages)
+        extractor = PDFExtractor(path, use_cache=False)
+
+        def stream():
+            # Consume pages one at a time without keeping the document text
+            for _ in extractor.iter_pages():
+                pass
+
+        results = [
+            measure("serial", pages, lambda: extractor.extract_text(parallel=False)),
+            measure("streaming", pages, stream),
+            measure("parallel", pages, lambda: extractor.extract_text(parallel=True)),
+        ]
+
+    if resource:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1000
+        results[-1]['worker_peak_rss_mb'] = children
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF text extraction.")
+    parser.add_argument("--pages", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'seconds':>8} {'pages/s':>9} {'peak MB':>8}")
+    for result in run(args.pages):
+        print(
+            f"{result['mode']:<10} {result['seconds']:>8.2f} "
+            f"{result['pages_per_second']:>9.1f} {result['peak_mb']:>8.1f}"
+        )
+        if 'worker_peak_rss_mb' in result:
+            print(f"{'':<10} worker peak RSS: {result['worker_peak_rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
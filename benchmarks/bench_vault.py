@@ -0,0 +1,110 @@
+"""
+Vault index benchmark.
+Generates a synthetic vault (20,000 notes by default) and measures the
+note index of vault_index.py:
+- full build from an empty index
+- refresh with nothing changed (the stat walk alone)
+- refresh after 1% of the notes were edited
+- indexing one freshly written note
+- related-note lookups (queried with a whole summary) and Manual Input
+  context lookups (a short instruction), as p50/p95 latency
+
+Usage:
+    python -m benchmarks.bench_vault
+    python -m benchmarks.bench_vault --notes 5000 --queries 200 --output vault.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from benchmarks.fixtures import generate_vault
+from config import VAULT_INDEX_SETTINGS
+from vault_index import VaultIndex
+
+
+def timed(run):
+    start = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return {
+        'p50': statistics.median(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max': ordered[-1]
+    }
+
+
+def run(notes, queries, seed=0):
+    temp_dir = tempfile.mkdtemp(prefix="notegenius-vault-")
+    try:
+        vault = os.path.join(temp_dir, "vault")
+        paths, seconds = timed(lambda: generate_vault(vault, notes, seed))
+        print(f"generated {notes} notes in {seconds:.1f}s")
+
+        index = VaultIndex(vault, os.path.join(temp_dir, "index.db"))
+        results = {'notes': notes}
+
+        stats, results['build_seconds'] = timed(lambda: index.refresh(force=True))
+        results['passages'] = sum(1 for _ in index._connect().execute("SELECT id FROM passages"))
+        _, results['refresh_unchanged_seconds'] = timed(lambda: index.refresh(force=True))
+
+        rng = random.Random(seed)
+        edited = rng.sample(paths, max(1, notes // 100))
+        for path in edited:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\nEdited afterwards.\n")
+        stats, results['refresh_1pct_seconds'] = timed(lambda: index.refresh(force=True))
+        results['refresh_1pct_updated'] = stats['updated']
+
+        _, results['update_file_seconds'] = timed(lambda: index.update_file(edited[0]))
+
+        related = []
+        context = []
+        for path in rng.sample(paths, min(queries, notes)):
+            with open(path, "r", encoding="utf-8") as f:
+                summary = f.read()
+            _, seconds = timed(lambda: index.related(summary, VAULT_INDEX_SETTINGS["related_notes"], exclude=path))
+            related.append(seconds)
+            instructions = " ".join(rng.sample(summary.split(), 6))
+            _, seconds = timed(lambda: index.context(instructions, VAULT_INDEX_SETTINGS["context_tokens"], lambda text: len(text) // 4 + 1))
+            context.append(seconds)
+        results['related_seconds'] = percentiles(related)
+        results['context_seconds'] = percentiles(context)
+        results['index_mb'] = os.path.getsize(index.db_path) / 1_000_000
+        return results
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vault index on a synthetic vault.")
+    parser.add_argument("--notes", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=100, help="Lookups of each kind")
+    parser.add_argument("--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.notes, args.queries)
+    print(f"\n{results['notes']} notes, {results['passages']} passages, index {results['index_mb']:.0f} MB")
+    print(f"  {'full build':<28} {results['build_seconds']:>8.3f}s")
+    print(f"  {'refresh, nothing changed':<28} {results['refresh_unchanged_seconds']:>8.3f}s")
+    print(f"  {'refresh, 1% edited':<28} {results['refresh_1pct_seconds']:>8.3f}s  ({results['refresh_1pct_updated']} notes)")
+    print(f"  {'index one written note':<28} {results['update_file_seconds']:>8.3f}s")
+    for name, key in (("related notes", 'related_seconds'), ("manual input context", 'context_seconds')):
+        latency = results[key]
+        print(f"  {name:<28} p50 {latency['p50'] * 1000:>6.1f}ms  p95 {latency['p95'] * 1000:>6.1f}ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Prompt compaction checks.
+Builds PDF-like extracted text ("--- Page N ---" markers) and checks that
+the "file" compaction steps remove running headers and page numbers but
+never real content:
+- pages of numeric table rows, alone and under a running header and
+  footer, keep every row
+- printed page numbers are removed even when offset from the page index
+  (front matter)
+- repeated paragraphs keep their first copy and every page marker
+- in transcripts ("youtube" steps), a phrase said twice is kept and only
+  longer loops are collapsed
+
+Exits with status 1 if a check fails.
+
+Usage:
+    python -m benchmarks.check_compaction
+    python -m benchmarks.check_compaction --pages 50 --seed 3
+"""
+
+import argparse
+import random
+from benchmarks.fixtures import sentence
+from config import COMPACTION_SETTINGS
+from prompt_compaction import compact
+
+
+def normalized(line):
+    return " ".join(line.split())
+
+
+def numeric_row(rng):
+    return "  ".join(f"{rng.uniform(0, 1000):.2f}" for _ in range(rng.randint(2, 5)))
+
+
+def build(pages, page_lines):
+    """Joins page_lines(page) for each page the way the PDF extractor does."""
+    return "".join(f"\n--- Page {page} ---\n" + "\n".join(page_lines(page)) + "\n" for page in range(1, pages + 1))
+
+
+def run_checks(pages, seed):
+    """Returns a list of (check name, problem or None)."""
+    rng = random.Random(seed)
+    steps = COMPACTION_SETTINGS["sources"]["file"]
+    checks = []
+
+    def check(name, text, kept, removed=()):
+        compacted, _ = compact(text, steps)
+        lines = set(normalized(line) for line in compacted.split("\n"))
+        lost = [line for line in kept if normalized(line) not in lines]
+        left = [line for line in removed if normalized(line) in lines]
+        markers = compacted.count("--- Page ")
+        problem = None
+        if lost:
+            problem = f"{len(lost)} lines lost, e.g. {lost[0]!r}"
+        elif left:
+            problem = f"{len(left)} lines not removed, e.g. {left[0]!r}"
+        elif markers != pages:
+            problem = f"{markers} page markers of {pages}"
+        checks.append((name, problem))
+
+    # Each page a caption and numeric rows only
+    tables = {page: [numeric_row(rng) for _ in range(6)] for page in range(1, pages + 1)}
+    check(
+        "numeric tables",
+        build(pages, lambda page: [sentence(rng)] + tables[page]),
+        [row for rows in tables.values() for row in rows]
+    )
+
+    # The same tables under a running header and above a page-number footer
+    check(
+        "numeric tables with header and footer",
+        build(pages, lambda page: ["Field Survey Report 2023"] + tables[page] + [f"Page {page} of {pages}"]),
+        [row for rows in tables.values() for row in rows],
+        ["Field Survey Report 2023"] + [f"Page {page} of {pages}" for page in range(1, pages + 1)]
+    )
+
+    # Printed page numbers offset by front matter, under body text
+    body = {page: [sentence(rng) for _ in range(5)] for page in range(1, pages + 1)}
+    check(
+        "offset page numbers",
+        build(pages, lambda page: body[page] + [f"- {page + 4} -"]),
+        [line for lines in body.values() for line in lines],
+        [f"- {page + 4} -" for page in range(1, pages + 1)]
+    )
+
+    # A disclaimer paragraph repeated in the middle of every page
+    disclaimer = "This document is provided for information only and is not an offer of any kind."
+    findings = {page: [sentence(rng) for _ in range(8)] for page in range(1, pages + 1)}
+    text = build(pages, lambda page: findings[page][:4] + ["", disclaimer, ""] + findings[page][4:])
+    check("repeated paragraphs", text, [line for lines in findings.values() for line in lines])
+    count = compact(text, steps)[0].count(disclaimer)
+    checks.append(("repeated paragraphs kept once", None if count == 1 else f"disclaimer kept {count} times"))
+
+    # Transcripts: genuine repeats are speech, long loops are transcription errors
+    speech = [
+        ("sentence said twice", "Is that right? Yes. Yes. That is how it works.", "Yes. Yes."),
+        ("line said twice", "No, no, no.\nNo, no, no.\nLet me explain.", "No, no, no.\nNo, no, no."),
+        ("transcription loop", "Thank you. " * 6 + "Next topic.", "Thank you. Next topic."),
+    ]
+    for name, text, expected in speech:
+        compacted, _ = compact(text, COMPACTION_SETTINGS["sources"]["youtube"])
+        checks.append((f"repeats: {name}", None if expected in compacted else f"got {compacted!r}"))
+    return checks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that prompt compaction drops no real content.")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failed = False
+    for name, problem in run_checks(args.pages, args.seed):
+        failed = failed or problem is not None
+        print(f"{name:<40} {problem or 'ok'}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
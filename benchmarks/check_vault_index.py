@@ -0,0 +1,87 @@
+"""
+Vault index checks on a small vault.
+Writes a handful of notes, where every term is in a large share of the
+passages, and checks that the index still finds what a real vault would:
+- related notes for a new summary, best match first
+- related notes by a topic term shared with most of the vault
+- Manual Input context passages for a short instruction
+
+Exits with status 1 if a check fails.
+
+Usage:
+    python -m benchmarks.check_vault_index
+"""
+
+import os
+import shutil
+import tempfile
+from vault_index import VaultIndex
+
+NOTES = {
+    "Photosynthesis.md": (
+        "# Photosynthesis\n\n"
+        "Plants turn light, water and carbon dioxide into glucose and oxygen. "
+        "Chlorophyll in the chloroplasts absorbs the light.\n"
+    ),
+    "Cellular Respiration.md": (
+        "# Cellular Respiration\n\n"
+        "Cells break glucose down with oxygen in the mitochondria, releasing "
+        "carbon dioxide, water and energy stored as ATP.\n"
+    ),
+    "Roman Empire.md": (
+        "# Roman Empire\n\n"
+        "Augustus became the first emperor after the fall of the republic; "
+        "the legions held the frontier along the Rhine and the Danube.\n"
+    ),
+}
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def run_checks(index):
+    """Returns a list of (check name, problem or None)."""
+    checks = []
+
+    def check(name, result, expected):
+        problem = None if result[:len(expected)] == expected else f"got {result!r}, expected {expected!r} first"
+        checks.append((name, problem))
+
+    check(
+        "related notes",
+        index.related("Chlorophyll absorbs light so plants can make glucose from water.", 5),
+        ["Photosynthesis.md"]
+    )
+    check(
+        "related notes by a shared topic term",
+        index.related("Mitochondria produce ATP from glucose and oxygen.", 5, exclude=os.path.join(index.root, "Photosynthesis.md")),
+        ["Cellular Respiration.md"]
+    )
+    context = index.context("Summarize the legions of Augustus", 500, estimate_tokens)
+    checks.append(("manual input context", None if "[[Roman Empire]]" in context else f"got {context!r}"))
+    return checks
+
+
+def main():
+    temp_dir = tempfile.mkdtemp(prefix="notegenius-vault-check-")
+    try:
+        vault = os.path.join(temp_dir, "vault")
+        os.makedirs(vault)
+        for name, text in NOTES.items():
+            with open(os.path.join(vault, name), "w", encoding="utf-8") as f:
+                f.write(text)
+        index = VaultIndex(vault, os.path.join(temp_dir, "index.db"))
+        index.refresh(force=True)
+
+        failed = False
+        for name, problem in run_checks(index):
+            failed = failed or problem is not None
+            print(f"{name:<40} {problem or 'ok'}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
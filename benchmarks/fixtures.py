@@ -0,0 +1,225 @@
+"""
+Synthetic inputs for the NoteGenius benchmarks.
+Everything is generated locally so benchmarks run offline.
+"""
+
+import hashlib
+import itertools
+import math
+import os
+import random
+import struct
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "analysis model system data network process learning memory structure "
+    "function theory method result energy value signal change market policy "
+    "history language culture design pattern cell protein student research"
+).split()
+
+
+def sentence(rng, words=12):
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def vocabulary(size, seed=0):
+    """Returns size distinct made-up words, so a large corpus has realistic term statistics."""
+    rng = random.Random(seed)
+    syllables = [c + v for c in "bcdfghklmnprstvz" for v in "aeiou"]
+    words = set(WORDS)
+    while len(words) < size:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def generate_vault(directory, notes, seed=0, vocabulary_size=20000, folders=20):
+    """
+    Writes notes shaped like generated summaries (title, sections, bullet
+    points, source line) into folders of directory. Terms follow a Zipf
+    distribution over a made-up vocabulary. Returns the note paths.
+    """
+    rng = random.Random(seed)
+    words = vocabulary(vocabulary_size, seed)
+    rng.shuffle(words)
+    cumulative = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+    def text(count):
+        return " ".join(rng.choices(words, cum_weights=cumulative, k=count))
+
+    paths = []
+    for n in range(notes):
+        folder = os.path.join(directory, f"folder-{n % folders}")
+        os.makedirs(folder, exist_ok=True)
+        sections = []
+        for _ in range(rng.randint(2, 5)):
+            bullets = "\n".join(f"- {text(rng.randint(8, 20))}" for _ in range(rng.randint(2, 5)))
+            sections.append(f"## {text(3).title()}\n\n{text(rng.randint(40, 90))}\n\n{bullets}")
+        body = "\n\n".join(sections)
+        path = os.path.join(folder, f"note-{n}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# {text(4).title()}\n\n{body}\n\n_Summary taken from Manual Input_\n\n---\n")
+        paths.append(path)
+    return paths
+
+
+def generate_pdf(path, pages, lines_per_page=40, seed=0):
+    """
+    Writes a text PDF with the given number of pages, each with a running
+    header, body lines and a page-number footer.
+    A minimal hand-written PDF, so no PDF library is needed to build it.
+    """
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(1, pages + 1):
+        lines = ["Benchmark Book - Chapter {}".format((page - 1) // 20 + 1)]
+        lines += [sentence(rng) for _ in range(lines_per_page)]
+        lines.append(str(page))
+        body = " T* ".join(
+            "({})Tj".format(line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)"))
+            for line in lines
+        )
+        stream = f"BT /F1 9 Tf 40 800 Td 12 TL {body} ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return path
+
+
+def generate_html(rng, title, paragraphs=20):
+    """Returns an article page wrapped in navigation, scripts and a footer."""
+    body = "".join(
+        "<p>{}</p>".format(" ".join(sentence(rng) for _ in range(4)))
+        for _ in range(paragraphs)
+    )
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{title}</title>"
+        "<script>var tracking = 1;</script><style>body {{ margin: 0 }}</style></head>"
+        "<body><header><nav><a href=\"/\">Home</a> <a href=\"/docs\">Docs</a></nav></header>"
+        "<main><article><h1>{title}</h1>{body}</article></main>"
+        "<aside>Related links</aside><footer>Copyright</footer></body></html>"
+    ).format(title=title, body=body)
+
+
+def start_site_server(pages=50, latency=0.0, failing=(), seed=0, documents=None):
+    """
+    Serves a small documentation site on 127.0.0.1 in a background thread:
+    /page/<n>.html (with ETags, answering 304 to revalidation) and
+    /sitemap.xml listing every page. Pages whose number is in failing
+    answer 500. documents, a list of HTML bytes (e.g. saved pages), replaces
+    the generated pages. Returns the server; its base_url attribute is the
+    site root, paths lists the page paths and requests counts requests per path.
+    """
+    rng = random.Random(seed)
+    if documents is None:
+        documents = [generate_html(rng, f"Page {n}").encode("utf-8") for n in range(1, pages + 1)]
+    site = {f"/page/{n}.html": html for n, html in enumerate(documents, start=1)}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b"", content_type="text/html; charset=utf-8", etag=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            with server.lock:
+                server.requests[self.path] = server.requests.get(self.path, 0) + 1
+            if latency:
+                time.sleep(latency)
+
+            if self.path == "/sitemap.xml":
+                urls = "".join(f"<url><loc>{server.base_url}{path}</loc></url>" for path in site)
+                body = (
+                    '<?xml version="1.0" encoding="UTF-8"?>'
+                    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">' + urls + "</urlset>"
+                ).encode("utf-8")
+                self._send(200, body, "application/xml")
+                return
+
+            if self.path not in site:
+                self._send(404)
+                return
+            number = int(self.path.rsplit("/", 1)[1].split(".")[0])
+            if number in failing:
+                self._send(500)
+                return
+
+            etag = '"{}"'.format(hashlib.sha1(site[self.path]).hexdigest()[:16])
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, etag=etag)
+            else:
+                self._send(200, site[self.path], etag=etag)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = {}
+    server.paths = list(site)
+    server.base_url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def generate_clip(path, seconds, sample_rate=16000, seed=0):
+    """
+    Writes a mono 16-bit WAV of tone bursts separated by short silences,
+    a stand-in for speech with natural pauses.
+    """
+    rng = random.Random(seed)
+    frames = bytearray()
+    position = 0
+    total = int(seconds * sample_rate)
+    while position < total:
+        burst = int(rng.uniform(0.8, 2.5) * sample_rate)
+        pause = int(rng.uniform(0.2, 0.6) * sample_rate)
+        frequency = rng.uniform(150, 400)
+        for i in range(min(burst, total - position)):
+            sample = int(8000 * math.sin(2 * math.pi * frequency * i / sample_rate))
+            frames += struct.pack("<h", sample)
+        position += burst
+        silence = min(pause, max(0, total - position))
+        frames += b"\x00\x00" * silence
+        position += silence
+
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(bytes(frames))
+    return path
@@ -0,0 +1,337 @@
+"""
+NoteGenius benchmark suite.
+Runs offline against generated inputs and local servers:
+- pdf      PDFExtractor.extract_text on generated PDFs of several sizes,
+           cold and served from the page store
+- url      URLExtractor on HTML pages served locally (generated, or a
+           directory of saved pages): full download and 304 revalidation
+- youtube  YouTubeExtractor transcription of short audio clips (generated,
+           or a directory of clips); needs ffmpeg and Whisper, skipped otherwise
+- e2e      ContentProcessor.process_content end to end, with the stub LLM
+           server standing in for Gemini at a configurable latency
+
+Every cache used by the code under test is redirected to a temporary
+directory. Each measurement is the median of --repeat runs. Results are
+written as JSON (benchmarks/results/, not tracked) and compared against
+the baseline in benchmarks/baseline.json, which is meant to be committed.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --suites pdf url --pdf-pages 50 500
+    python -m benchmarks.run --save-baseline
+    python -m benchmarks.run --html-corpus saved_pages/ --llm-latency 1.5
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import config
+from benchmarks.fixtures import generate_clip, generate_pdf, start_site_server
+
+SUITES = ["pdf", "url", "youtube", "e2e"]
+RESULTS_DIR = Path(__file__).parent / "results"
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+
+def isolate(temp_dir):
+    """Points every cache and store at temp_dir. Must run before the extractors and processor are imported."""
+    temp_dir = Path(temp_dir)
+    config.CACHE_SETTINGS["dir"] = temp_dir / "content"
+    config.LLM_CACHE_SETTINGS["dir"] = temp_dir / "llm"
+    config.AUDIO_SETTINGS["cache_dir"] = temp_dir / "audio"
+    config.PAGE_STORE_PATH = temp_dir / "pages.db"
+    config.TELEMETRY_SETTINGS["log_path"] = temp_dir / "spans.jsonl"
+    config.LEDGER_SETTINGS["path"] = temp_dir / "ledger.db"
+    config.VAULT_INDEX_SETTINGS["path"] = temp_dir / "vault_index.db"
+    # The vault index scans OUTPUT_DIR; keep it off the real vault
+    config.OUTPUT_DIR = temp_dir / "notes"
+
+
+def measure(name, run, repeat, setup=None, **extra):
+    """Times run() repeat times (setup() before each, untimed) and returns a result dict."""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        run()
+        runs.append(time.perf_counter() - start)
+    result = {'name': name, 'seconds': statistics.median(runs), 'runs': runs}
+    result.update(extra)
+    print(f"  {name:<34} {result['seconds']:>8.3f}s")
+    return result
+
+
+def skipped(name, reason):
+    print(f"  {name:<34} skipped: {reason}")
+    return {'name': name, 'skipped': reason}
+
+
+def bench_pdf(args, temp_dir):
+    from extractors.page_store import PageStore
+    from extractors.pdf_extractor import PDFExtractor
+
+    results = []
+    for pages in args.pdf_pages:
+        path = generate_pdf(os.path.join(temp_dir, f"bench-{pages}.pdf"), pages)
+        cold = PDFExtractor(path, use_cache=False)
+        results.append(measure(
+            f"pdf.extract.{pages}p", lambda: cold.extract_text(), args.repeat, pages=pages
+        ))
+
+        stored = PDFExtractor(path)
+        stored.page_store = PageStore(os.path.join(temp_dir, f"pages-{pages}.db"))
+        stored.extract_text()  # populate the store
+        results.append(measure(
+            f"pdf.page_store.{pages}p", lambda: stored.extract_text(), args.repeat, pages=pages
+        ))
+    return results
+
+
+def load_html_corpus(directory):
+    if not directory:
+        return None
+    paths = sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in (".html", ".htm"))
+    return [p.read_bytes() for p in paths]
+
+
+def bench_url(args, temp_dir):
+    from extractors.cache import ContentCache
+    from extractors.url_extractor import URLExtractor
+
+    site = start_site_server(pages=args.url_pages, documents=load_html_corpus(args.html_corpus))
+    urls = [f"{site.base_url}{path}" for path in site.paths]
+    state = {}
+
+    def fresh_cache():
+        state['cache'] = ContentCache(cache_dir=tempfile.mkdtemp(dir=temp_dir))
+
+    def extract_all():
+        for url in urls:
+            extractor = URLExtractor(url)
+            extractor.cache = state['cache']
+            extractor.extract_content()
+
+    results = [measure("url.download_extract", extract_all, args.repeat, setup=fresh_cache, pages=len(urls))]
+    # The last cache holds every page, so this pass only revalidates
+    results.append(measure("url.revalidate_304", extract_all, args.repeat, pages=len(urls)))
+    site.shutdown()
+    return results
+
+
+def bench_youtube(args, temp_dir):
+    if not shutil.which("ffmpeg"):
+        return [skipped("youtube", "ffmpeg not found")]
+    if importlib.util.find_spec("whisper") is None:
+        return [skipped("youtube", "whisper not installed")]
+
+    from extractors.chunked_transcriber import probe_duration
+    from extractors.youtube_extractor import YouTubeExtractor
+
+    if args.clips:
+        clips = sorted(str(p) for p in Path(args.clips).iterdir() if p.is_file())
+    else:
+        clips = [
+            generate_clip(os.path.join(temp_dir, f"clip-{seconds}s.wav"), seconds, seed=seconds)
+            for seconds in (10, 30)
+        ]
+
+    extractor = YouTubeExtractor("https://www.youtube.com/watch?v=benchmark01")
+    results = []
+
+    # Cold: the worker has to start and load the model
+    extractor.worker.shutdown()
+    start = time.perf_counter()
+    result = extractor._transcribe_audio(clips[0], probe_duration(clips[0]))
+    results.append({
+        'name': "youtube.transcribe.cold",
+        'seconds': time.perf_counter() - start,
+        'load_seconds': result['load_seconds']
+    })
+    print(f"  {'youtube.transcribe.cold':<34} {results[-1]['seconds']:>8.3f}s")
+
+    for clip in clips:
+        duration = probe_duration(clip)
+        results.append(measure(
+            f"youtube.transcribe.warm.{Path(clip).stem}",
+            lambda: extractor._transcribe_audio(clip, duration),
+            args.repeat,
+            audio_seconds=duration
+        ))
+    return results
+
+
+def bench_e2e(args, temp_dir):
+    from llm_stub import start_stub_server
+
+    stub = start_stub_server(latency=args.llm_latency)
+    config.LLM_CLIENT_SETTINGS.update(
+        backend="stub",
+        stub_url=f"http://127.0.0.1:{stub.server_port}",
+        requests_per_minute=1_000_000,
+        backoff_base=0.01
+    )
+
+    from extractors.cache import get_cache
+    from extractors.page_store import get_page_store
+    from processor import ContentProcessor
+
+    processor = ContentProcessor()
+    site = start_site_server(pages=1)
+    pdf_path = generate_pdf(os.path.join(temp_dir, "e2e.pdf"), args.e2e_pdf_pages)
+    notes_dir = Path(temp_dir) / "notes"
+    counter = [0]
+
+    def reset():
+        # Every run starts with empty extraction caches
+        get_cache().clear()
+        get_page_store().clear()
+
+    def job(input_type, input_value):
+        def run():
+            counter[0] += 1
+            success, message = processor.process_content(
+                input_type, input_value, str(notes_dir / f"note-{counter[0]}.md"),
+                "Article", "english", "Focus on the main ideas.", fresh=True,
+                # Every run must extract and summarize, not find the source in the ledger
+                policy="force"
+            )
+            if not success:
+                raise RuntimeError(message)
+        return run
+
+    results = [
+        measure("e2e.manual", job("Manual Input", None), args.repeat, setup=reset,
+                llm_latency=args.llm_latency),
+        measure("e2e.url", job("url", f"{site.base_url}/page/1.html"), args.repeat, setup=reset,
+                llm_latency=args.llm_latency),
+        measure(f"e2e.pdf.{args.e2e_pdf_pages}p", job("file", pdf_path), args.repeat, setup=reset,
+                llm_latency=args.llm_latency),
+    ]
+    processor.client.close()
+    site.shutdown()
+    stub.shutdown()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Returns per-benchmark changes against a baseline (positive change = slower)."""
+    previous = {r['name']: r for r in baseline.get('results', []) if 'seconds' in r}
+    comparison = []
+    for result in results:
+        before = previous.get(result['name'])
+        if 'seconds' not in result or not before:
+            continue
+        change = result['seconds'] / before['seconds'] - 1 if before['seconds'] else 0.0
+        if change > threshold:
+            verdict = "slower"
+        elif change < -threshold:
+            verdict = "faster"
+        else:
+            verdict = "same"
+        comparison.append({
+            'name': result['name'],
+            'baseline_seconds': before['seconds'],
+            'seconds': result['seconds'],
+            'change': change,
+            'verdict': verdict
+        })
+    return comparison
+
+
+def print_comparison(comparison, baseline_path):
+    print(f"\nAgainst baseline {baseline_path}:")
+    print(f"{'benchmark':<34} {'baseline':>9} {'now':>9} {'change':>8}")
+    for row in comparison:
+        flag = "" if row['verdict'] == "same" else f"  {row['verdict']}"
+        print(
+            f"{row['name']:<34} {row['baseline_seconds']:>8.3f}s {row['seconds']:>8.3f}s "
+            f"{row['change']:>+7.1%}{flag}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the NoteGenius benchmark suite.")
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=SUITES)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark (median is reported)")
+    parser.add_argument("--pdf-pages", nargs="+", type=int, default=[20, 200], help="Generated PDF sizes")
+    parser.add_argument("--url-pages", type=int, default=30, help="Generated pages when no corpus is given")
+    parser.add_argument("--html-corpus", help="Directory of saved .html pages to serve locally")
+    parser.add_argument("--clips", help="Directory of audio clips (default: generated clips)")
+    parser.add_argument("--e2e-pdf-pages", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Stub model seconds per response")
+    parser.add_argument("--output", default=str(RESULTS_DIR / "latest.json"))
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--save-baseline", action="store_true", help="Also store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change reported as slower/faster")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with 1 if anything got slower")
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp(prefix="notegenius-bench-")
+    isolate(temp_dir)
+    suites = {'pdf': bench_pdf, 'url': bench_url, 'youtube': bench_youtube, 'e2e': bench_e2e}
+
+    results = []
+    try:
+        for name in args.suites:
+            print(f"{name}:")
+            results.extend(suites[name](args, temp_dir))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'llm_latency': args.llm_latency
+        },
+        'results': results,
+        'comparison': []
+    }
+
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists():
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            report['comparison'] = compare(results, json.load(f), args.threshold)
+        print_comparison(report['comparison'], baseline_path)
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output_path}")
+
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+
+    if args.fail_on_regression and any(row['verdict'] == "slower" for row in report['comparison']):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
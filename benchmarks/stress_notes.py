@@ -0,0 +1,157 @@
+"""
+Note writer stress test.
+Many threads add entries to a small set of shared notes at once through
+one NoteWriter, then every note is checked:
+- each entry is present exactly once, whole, and in its own note
+- entries never interleave (each sits between separators)
+- no temp files are left behind
+
+Runs with every fsync mode and with atomic and in-place appends, reporting
+entries/second and how many entries were coalesced per write. --legacy
+also runs the previous approach (check existence, open in "w" or "a"
+mode, stream chunks into the note) to show the entries it damages.
+
+Usage:
+    python -m benchmarks.stress_notes
+    python -m benchmarks.stress_notes --threads 32 --entries 200 --notes 4 --legacy
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from note_writer import NoteWriter
+
+SEPARATOR = "\n\n---\n\n\n"
+
+
+def make_entry(writer_id, n, rng):
+    """An entry that identifies itself and carries a checksum of its body."""
+    body = " ".join(rng.choice("lorem ipsum dolor sit amet consectetur".split()) for _ in range(rng.randint(20, 400)))
+    checksum = hashlib.sha1(body.encode()).hexdigest()[:12]
+    return f"entry {writer_id}-{n} {checksum}\n{body}"
+
+
+def legacy_write(path, text, chunk_size=64):
+    """
+    The previous way: decide the mode from os.path.exists, then open the
+    note and stream the text into it chunk by chunk as the model produced it.
+    """
+    mode = "a" if os.path.exists(path) else "w"
+    with open(path, mode, encoding="utf-8") as f:
+        if mode == "a":
+            f.write(SEPARATOR)
+        for i in range(0, len(text), chunk_size):
+            f.write(text[i:i + chunk_size])
+            f.flush()
+
+
+def run(write, directory, threads, entries, notes, seed=0):
+    """Runs the writers and returns (seconds, {note path: [entry ids written there]})."""
+    paths = [os.path.join(directory, f"note-{i}.md") for i in range(notes)]
+    expected = {path: [] for path in paths}
+    expected_lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(writer_id):
+        rng = random.Random(seed * 1000 + writer_id)
+        barrier.wait()
+        for n in range(entries):
+            path = rng.choice(paths)
+            write(path, make_entry(writer_id, n, rng))
+            with expected_lock:
+                expected[path].append(f"{writer_id}-{n}")
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start, expected
+
+
+def verify(directory, expected):
+    """Returns a list of problems found in the written notes."""
+    problems = []
+    leftovers = [name for name in os.listdir(directory) if name.endswith(".tmp")]
+    if leftovers:
+        problems.append(f"{len(leftovers)} temp files left")
+
+    for path, ids in expected.items():
+        if not ids:
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            entries = f.read().split(SEPARATOR)
+        found = []
+        for entry in entries:
+            header, _, body = entry.partition("\n")
+            parts = header.split()
+            if len(parts) != 3 or parts[0] != "entry":
+                problems.append(f"{os.path.basename(path)}: malformed entry {header[:40]!r}")
+                continue
+            if hashlib.sha1(body.encode()).hexdigest()[:12] != parts[2]:
+                problems.append(f"{os.path.basename(path)}: entry {parts[1]} is damaged or interleaved")
+            found.append(parts[1])
+        missing = set(ids) - set(found)
+        duplicated = len(found) - len(set(found))
+        if missing:
+            problems.append(f"{os.path.basename(path)}: {len(missing)} of {len(ids)} entries lost")
+        if duplicated:
+            problems.append(f"{os.path.basename(path)}: {duplicated} entries duplicated")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress the note writer with concurrent writers.")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--entries", type=int, default=100, help="Entries per thread")
+    parser.add_argument("--notes", type=int, default=3, help="Shared notes the threads write to")
+    parser.add_argument("--legacy", action="store_true", help="Also run the previous unsynchronized writes")
+    args = parser.parse_args()
+
+    total = args.threads * args.entries
+    print(f"{args.threads} threads x {args.entries} entries into {args.notes} notes\n")
+    print(f"{'writer':<26} {'entries/s':>10} {'per write':>10}  result")
+
+    configurations = [
+        (f"fsync={fsync}, {'atomic' if atomic else 'in-place'}", {'fsync': fsync, 'atomic_appends': atomic})
+        for atomic in (True, False)
+        for fsync in ("none", "file", "full")
+    ]
+    failed = False
+    for name, settings in configurations:
+        directory = tempfile.mkdtemp(prefix="notegenius-stress-")
+        try:
+            writer = NoteWriter(settings)
+            seconds, expected = run(
+                lambda path, text: writer.write(path, text, SEPARATOR),
+                directory, args.threads, args.entries, args.notes
+            )
+            problems = verify(directory, expected)
+            failed = failed or bool(problems)
+            coalesced = writer.stats['entries'] / writer.stats['writes'] if writer.stats['writes'] else 0.0
+            print(f"{name:<26} {total / seconds:>10.0f} {coalesced:>10.1f}  {'; '.join(problems) or 'ok'}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    if args.legacy:
+        directory = tempfile.mkdtemp(prefix="notegenius-stress-")
+        try:
+            seconds, expected = run(legacy_write, directory, args.threads, args.entries, args.notes)
+            problems = verify(directory, expected)
+            result = f"{len(problems)} problems, e.g. {problems[0]}" if problems else "ok"
+            print(f"{'legacy exists+open':<26} {total / seconds:>10.0f} {1.0:>10.1f}  {result}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,11 +17,91 @@ if not os.getenv('GOOGLE_API_KEY'):
 # Directory configurations
 BASE_DIR = Path(__file__).parent
 OUTPUT_DIR = Path(r"Obsidian vault path or any other directory")  
-CACHE_DIR = BASE_DIR / "cache"  # For storing YouTube transcriptions
+CACHE_DIR = BASE_DIR / "cache"  # For storing extracted content and downloaded audio
 ASSETS_DIR = BASE_DIR / "assets"  # For application assets like logos
+LOG_DIR = BASE_DIR / "logs"  # For stage timing logs
 
 # LLM Model configuration
 LLM_MODEL = "gemini-2.0-flash-exp"
+GENERATION_CONFIG = {
+    "temperature": 0.7
+}
+
+# LLM client settings (every model call goes through llm_client.LLMClient)
+LLM_CLIENT_SETTINGS = {
+    "backend": "gemini",  # "gemini", or "stub" to use the local server in llm_stub.py
+    "stub_url": "http://127.0.0.1:8765",
+    "concurrency": 4,  # Requests in flight at once across all jobs
+    "requests_per_minute": 60,  # Token-bucket rate limit
+    "timeout": 120,  # Seconds per request
+    "max_retries": 5,  # Retries on 429, 5xx and timeouts
+    "backoff_base": 1.0,  # Seconds; doubles per retry, with full jitter
+    "backoff_max": 60.0
+}
+
+# LLM response cache settings
+LLM_CACHE_SETTINGS = {
+    "enabled": True,
+    "dir": CACHE_DIR / "llm",
+    "max_mb": 100,  # Least recently used responses are evicted above this size
+    "ttl": 30 * 24 * 3600  # Seconds before a cached response is regenerated
+}
+
+# Whisper transcription settings
+WHISPER_SETTINGS = {
+    "model": "tiny",
+    "idle_timeout": 600,  # Seconds without jobs before the worker unloads the model
+    "prewarm_on_startup": True,  # Load the model in the background when the app starts
+    "parallel": True,  # Split long audio into chunks transcribed across CPU cores
+    "parallel_min_duration": 900,  # Seconds of audio before chunking kicks in
+    "parallel_workers": None,  # Pool size; None uses every CPU core
+    "chunk_seconds": 300,  # Target chunk length, snapped to the nearest silence
+    "overlap_seconds": 5  # Audio shared by neighbouring chunks for stitching
+}
+
+# Extraction cache settings (shared by the PDF, URL and YouTube extractors)
+CACHE_SETTINGS = {
+    "dir": CACHE_DIR / "content",
+    "max_mb": 500,  # Least recently used entries are evicted above this size
+    "compress": True,  # Store entries gzip-compressed
+    "url_ttl": 24 * 3600  # Seconds to trust a page that sends no ETag/Last-Modified
+}
+
+# PDF extraction settings
+PDF_SETTINGS = {
+    "parallel": True,  # Extract large page ranges in a process pool
+    "parallel_min_pages": 200,  # Pages before the parallel mode is used
+    "workers": os.cpu_count() or 1,
+    "batch_size": 50  # Pages per task sent to a worker
+}
+PAGE_STORE_PATH = CACHE_DIR / "pages.db"  # Per-page PDF text, reused across page ranges
+
+# YouTube audio download settings
+AUDIO_SETTINGS = {
+    "cache_dir": CACHE_DIR / "audio",  # Downloaded audio, reused across time ranges
+    "max_mb": 2000,  # Least recently used audio is deleted above this size
+    "download_workers": 4,  # Parallel range requests for full-length downloads
+    "segment_size": 10 * 1024 * 1024,  # Bytes per range request
+    "timeout": 30  # Seconds per range request
+}
+
+# Web page download settings
+HTTP_SETTINGS = {
+    "pool_size": 10,  # Keep-alive connections kept per host
+    "connect_timeout": 5,  # Seconds
+    "read_timeout": 20,  # Seconds between bytes of the response
+    "retries": 2,  # Retries on connection errors
+    "user_agent": "Mozilla/5.0 (compatible; NoteGenius)"
+}
+
+# Bulk web ingestion settings (web_ingest.py)
+INGEST_SETTINGS = {
+    "concurrency": 16,  # Pages downloading at once, across all hosts
+    "per_host": 2,  # Pages downloading at once from the same host
+    "host_delay": 0.25,  # Minimum seconds between requests to the same host
+    "parse_workers": max(1, (os.cpu_count() or 2) // 2),  # Processes parsing HTML
+    "summary_workers": 4  # Pages being summarized at once
+}
 
 # File type settings for PDF file dialog
 SUPPORTED_FILETYPES = [
@@ -76,6 +156,87 @@ BASE_PROMPT = """
 {content_section}
 """
 
+# Prompt used to summarize one chunk of a long document (map phase)
+CHUNK_PROMPT = """
+Summarize part {index} of {total} of a long document in {language}.
+Keep every key fact, definition, argument and example needed for a final combined summary.
+Instructions for the final summary (for context): {instructions}
+
+Content:
+{content}
+"""
+
+# Long document (map-reduce) summarization settings
+LONG_DOCUMENT_SETTINGS = {
+    "enabled": True,
+    "max_prompt_tokens": 200_000,  # Estimated tokens above which content is chunked
+    "chunk_tokens": 50_000,  # Estimated tokens per chunk in the map phase
+    "concurrency": 4,  # Chunk summaries in flight at once
+    "max_rounds": 3,  # Map rounds over the partial summaries before giving up
+    "min_shrink": 0.9  # A round must bring the text below this share of its size, or summarizing stops
+}
+
+# Note writing settings (note_writer.py)
+NOTE_WRITER_SETTINGS = {
+    "fsync": "file",  # "none" (fastest), "file", or "full" (also the folder, so renames survive a power loss)
+    "atomic_appends": True,  # Rewrite the note through a temp file on append; False appends in place (faster on large notes)
+    "replace_retries": 5  # Retries when the note is briefly locked by another program (Windows)
+}
+
+# Ledger of summarized sources (source_ledger.py)
+LEDGER_SETTINGS = {
+    "enabled": True,
+    "path": CACHE_DIR / "ledger.db",
+    "policy": "link"  # For a source already summarized with the same settings: "skip", "link" or "force"
+}
+
+# Index of the notes under OUTPUT_DIR (vault_index.py)
+VAULT_INDEX_SETTINGS = {
+    "enabled": True,
+    "path": CACHE_DIR / "vault_index.db",
+    "related_notes": 5,  # Related existing notes linked under each summary; 0 to disable
+    "context_tokens": 2000,  # Estimated tokens of note passages added to Manual Input prompts; 0 to disable
+    "context_passages": 20,  # Best passages considered for that budget
+    "passage_tokens": 200,  # Approximate size of an indexed passage
+    "query_terms": 24,  # Most frequent terms of a summary used to look up related notes
+    "common_term_ratio": 0.5,  # Terms in more than this share of the passages are left out of lookups...
+    "common_term_min_passages": 1000,  # ...once the vault has this many passages
+    "rescan_interval": 60  # Seconds before the vault is checked again for notes edited outside NoteGenius
+}
+
+# Compaction of extracted text before it goes into a prompt (prompt_compaction.py)
+COMPACTION_SETTINGS = {
+    "enabled": True,
+    # Steps run for each source type ("whitespace", "page_edges", "paragraphs",
+    # "repeats"); an empty tuple, or a missing source, sends the text as extracted
+    "sources": {
+        "file": ("whitespace", "page_edges", "paragraphs"),
+        "url": ("whitespace", "paragraphs"),
+        "youtube": ("whitespace", "repeats")
+    },
+    "edge_lines": 3,  # Lines checked at the top and bottom of each PDF page
+    "edge_min_pages": 3,  # Fewest pages a header or footer must repeat on
+    "edge_page_ratio": 0.5,  # Share of the pages a header or footer must repeat on
+    "min_paragraph_chars": 40,  # Shorter paragraphs are never treated as duplicates
+    "min_repeats": 3  # Back-to-back copies of a line or sentence before they count as a transcription loop
+}
+
+# Stage instrumentation settings (telemetry.py)
+TELEMETRY_SETTINGS = {
+    "enabled": True,
+    "log_path": LOG_DIR / "spans.jsonl",  # One JSON event per finished stage; None to disable
+    "max_log_mb": 50,  # The log is rotated to spans.jsonl.1 above this size
+    "prometheus_path": None  # Write Prometheus text here after every job (e.g. for a textfile collector)
+}
+
+# Stage pipeline settings (pipeline.ProcessingPipeline, used by batch.py --pipeline)
+PIPELINE_SETTINGS = {
+    "extract_workers": max(1, (os.cpu_count() or 2) // 2),  # Threads extracting PDFs/URLs/videos
+    "llm_workers": 4,  # Jobs waiting on the LLM at once
+    "writer_workers": 1,  # Threads writing notes
+    "queue_size": 8  # Capacity of each queue between stages
+}
+
 # UI settings
 INTERFACE_SETTINGS = {
     "window_title": "NoteGenius",
@@ -87,6 +248,7 @@ INTERFACE_SETTINGS = {
     "language_button_width": 100,
     "layout_button_width": 80,
     "button_spacing": 5,
+    "max_parallel_jobs": 2,  # Jobs processed at once; further submissions wait in the queue
     # "logo": { #if you dont have a logo, remove this section
     #     "path": ASSETS_DIR / "logo.png",
     #     "size": (60, 60)
@@ -0,0 +1,189 @@
+"""
+Range-limited YouTube audio acquisition for NoteGenius.
+Features:
+- Fetches only the requested time window (ffmpeg input-side seeking,
+  which reads the remote stream with HTTP range requests)
+- Segmented parallel download when the full audio is requested
+- Local audio cache so later windows of the same video are cut locally
+- Byte accounting per job
+"""
+
+import os
+import re
+import subprocess
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import requests
+from pytubefix import YouTube
+from config import AUDIO_SETTINGS
+
+VIDEO_ID_PATTERN = re.compile(r"(?:v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})")
+
+
+def extract_video_id(url):
+    """Returns the 11-character YouTube video id of a URL (or None)."""
+    match = VIDEO_ID_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+class AudioCache:
+    def __init__(self, cache_dir=None):
+        """
+        Stores downloaded audio per video as <video_id>/<start>_<end>.<ext>,
+        where end is 'full' for the complete stream.
+        """
+        self.cache_dir = Path(cache_dir or AUDIO_SETTINGS["cache_dir"])
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, video_id, start, end, extension):
+        """Returns the cache path for a window (end=None means full audio)."""
+        video_dir = self.cache_dir / video_id
+        video_dir.mkdir(exist_ok=True)
+        return video_dir / f"{start}_{end if end is not None else 'full'}.{extension}"
+
+    def find(self, video_id, start, end):
+        """
+        Returns (path, window_start) of a cached file covering [start, end],
+        or None. Files ending in 'full' run to the end of the stream.
+        """
+        video_dir = self.cache_dir / video_id
+        if not video_dir.exists():
+            return None
+
+        for path in video_dir.iterdir():
+            if path.suffix == ".part":
+                continue
+            cached_start, cached_end = path.stem.split("_")
+            cached_start = int(cached_start)
+            if cached_start > start:
+                continue
+            if cached_end == "full" or (end is not None and end <= int(cached_end)):
+                # Mark as recently used for LRU pruning
+                os.utime(path)
+                return path, cached_start
+        return None
+
+    def prune(self, max_bytes=None):
+        """Deletes least recently used audio until the cache fits in max_bytes."""
+        if max_bytes is None:
+            max_bytes = AUDIO_SETTINGS["max_mb"] * 1024 * 1024
+        files = [p for p in self.cache_dir.glob("*/*") if p.suffix != ".part"]
+        total = sum(p.stat().st_size for p in files)
+        for path in sorted(files, key=lambda p: p.stat().st_mtime):
+            if total <= max_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink()
+
+
+class AudioFetcher:
+    def __init__(self, url, cache=None):
+        self.url = url
+        self.video_id = extract_video_id(url)
+        self.cache = cache or AudioCache()
+        self.temp_dir = Path("temp")
+        self.temp_dir.mkdir(exist_ok=True)
+        self.bytes_downloaded = 0
+        self.from_cache = False
+        self.is_temporary = True
+
+    def _stream(self):
+        """Resolves the audio-only stream of the video."""
+        yt = YouTube(self.url)
+        if not self.video_id:
+            self.video_id = yt.video_id
+        return yt.streams.filter(only_audio=True).first()
+
+    def fetch(self, start_sec=0, end_sec=None):
+        """
+        Returns a path to an audio file containing exactly [start_sec, end_sec]
+        (end_sec=None means until the end). When is_temporary is set the
+        caller owns the file and should delete it; otherwise it is a cache file.
+        """
+        self.bytes_downloaded = 0
+        self.from_cache = False
+        self.is_temporary = True
+
+        cached = self.cache.find(self.video_id, start_sec, end_sec) if self.video_id else None
+        if cached:
+            self.from_cache = True
+            path, window_start = cached
+            if start_sec == window_start and path.stem.endswith("full") and end_sec is None:
+                self.is_temporary = False
+                return str(path)
+            return self._cut(str(path), start_sec - window_start,
+                             end_sec - window_start if end_sec is not None else None,
+                             path.suffix.lstrip("."))
+
+        stream = self._stream()
+        extension = stream.subtype or "mp4"
+
+        if start_sec == 0 and end_sec is None:
+            # Full audio: parallel ranged download straight into the cache
+            cache_path = self.cache.path_for(self.video_id, 0, None, extension)
+            self._download_segmented(stream.url, stream.filesize, cache_path)
+            self.cache.prune()
+            self.is_temporary = False
+            return str(cache_path)
+
+        # A window: let ffmpeg seek on the remote stream and copy only that part
+        cache_path = self.cache.path_for(self.video_id, start_sec, end_sec, extension)
+        part_path = cache_path.with_suffix(".part")
+        command = ['ffmpeg', '-y', '-ss', str(start_sec)]
+        if end_sec is not None:
+            command += ['-to', str(end_sec)]
+        command += ['-i', stream.url, '-c', 'copy', '-f', self._format(extension), str(part_path)]
+        subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        os.replace(part_path, cache_path)
+
+        # With stream copy, the output size is what was read from the remote stream
+        self.bytes_downloaded = cache_path.stat().st_size
+        self.cache.prune()
+        self.is_temporary = False
+        return str(cache_path)
+
+    def _format(self, extension):
+        """Maps a stream subtype to an ffmpeg muxer name."""
+        return "webm" if extension == "webm" else "mp4"
+
+    def _cut(self, source, start_sec, end_sec, extension):
+        """Copies [start_sec, end_sec] of a local file into a new temp file."""
+        target = self.temp_dir / f"audio_{uuid.uuid4().hex}.{extension}"
+        command = ['ffmpeg', '-y']
+        if start_sec:
+            command += ['-ss', str(start_sec)]
+        if end_sec is not None:
+            command += ['-to', str(end_sec)]
+        command += ['-i', source, '-c', 'copy', str(target)]
+        subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        return str(target)
+
+    def _download_segmented(self, stream_url, filesize, target):
+        """Downloads a stream in parallel byte ranges into target."""
+        segment_size = AUDIO_SETTINGS["segment_size"]
+        part_path = target.with_suffix(".part")
+        lock = threading.Lock()
+
+        with open(part_path, "wb") as f:
+            f.truncate(filesize)
+
+        def fetch_range(offset):
+            end = min(offset + segment_size, filesize) - 1
+            response = requests.get(
+                stream_url,
+                headers={'Range': f'bytes={offset}-{end}'},
+                timeout=AUDIO_SETTINGS["timeout"]
+            )
+            response.raise_for_status()
+            with lock:
+                with open(part_path, "r+b") as f:
+                    f.seek(offset)
+                    f.write(response.content)
+                self.bytes_downloaded += len(response.content)
+
+        with ThreadPoolExecutor(max_workers=AUDIO_SETTINGS["download_workers"]) as pool:
+            list(pool.map(fetch_range, range(0, filesize, segment_size)))
+
+        os.replace(part_path, target)
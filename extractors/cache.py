@@ -0,0 +1,345 @@
+"""
+Content-addressed extraction cache shared by all NoteGenius extractors.
+Features:
+- Keys built from content fingerprints (file hash, URL validators, video id)
+- Size-bounded LRU eviction
+- Optional gzip compression of stored entries
+- Optional per-entry time-to-live
+- Persistent hit/miss statistics
+- An SQLite index shared safely by threads and processes; access times
+  and counters of reads are written in batches
+- Small CLI to inspect and prune the cache:
+    python -m extractors.cache stats|list|prune [--max-mb N]|clear
+"""
+
+import argparse
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import weakref
+from pathlib import Path
+from config import CACHE_SETTINGS
+
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(*parts):
+    """Builds a cache key from any JSON-serializable parts."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def file_fingerprint(path, block_size=1024 * 1024):
+    """Returns the SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    file TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL,
+    expires REAL
+);
+CREATE INDEX IF NOT EXISTS entries_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+# Reads are counted in memory and written to the index in batches
+FLUSH_READS = 100
+FLUSH_SECONDS = 30
+
+# Open caches, flushed once at exit (weakly held, so a cache can still be freed)
+_open_caches = weakref.WeakSet()
+
+
+def _flush_open_caches():
+    for cache in list(_open_caches):
+        cache.flush()
+
+
+atexit.register(_flush_open_caches)
+
+
+class ContentCache:
+    def __init__(self, cache_dir=None, max_bytes=None, compress=None):
+        """
+        Opens (or creates) a cache directory holding one file per entry
+        plus an SQLite index (index.db) with sizes, access times and
+        statistics, safe to share between threads and processes.
+        """
+        self.cache_dir = Path(cache_dir or CACHE_SETTINGS["dir"])
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes if max_bytes is not None else CACHE_SETTINGS["max_mb"] * 1024 * 1024
+        self.compress = compress if compress is not None else CACHE_SETTINGS["compress"]
+        self.db_path = str(self.cache_dir / "index.db")
+        self._lock = threading.Lock()
+        # Access times and counters not yet written to the index
+        self._accessed = {}
+        self._counts = {}
+        self._last_flush = time.time()
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+            self._import_json_index(db)
+        _open_caches.add(self)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _import_json_index(self, db):
+        """Moves the entries of an index.json left by earlier versions into the database."""
+        json_path = self.cache_dir / "index.json"
+        try:
+            with open(json_path, "r") as f:
+                data = json.load(f)
+            db.executemany(
+                "INSERT OR IGNORE INTO entries (key, file, kind, size, created, last_access, expires) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (key, e["file"], e["kind"], e["size"], e["created"], e["last_access"], e.get("expires"))
+                    for key, e in data["entries"].items()
+                ]
+            )
+            self._add_counts(db, data["stats"])
+        except (OSError, ValueError, KeyError):
+            return
+        os.remove(json_path)
+
+    def _add_counts(self, db, counts):
+        db.executemany(
+            "INSERT INTO stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            list(counts.items())
+        )
+
+    def _entry_path(self, entry):
+        return self.cache_dir / entry["file"]
+
+    def get(self, key):
+        """Returns the cached value for key, or None on a miss."""
+        with self._connect() as db:
+            db.row_factory = sqlite3.Row
+            row = db.execute("SELECT * FROM entries WHERE key = ?", (key,)).fetchone()
+            entry = dict(row) if row else None
+            if entry and entry["expires"] and entry["expires"] < time.time():
+                self._remove(db, entry)
+                entry = None
+
+            value = None
+            if entry:
+                try:
+                    opener = gzip.open if entry["file"].endswith(".gz") else open
+                    with opener(self._entry_path(entry), "rt", encoding="utf-8") as f:
+                        value = json.load(f)
+                except (OSError, ValueError):
+                    self._remove(db, entry)
+
+        with self._lock:
+            if value is None:
+                self._count('misses')
+            else:
+                self._count('hits')
+                self._accessed[key] = time.time()
+            due = len(self._accessed) >= FLUSH_READS or time.time() - self._last_flush >= FLUSH_SECONDS
+        if due:
+            self.flush()
+        return value
+
+    def _count(self, name, amount=1):
+        """Adds to an in-memory counter. Caller holds the lock."""
+        self._counts[name] = self._counts.get(name, 0) + amount
+
+    def flush(self):
+        """Writes the access times and counters gathered since the last flush."""
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+            counts, self._counts = self._counts, {}
+            self._last_flush = time.time()
+        if (not accessed and not counts) or not self.cache_dir.is_dir():
+            return  # Nothing to write, or the cache was deleted
+        try:
+            with self._connect() as db:
+                db.executemany(
+                    "UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?",
+                    [(access, key) for key, access in accessed.items()]
+                )
+                self._add_counts(db, counts)
+        except sqlite3.Error as e:
+            # Only bookkeeping is lost (LRU order, hit/miss counts)
+            logger.warning(f"Error writing cache access times: {str(e)}")
+
+    def set(self, key, value, kind="content", ttl=None):
+        """Stores a JSON-serializable value and evicts old entries if needed."""
+        filename = f"{key}.json.gz" if self.compress else f"{key}.json"
+        path = self.cache_dir / filename
+
+        # A unique temp file, so concurrent writers never share one
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{key[:16]}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            opener = gzip.open if self.compress else open
+            with opener(temp_path, "wt", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        self.flush()
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute("SELECT file FROM entries WHERE key = ?", (key,)).fetchone()
+            if row and row[0] != filename:
+                self._unlink(row[0])
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, file, kind, size, created, last_access, expires) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, filename, kind, path.stat().st_size, now, now, now + ttl if ttl else None)
+            )
+            self._evict(db, self.max_bytes)
+
+    def _unlink(self, filename):
+        try:
+            (self.cache_dir / filename).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _remove(self, db, entry):
+        """Deletes an entry and its file."""
+        db.execute("DELETE FROM entries WHERE key = ?", (entry["key"],))
+        self._unlink(entry["file"])
+
+    def _evict(self, db, max_bytes):
+        """Removes least recently used entries until the cache fits. Returns entries removed."""
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= max_bytes:
+            return 0
+        removed = 0
+        for key, filename, size in db.execute(
+            "SELECT key, file, size FROM entries ORDER BY last_access"
+        ).fetchall():
+            if total <= max_bytes:
+                break
+            total -= size
+            self._remove(db, {'key': key, 'file': filename})
+            removed += 1
+        return removed
+
+    def add_stat(self, name, amount=1):
+        """Adds to a custom persistent counter (e.g. seconds saved)."""
+        with self._lock:
+            self._count(name, amount)
+
+    def prune(self, max_bytes=None):
+        """Drops expired entries and shrinks the cache to max_bytes. Returns entries removed."""
+        self.flush()
+        with self._connect() as db:
+            db.row_factory = sqlite3.Row
+            expired = db.execute(
+                "SELECT key, file FROM entries WHERE expires IS NOT NULL AND expires < ?", (time.time(),)
+            ).fetchall()
+            for entry in expired:
+                self._remove(db, entry)
+            return len(expired) + self._evict(db, self.max_bytes if max_bytes is None else max_bytes)
+
+    def clear(self):
+        """Removes every entry and resets statistics."""
+        with self._lock:
+            self._accessed = {}
+            self._counts = {}
+        with self._connect() as db:
+            for (filename,) in db.execute("SELECT file FROM entries").fetchall():
+                self._unlink(filename)
+            db.execute("DELETE FROM entries")
+            db.execute("DELETE FROM stats")
+
+    def entries(self):
+        """Returns every entry as a dict, most recently used first."""
+        self.flush()
+        with self._connect() as db:
+            db.row_factory = sqlite3.Row
+            return [dict(row) for row in db.execute("SELECT * FROM entries ORDER BY last_access DESC")]
+
+    def summary(self):
+        """Returns size and hit/miss figures for the whole cache."""
+        self.flush()
+        with self._connect() as db:
+            count, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            stats = dict(db.execute("SELECT name, value FROM stats").fetchall())
+        hits = int(stats.pop('hits', 0))
+        misses = int(stats.pop('misses', 0))
+        lookups = hits + misses
+        return {
+            'entries': count,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            **stats
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Returns the process-wide shared extraction cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ContentCache()
+        return _cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and prune the NoteGenius extraction cache.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Show size and hit/miss statistics")
+    subparsers.add_parser("list", help="List entries, most recently used first")
+    prune_parser = subparsers.add_parser("prune", help="Drop expired entries and shrink the cache")
+    prune_parser.add_argument("--max-mb", type=float, help="Target size in MB (defaults to the configured limit)")
+    subparsers.add_parser("clear", help="Remove every entry")
+    args = parser.parse_args()
+
+    cache = ContentCache()
+    if args.command == "stats":
+        summary = cache.summary()
+        print(f"Entries:  {summary['entries']}")
+        print(f"Size:     {summary['bytes'] / 1_000_000:.1f} MB of {summary['max_bytes'] / 1_000_000:.1f} MB")
+        print(f"Hits:     {summary['hits']}")
+        print(f"Misses:   {summary['misses']}")
+        print(f"Hit rate: {summary['hit_rate']:.1%}")
+    elif args.command == "list":
+        for entry in cache.entries():
+            last_access = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["last_access"]))
+            print(f"{entry['key'][:16]}  {entry['kind']:<8} {entry['size']:>10,} B  {last_access}")
+    elif args.command == "prune":
+        max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb is not None else None
+        print(f"Removed {cache.prune(max_bytes)} entries")
+    elif args.command == "clear":
+        cache.clear()
+        print("Cache cleared")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Parallel chunked transcription for long YouTube audio.
+Features:
+- Splits audio into overlapping chunks, snapping cuts to silences
+- Transcribes chunks in a process pool sized to the machine
+- Stitches segments back with de-duplicated overlap and global timestamps
+"""
+
+import multiprocessing
+import os
+import re
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from config import WHISPER_SETTINGS
+
+_model = None
+
+
+def _init_pool(model_name, threads):
+    """Loads the Whisper model once per pool process."""
+    global _model
+    import torch
+    import whisper
+    torch.set_num_threads(threads)
+    _model = whisper.load_model(model_name)
+
+
+def _transcribe_chunk(chunk_path, offset):
+    """Transcribes one chunk and shifts its segments to global timestamps."""
+    result = _model.transcribe(
+        chunk_path,
+        fp16=False,
+        task='transcribe',
+        language=None  # Auto-detect language
+    )
+    return [
+        {'start': s["start"] + offset, 'end': s["end"] + offset, 'text': s["text"]}
+        for s in result.get("segments", [])
+    ]
+
+
+def probe_duration(audio_path):
+    """Returns the audio duration in seconds using ffprobe."""
+    output = subprocess.run([
+        'ffprobe',
+        '-v', 'error',
+        '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1',
+        str(audio_path)
+    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True).stdout
+    return float(output.strip())
+
+
+def detect_silences(audio_path, noise="-30dB", min_silence=0.5):
+    """Returns a list of (start, end) silence intervals found by ffmpeg."""
+    stderr = subprocess.run([
+        'ffmpeg',
+        '-i', str(audio_path),
+        '-af', f'silencedetect=noise={noise}:d={min_silence}',
+        '-f', 'null', '-'
+    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True).stderr
+
+    starts = [float(x) for x in re.findall(r"silence_start: ([\d.]+)", stderr)]
+    ends = [float(x) for x in re.findall(r"silence_end: ([\d.]+)", stderr)]
+    return list(zip(starts, ends))
+
+
+def plan_chunks(duration, silences, chunk_seconds, overlap_seconds):
+    """
+    Plans (start, end) chunk boundaries.
+    Each cut is moved to the middle of the closest silence within a quarter
+    chunk of its target, and every chunk extends overlap_seconds past the cut.
+    """
+    midpoints = [(start + end) / 2 for start, end in silences]
+    window = chunk_seconds / 4
+
+    cuts = []
+    target = chunk_seconds
+    while target < duration - window:
+        nearby = [m for m in midpoints if abs(m - target) <= window]
+        cut = min(nearby, key=lambda m: abs(m - target)) if nearby else target
+        cuts.append(cut)
+        target = cut + chunk_seconds
+
+    bounds = [0.0] + cuts + [duration]
+    return [
+        (bounds[i], min(bounds[i + 1] + overlap_seconds, duration))
+        for i in range(len(bounds) - 1)
+    ]
+
+
+def stitch_segments(chunks, overlap_seconds):
+    """
+    Merges per-chunk segment lists (in chunk order) into one timeline.
+    In each overlap, segments are taken from the earlier chunk up to the
+    overlap midpoint and from the later chunk after it. A segment repeating
+    the previous one is dropped only when both lie within overlap_seconds
+    of that midpoint, so phrases genuinely said twice are kept.
+    """
+    merged = []
+    for i, (bounds, segments) in enumerate(chunks):
+        lower = None
+        upper = None
+        if i > 0:
+            previous_end = chunks[i - 1][0][1]
+            lower = (bounds[0] + previous_end) / 2
+        if i < len(chunks) - 1:
+            next_start = chunks[i + 1][0][0]
+            upper = (next_start + bounds[1]) / 2
+
+        for segment in segments:
+            middle = (segment['start'] + segment['end']) / 2
+            if lower is not None and middle < lower:
+                continue
+            if upper is not None and middle >= upper:
+                continue
+            if (
+                lower is not None
+                and merged
+                and segment['text'].strip() == merged[-1]['text'].strip()
+                and _near(segment, lower, overlap_seconds)
+                and _near(merged[-1], lower, overlap_seconds)
+            ):
+                continue
+            merged.append(segment)
+    return merged
+
+
+def _near(segment, boundary, seconds):
+    """Whether a segment's midpoint lies within seconds of a chunk boundary."""
+    return abs((segment['start'] + segment['end']) / 2 - boundary) <= seconds
+
+
+class ChunkedTranscriber:
+    def __init__(self, model_name=None, chunk_seconds=None, overlap_seconds=None, workers=None):
+        """Configures chunking and pool size from WHISPER_SETTINGS by default."""
+        self.model_name = model_name or WHISPER_SETTINGS["model"]
+        self.chunk_seconds = chunk_seconds or WHISPER_SETTINGS["chunk_seconds"]
+        self.overlap_seconds = overlap_seconds or WHISPER_SETTINGS["overlap_seconds"]
+        self.workers = workers or WHISPER_SETTINGS["parallel_workers"] or os.cpu_count() or 1
+
+    def should_split(self, duration):
+        """Whether a file of this duration is worth transcribing in parallel."""
+        return (
+            WHISPER_SETTINGS["parallel"]
+            and duration >= WHISPER_SETTINGS["parallel_min_duration"]
+        )
+
+    def transcribe(self, audio_path, duration=None):
+        """
+        Transcribes audio_path in parallel chunks.
+        Returns the same payload shape as the transcription worker.
+        """
+        start = time.perf_counter()
+        duration = duration or probe_duration(audio_path)
+        silences = detect_silences(audio_path)
+        plan = plan_chunks(duration, silences, self.chunk_seconds, self.overlap_seconds)
+
+        workers = min(self.workers, len(plan))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+
+        with tempfile.TemporaryDirectory() as chunk_dir:
+            paths = []
+            for i, (chunk_start, chunk_end) in enumerate(plan):
+                chunk_path = os.path.join(chunk_dir, f"chunk_{i:04d}.wav")
+                subprocess.run([
+                    'ffmpeg',
+                    '-ss', str(chunk_start),
+                    '-to', str(chunk_end),
+                    '-i', str(audio_path),
+                    '-ac', '1',
+                    '-ar', '16000',
+                    chunk_path
+                ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+                paths.append(chunk_path)
+
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_pool,
+                initargs=(self.model_name, threads)
+            ) as pool:
+                futures = [
+                    pool.submit(_transcribe_chunk, path, bounds[0])
+                    for path, bounds in zip(paths, plan)
+                ]
+                chunks = [(bounds, f.result()) for bounds, f in zip(plan, futures)]
+
+        segments = stitch_segments(chunks, self.overlap_seconds)
+        return {
+            'text': "".join(s['text'] for s in segments),
+            'segments': segments,
+            'cold': True,
+            'load_seconds': 0.0,
+            'transcribe_seconds': time.perf_counter() - start,
+            'total_seconds': time.perf_counter() - start,
+            'chunks': len(plan),
+            'workers': workers
+        }
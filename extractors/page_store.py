@@ -0,0 +1,122 @@
+"""
+Per-page PDF text store for NoteGenius.
+Keeps extracted page text in SQLite, keyed by file content hash and page
+number, so any page range of a document seen before is served without
+touching PyPDF2. Files are re-hashed only when their size or modification
+time changes; pages of a replaced file version are dropped.
+"""
+
+import os
+import sqlite3
+import threading
+from extractors.cache import file_fingerprint
+from config import PAGE_STORE_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    hash TEXT PRIMARY KEY,
+    page_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    hash TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (hash, page)
+);
+"""
+
+
+class PageStore:
+    def __init__(self, db_path=None):
+        self.db_path = str(db_path or PAGE_STORE_PATH)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def fingerprint(self, path):
+        """
+        Returns the content hash of a file, re-hashing only if its size or
+        mtime changed. A changed file's old pages are removed.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock, self._connect() as db:
+            row = db.execute("SELECT size, mtime, hash FROM files WHERE path = ?", (path,)).fetchone()
+            if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+                return row[2]
+
+            file_hash = file_fingerprint(path)
+            db.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime, hash) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime, file_hash)
+            )
+            if row and row[2] != file_hash:
+                self._drop_if_unused(db, row[2])
+            return file_hash
+
+    def _drop_if_unused(self, db, file_hash):
+        """Deletes a document version no tracked file points to any more."""
+        if db.execute("SELECT 1 FROM files WHERE hash = ?", (file_hash,)).fetchone():
+            return
+        db.execute("DELETE FROM pages WHERE hash = ?", (file_hash,))
+        db.execute("DELETE FROM documents WHERE hash = ?", (file_hash,))
+
+    def page_count(self, file_hash):
+        """Returns the stored page count of a document, or None."""
+        with self._connect() as db:
+            row = db.execute("SELECT page_count FROM documents WHERE hash = ?", (file_hash,)).fetchone()
+        return row[0] if row else None
+
+    def set_page_count(self, file_hash, page_count):
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO documents (hash, page_count) VALUES (?, ?)",
+                (file_hash, page_count)
+            )
+
+    def get_pages(self, file_hash, first, last):
+        """Returns {page_number: text} for stored pages in [first, last] (1-based)."""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT page, text FROM pages WHERE hash = ? AND page BETWEEN ? AND ?",
+                (file_hash, first, last)
+            ).fetchall()
+        return dict(rows)
+
+    def put_pages(self, file_hash, pages):
+        """Stores an iterable of (page_number, text)."""
+        with self._lock, self._connect() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO pages (hash, page, text) VALUES (?, ?, ?)",
+                ((file_hash, page, text) for page, text in pages)
+            )
+
+    def clear(self):
+        """Removes every stored file, document and page."""
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM pages")
+            db.execute("DELETE FROM documents")
+            db.execute("DELETE FROM files")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_page_store():
+    """Returns the process-wide shared page store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PageStore()
+        return _store
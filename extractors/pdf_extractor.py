@@ -1,30 +1,148 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from PyPDF2 import PdfReader
+from extractors.page_store import get_page_store
+import telemetry
+from config import PDF_SETTINGS
+
+_reader = None
+
+
+def _init_worker(file_path):
+    """Opens the PDF once per worker process."""
+    global _reader
+    _reader = PdfReader(file_path)
+
+
+def _extract_batch(page_numbers):
+    """Extracts the given pages (1-based) in a worker process."""
+    return [(page, _reader.pages[page - 1].extract_text()) for page in page_numbers]
+
 
 class PDFExtractor:
-    def __init__(self, file_path, page_range=None):
+    def __init__(self, file_path, page_range=None, use_cache=True):
         """
         Initializes the PDF extractor.
         page_range: tuple (start, end) or None for all pages
+        use_cache: reuse pages from the per-page store
         """
         self.file_path = file_path
         self.page_range = page_range
-    
-    def extract_text(self):
-        """Extracts text from a PDF file."""
-        reader = PdfReader(self.file_path)
-        text = ""
-        
-        # Define page range
+        self.use_cache = use_cache
+        self.page_store = get_page_store() if use_cache else None
+        self._page_count = None
+
+        # Where the pages of the last extract_text call came from
+        self.pages_from_store = 0
+        self.pages_extracted = 0
+
+    def page_count(self):
+        if self._page_count is None:
+            self._page_count = len(PdfReader(self.file_path).pages)
+        return self._page_count
+
+    def _bounds(self, page_count):
+        """Returns the 0-based [start, end) page bounds, validating the range."""
         start = self.page_range[0] - 1 if self.page_range else 0
-        end = self.page_range[1] if self.page_range else len(reader.pages)
-        
+        end = self.page_range[1] if self.page_range else page_count
+
         # Validate range
-        if start < 0 or end > len(reader.pages) or start >= end:
+        if start < 0 or end > page_count or start >= end:
             raise ValueError("Invalid page range")
-        
-        # Extract text from selected pages
-        for page_num in range(start, end):
-            text += f"\n--- Page {page_num + 1} ---\n"
-            text += reader.pages[page_num].extract_text()
-        
-        return text 
\ No newline at end of file
+        return start, end
+
+    def _selected_pages(self):
+        start, end = self._bounds(self.page_count())
+        return list(range(start + 1, end + 1))
+
+    def iter_pages(self, page_numbers=None):
+        """
+        Yields (page_number, text) one page at a time, for the selected range
+        or the given 1-based page numbers.
+        """
+        reader = PdfReader(self.file_path)
+        self._page_count = len(reader.pages)
+        for page in page_numbers or self._selected_pages():
+            yield page, reader.pages[page - 1].extract_text()
+
+    def iter_pages_parallel(self, page_numbers=None, workers=None, batch_size=None):
+        """
+        Yields (page_number, text) in page order while batches of pages are
+        extracted in a process pool.
+        """
+        workers = workers or PDF_SETTINGS["workers"]
+        batch_size = batch_size or PDF_SETTINGS["batch_size"]
+        page_numbers = page_numbers or self._selected_pages()
+        batches = [page_numbers[i:i + batch_size] for i in range(0, len(page_numbers), batch_size)]
+
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(batches)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.file_path,)
+        ) as pool:
+            # map keeps batch order, so pages come out in document order
+            for batch in pool.map(_extract_batch, batches):
+                yield from batch
+
+    def _extract_pages(self, page_numbers, parallel=None):
+        """Extracts pages with PyPDF2, in parallel when there are many of them."""
+        if parallel is None:
+            parallel = PDF_SETTINGS["parallel"] and len(page_numbers) >= PDF_SETTINGS["parallel_min_pages"]
+        if parallel:
+            return self.iter_pages_parallel(page_numbers)
+        return self.iter_pages(page_numbers)
+
+    def extract_text(self, parallel=None):
+        """
+        Extracts text from a PDF file.
+        Pages already in the page store are served from it; only never-seen
+        pages are extracted (and then stored).
+        parallel: True/False to force a mode; None picks parallel for many pages.
+        """
+        with telemetry.span("pdf.extract", input_bytes=os.path.getsize(self.file_path)) as pdf_span:
+            text = self._extract_text(parallel)
+            pdf_span.set(
+                pages=self.pages_from_store + self.pages_extracted,
+                pages_from_store=self.pages_from_store,
+                pages_extracted=self.pages_extracted,
+                cache=("miss" if self.pages_extracted else "hit") if self.use_cache else None,
+                output_chars=len(text)
+            )
+            return text
+
+    def _extract_text(self, parallel):
+        self.pages_from_store = 0
+        self.pages_extracted = 0
+
+        if not self.use_cache:
+            pages = list(self._extract_pages(self._selected_pages(), parallel))
+            self.pages_extracted = len(pages)
+            return self._join(pages)
+
+        file_hash = self.page_store.fingerprint(self.file_path)
+        self._page_count = self.page_store.page_count(file_hash)
+        if self._page_count is None:
+            self.page_store.set_page_count(file_hash, self.page_count())
+        selected = self._selected_pages()
+
+        stored = self.page_store.get_pages(file_hash, selected[0], selected[-1])
+        missing = [page for page in selected if page not in stored]
+        if missing:
+            extracted = list(self._extract_pages(missing, parallel))
+            self.page_store.put_pages(file_hash, extracted)
+            stored.update(extracted)
+
+        self.pages_from_store = len(selected) - len(missing)
+        self.pages_extracted = len(missing)
+
+        return self._join((page, stored[page]) for page in selected)
+
+    def _join(self, pages):
+        """Builds the document text from (page_number, text) pairs, joining once at the end."""
+        parts = []
+        for page_number, page_text in pages:
+            parts.append(f"\n--- Page {page_number} ---\n")
+            parts.append(page_text)
+        return "".join(parts)
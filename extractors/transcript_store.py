@@ -0,0 +1,91 @@
+"""
+Timestamped transcript store for YouTube videos.
+Keeps one timeline of Whisper segments per video (in the shared extraction
+cache) and serves any time window from it. Only the parts of a requested
+window that were never transcribed need new audio and transcription.
+"""
+
+from extractors.cache import get_cache, make_key
+
+# Gaps shorter than this (in seconds) are rounding noise, not missing audio
+MIN_GAP = 1.0
+
+
+class TranscriptStore:
+    def __init__(self, video_id, url=None, cache=None):
+        self.video_id = video_id
+        self.cache = cache or get_cache()
+        self.key = make_key("youtube-timeline", video_id)
+        timeline = self.cache.get(self.key) or {}
+        self.url = timeline.get('url', url)
+        self.duration = timeline.get('duration')
+        self.covered = [tuple(interval) for interval in timeline.get('covered', [])]
+        self.segments = timeline.get('segments', [])
+
+    def missing(self, start, end=None):
+        """
+        Returns the (start, end) gaps inside [start, end] that were never
+        transcribed. end=None means until the end of the video, and a gap
+        ending in None runs to the end as well.
+        """
+        if self.duration is not None:
+            end = self.duration if end is None else min(end, self.duration)
+
+        gaps = []
+        cursor = start
+        for covered_start, covered_end in self.covered:
+            if end is not None and covered_start >= end:
+                break
+            if covered_end <= cursor:
+                continue
+            if covered_start - cursor >= MIN_GAP:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+
+        if end is None:
+            gaps.append((cursor, None))
+        elif end - cursor >= MIN_GAP:
+            gaps.append((cursor, end))
+        return gaps
+
+    def add(self, start, end, segments):
+        """
+        Merges newly transcribed segments (global timestamps) for [start, end]
+        into the timeline and saves it.
+        """
+        def inside(segment):
+            middle = (segment['start'] + segment['end']) / 2
+            return start <= middle < end
+
+        self.segments = [s for s in self.segments if not inside(s)]
+        self.segments.extend(s for s in segments if inside(s))
+        self.segments.sort(key=lambda s: s['start'])
+
+        merged = []
+        for interval in sorted(self.covered + [(start, end)]):
+            if merged and interval[0] <= merged[-1][1] + MIN_GAP:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], interval[1]))
+            else:
+                merged.append(interval)
+        self.covered = merged
+        self.save()
+
+    def save(self):
+        self.cache.set(self.key, {
+            'url': self.url,
+            'video_id': self.video_id,
+            'duration': self.duration,
+            'covered': self.covered,
+            'segments': self.segments
+        }, kind="youtube")
+
+    def window_segments(self, start, end=None):
+        """Returns the stored segments whose midpoint falls inside [start, end]."""
+        return [
+            s for s in self.segments
+            if start <= (s['start'] + s['end']) / 2 and (end is None or (s['start'] + s['end']) / 2 < end)
+        ]
+
+    def text(self, start, end=None):
+        """Returns the transcript text of a window."""
+        return "".join(s['text'] for s in self.window_segments(start, end))
@@ -0,0 +1,219 @@
+"""
+Shared Whisper transcription worker for NoteGenius.
+Features:
+- Loads the Whisper model once, in a dedicated process outside the GUI
+- Accepts transcription jobs over a queue and reuses the model across jobs
+- Exits after a configurable idle timeout to give memory back
+- Records cold vs. warm job timings
+"""
+
+import atexit
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from config import WHISPER_SETTINGS
+
+
+def _worker_loop(model_name, idle_timeout, jobs, results):
+    """
+    Worker process body. Loads the model on the first job and keeps it
+    until no job arrives for idle_timeout seconds, then exits.
+    """
+    model = None
+    while True:
+        try:
+            job = jobs.get(timeout=idle_timeout)
+        except queue.Empty:
+            # Idle for too long: exit so the OS reclaims the model memory
+            return
+        if job is None:
+            return
+
+        job_id, audio_path, options = job
+        results.put(("started", job_id, None))
+        try:
+            cold = model is None
+            load_seconds = 0.0
+            if cold:
+                start = time.perf_counter()
+                import whisper
+                model = whisper.load_model(model_name)
+                load_seconds = time.perf_counter() - start
+
+            # A job without audio only warms the model up
+            if audio_path is None:
+                results.put(("done", job_id, {
+                    'text': "",
+                    'segments': [],
+                    'warmup': True,
+                    'cold': cold,
+                    'load_seconds': load_seconds,
+                    'transcribe_seconds': 0.0
+                }))
+                continue
+
+            start = time.perf_counter()
+            result = model.transcribe(
+                audio_path,
+                fp16=False,
+                task='transcribe',
+                language=None,  # Auto-detect language
+                **options
+            )
+            results.put(("done", job_id, {
+                'text': result["text"],
+                'segments': [
+                    {'start': s["start"], 'end': s["end"], 'text': s["text"]}
+                    for s in result.get("segments", [])
+                ],
+                'cold': cold,
+                'load_seconds': load_seconds,
+                'transcribe_seconds': time.perf_counter() - start
+            }))
+        except Exception as e:
+            results.put(("error", job_id, str(e)))
+
+
+class TranscriptionWorker:
+    def __init__(self, model_name=None, idle_timeout=None):
+        """
+        Client side of the transcription worker.
+        The worker process is started lazily and restarted transparently
+        after it exits on idle timeout.
+        """
+        self.model_name = model_name or WHISPER_SETTINGS["model"]
+        self.idle_timeout = idle_timeout or WHISPER_SETTINGS["idle_timeout"]
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._jobs = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._process = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._current_job = None
+        self._ids = itertools.count(1)
+        self._dispatcher = None
+
+        self.stats = {
+            'cold_jobs': 0,
+            'warm_jobs': 0,
+            'cold_seconds': 0.0,
+            'warm_seconds': 0.0
+        }
+
+    def _ensure_running(self):
+        """Starts the worker process and result dispatcher if needed. Caller holds the lock."""
+        if self._process is None or not self._process.is_alive():
+            self._process = self._ctx.Process(
+                target=_worker_loop,
+                args=(self.model_name, self.idle_timeout, self._jobs, self._results),
+                daemon=True
+            )
+            self._process.start()
+            self._current_job = None
+
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch(self):
+        """Routes worker results to the futures of waiting callers."""
+        while True:
+            try:
+                kind, job_id, payload = self._results.get(timeout=1)
+            except queue.Empty:
+                with self._lock:
+                    if not self._pending:
+                        self._dispatcher = None
+                        return
+                    if self._process is not None and not self._process.is_alive():
+                        # Worker died: fail the job it was running, restart for the rest
+                        if self._process.exitcode != 0 and self._current_job in self._pending:
+                            future, _ = self._pending.pop(self._current_job)
+                            future.set_exception(Exception(
+                                f"Transcription worker exited with code {self._process.exitcode}"
+                            ))
+                        if self._pending:
+                            self._ensure_running()
+                continue
+
+            with self._lock:
+                if kind == "started":
+                    self._current_job = job_id
+                    continue
+                future, submitted = self._pending.pop(job_id, (None, None))
+                self._current_job = None
+            if future is None:
+                continue
+
+            if kind == "error":
+                future.set_exception(Exception(payload))
+            else:
+                payload['total_seconds'] = time.perf_counter() - submitted
+                self._record(payload)
+                future.set_result(payload)
+
+    def _record(self, payload):
+        """Accumulates cold vs. warm timing statistics."""
+        if payload.get('warmup'):
+            return
+        with self._lock:
+            key = 'cold' if payload['cold'] else 'warm'
+            self.stats[f'{key}_jobs'] += 1
+            self.stats[f'{key}_seconds'] += payload['total_seconds']
+
+    def submit(self, audio_path, **options):
+        """Queues a transcription job and returns a Future for its result."""
+        future = Future()
+        with self._lock:
+            job_id = next(self._ids)
+            self._pending[job_id] = (future, time.perf_counter())
+            self._ensure_running()
+            self._jobs.put((job_id, audio_path, options))
+        return future
+
+    def transcribe(self, audio_path, **options):
+        """
+        Transcribes an audio file and blocks until done.
+        Returns a dict with text, segments and timing information.
+        """
+        return self.submit(audio_path, **options).result()
+
+    def prewarm(self):
+        """Loads the model in the background without waiting for it."""
+        return self.submit(None)
+
+    def timing_summary(self):
+        """Returns a short description of average cold vs. warm job times."""
+        parts = []
+        for key in ('cold', 'warm'):
+            jobs = self.stats[f'{key}_jobs']
+            if jobs:
+                average = self.stats[f'{key}_seconds'] / jobs
+                parts.append(f"{key}: {jobs} job(s), avg {average:.1f}s")
+        return "; ".join(parts) or "no transcription jobs yet"
+
+    def shutdown(self):
+        """Stops the worker process."""
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                self._jobs.put(None)
+                self._process.join(timeout=5)
+            self._process = None
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    """Returns the process-wide shared transcription worker."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = TranscriptionWorker()
+            atexit.register(_worker.shutdown)
+        return _worker
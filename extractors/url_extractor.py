@@ -1,51 +1,212 @@
+import threading
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+import lxml.html
+from lxml import etree
 import trafilatura
+from extractors.cache import get_cache, make_key
+import telemetry
+from config import CACHE_SETTINGS, HTTP_SETTINGS
 
 """
 Website content extractor for NoteGenius.
 Features:
 - Article extraction using trafilatura
-- Fallback to BeautifulSoup for complex pages
+- Fast lxml fallback for pages trafilatura can't handle
 - Clean content parsing (removes ads, navigation, etc.)
-- Title and main content separation
+- Title and main content, always returned as plain text
+- One download per page, shared by both parsers, over a pooled keep-alive session
+- Stored responses revalidated with ETag/Last-Modified, so an unchanged page
+  costs a 304 instead of a download and re-parse
 """
 
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Returns the process-wide HTTP session (connection pooling, compression)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_SETTINGS["pool_size"],
+                pool_maxsize=HTTP_SETTINGS["pool_size"],
+                max_retries=HTTP_SETTINGS["retries"]
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({
+                'User-Agent': HTTP_SETTINGS["user_agent"],
+                'Accept-Encoding': 'gzip, deflate'
+            })
+            _session = session
+        return _session
+
+
+# Subtrees left out of the fallback's text (not article content)
+SKIP_TAGS = {'script', 'style', 'nav', 'header', 'footer'}
+
+# Main content candidates for the fallback, in order of preference; a
+# candidate inside a skipped subtree doesn't count
+CONTENT_XPATHS = [
+    etree.XPath(f"(//{tag}[not(ancestor::nav or ancestor::header or ancestor::footer)])[1]")
+    for tag in ('article', 'main', 'body')
+]
+
+
+def parse_html(html):
+    """
+    Extracts the main content of a downloaded page (raw bytes, so the
+    parsers detect the charset). Returns plain text either way.
+    A module-level function so it can run in a worker process.
+    """
+    try:
+        # First try with trafilatura for better article extraction
+        content = trafilatura.extract(html)
+        if content:
+            return content
+
+        # Fallback to lxml if trafilatura fails
+        return fallback_extract(html)
+
+    except Exception as e:
+        raise Exception(f"Error extracting content from URL: {str(e)}")
+
+
+def fallback_extract(html):
+    """
+    Returns the page title and the text of its article/main/body element,
+    one text node per line, without script/style/navigation/header/footer.
+    The document is parsed by lxml's C parser and only the chosen subtree is
+    walked, once, skipping unwanted elements instead of removing them.
+    """
+    root = lxml.html.document_fromstring(html)
+
+    title_element = root.find('.//title')
+    title = "".join(title_element.itertext()).strip() if title_element is not None else ''
+
+    for xpath in CONTENT_XPATHS:
+        found = xpath(root)
+        if found:
+            content = "\n".join(_text_nodes(found[0]))
+            break
+    else:
+        content = ''
+
+    return f"{title}\n\n{content}" if title else content
+
+
+def _text_nodes(root):
+    """Yields the stripped, non-empty text nodes under root in document order."""
+    def strip(text):
+        return text.strip() if text else ''
+
+    text = strip(root.text)
+    if text:
+        yield text
+    stack = [(iter(root), None)]
+    while stack:
+        children, parent = stack[-1]
+        child = next(children, None)
+        if child is None:
+            # A finished element's tail follows its whole subtree
+            stack.pop()
+            text = strip(parent.tail) if parent is not None else ''
+            if text:
+                yield text
+            continue
+        if isinstance(child.tag, str) and child.tag not in SKIP_TAGS:
+            text = strip(child.text)
+            if text:
+                yield text
+            stack.append((iter(child), child))
+        else:
+            # Skipped subtree or comment: only the text after it counts
+            text = strip(child.tail)
+            if text:
+                yield text
+
+
 class URLExtractor:
     def __init__(self, url):
         self.url = url
-    
+        self.cache = get_cache()
+        self.session = get_session()
+        self.cache_key = make_key("url-response", url)
+
+        # How the last extract_content call was served: "cached", "not-modified" or "downloaded"
+        self.fetch_status = None
+        self.bytes_downloaded = 0
+
     def extract_content(self):
-        """Extracts content from a URL."""
+        """Extracts content from a URL, revalidating the stored response if there is one."""
+        content, response = self.fetch()
+        if content is not None:
+            return content
+        with telemetry.span("url.parse", input_bytes=len(response.content)) as parse_span:
+            content = parse_html(response.content)
+            parse_span.set(output_chars=len(content))
+        self.store(response, content)
+        return content
+
+    def fetch(self):
+        """
+        Downloads the page unless the stored response is still valid.
+        Returns (stored_content, None) when the store answered, or
+        (None, response) with a fresh download to parse and store.
+        """
+        with telemetry.span("url.fetch") as fetch_span:
+            content, response = self._fetch()
+            fetch_span.set(
+                status=self.fetch_status,
+                cache="miss" if response is not None else "hit",
+                input_bytes=self.bytes_downloaded
+            )
+            return content, response
+
+    def _fetch(self):
+        stored = self.cache.get(self.cache_key)
+        if stored is not None and not (stored['etag'] or stored['last_modified']):
+            # No validators to revalidate with; the entry's TTL decides when it's stale
+            self.fetch_status = "cached"
+            return stored['content'], None
+
+        headers = {}
+        if stored is not None:
+            if stored['etag']:
+                headers['If-None-Match'] = stored['etag']
+            if stored['last_modified']:
+                headers['If-Modified-Since'] = stored['last_modified']
+
         try:
-            # First try with trafilatura for better article extraction
-            downloaded = trafilatura.fetch_url(self.url)
-            if downloaded:
-                content = trafilatura.extract(downloaded)
-                if content:
-                    return content
-            
-            # Fallback to BeautifulSoup if trafilatura fails
-            response = requests.get(self.url)
+            response = self.session.get(
+                self.url,
+                headers=headers,
+                timeout=(HTTP_SETTINGS["connect_timeout"], HTTP_SETTINGS["read_timeout"])
+            )
+            if response.status_code == 304 and stored is not None:
+                self.fetch_status = "not-modified"
+                self.cache.add_stat('url_not_modified')
+                return stored['content'], None
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove unwanted elements
-            for element in soup(['script', 'style', 'nav', 'header', 'footer']):
-                element.decompose()
-            
-            # Extract title
-            title = soup.find('title').text if soup.find('title') else ''
-            
-            # Extract main content
-            article = soup.find('article') or soup.find('main') or soup.find('body')
-            content = article.get_text(separator='\n', strip=True)
-            
-            return {
-                'title': title,
-                'content': content
-            }
-            
-        except Exception as e:
-            raise Exception(f"Error extracting content from URL: {str(e)}") 
\ No newline at end of file
+        except requests.RequestException as e:
+            raise Exception(f"Error extracting content from URL: {str(e)}")
+
+        self.fetch_status = "downloaded"
+        self.bytes_downloaded = len(response.content)
+        return None, response
+
+    def store(self, response, content):
+        """Stores parsed content with the response's validators."""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        # Without validators we can't tell if the page changed, so only trust it for a while
+        ttl = None if (etag or last_modified) else CACHE_SETTINGS["url_ttl"]
+        self.cache.set(self.cache_key, {
+            'url': self.url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'content': content
+        }, kind="url", ttl=ttl)
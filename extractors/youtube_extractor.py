@@ -1,34 +1,38 @@
 """
 YouTube content extractor that:
 1. Downloads audio from YouTube videos
-2. Transcribes the audio using Whisper
-3. Caches transcriptions to avoid reprocessing
+2. Transcribes the audio using the shared Whisper worker
+3. Stores timestamped transcripts per video, so any time window already
+   transcribed is served without new downloads or transcription
 """
 
-from pytubefix import YouTube
-import whisper
 import subprocess
 import os
-from pathlib import Path
-import json
-import hashlib
+from extractors.transcription_worker import get_worker
+from extractors.chunked_transcriber import ChunkedTranscriber, probe_duration
+from extractors.audio_fetcher import AudioFetcher
+from extractors.transcript_store import TranscriptStore
+import telemetry
 
 class YouTubeExtractor:
     def __init__(self, url, start_time="0:00", end_time=None):
         """
-        Initialize extractor with YouTube URL and setup cache directory.
+        Initialize extractor with YouTube URL and time range.
         Also checks for FFmpeg installation which is required for audio processing.
+        The Whisper model itself lives in the shared transcription worker,
+        so creating an extractor is cheap.
         """
         self.url = url
         self.start_time = start_time
         self.end_time = end_time
-        self.cache_dir = Path("cache")
-        self.cache_dir.mkdir(exist_ok=True)
         
         if not self._check_ffmpeg():
             raise Exception("FFmpeg not found. Installation instructions provided...")
         
-        self.model = whisper.load_model("tiny")
+        self.worker = get_worker()
+        self.fetcher = AudioFetcher(url)
+        self.timing = None
+        self.bytes_downloaded = 0
     
     def _check_ffmpeg(self):
         """Verify FFmpeg installation."""
@@ -41,84 +45,109 @@ class YouTubeExtractor:
         except FileNotFoundError:
             return False
     
-    def _get_cache_path(self):
-        """Generate unique cache filename based on URL hash."""
-        url_hash = hashlib.md5(self.url.encode()).hexdigest()
-        start = self._time_to_seconds(self.start_time)
-        end = self._time_to_seconds(self.end_time) if self.end_time else 'end'
-        return self.cache_dir / f"{url_hash}_{start}_{end}.json"
+    def _window(self):
+        """Returns the requested (start, end) in seconds; end is None for the whole video."""
+        start = self._time_to_seconds(self.start_time) if self.start_time else 0
+        end = self._time_to_seconds(self.end_time) if self.end_time else None
+        return start, end
     
     def _time_to_seconds(self, time_str):
         """Converte um tempo no formato MM:SS para segundos."""
         minutes, seconds = map(int, time_str.split(':'))
         return minutes * 60 + seconds
     
-    def download_audio(self):
-        """Download audio stream from YouTube video."""
+    def download_audio(self, start_sec=None, end_sec=None):
+        """
+        Fetch the audio for a time range (the requested one by default).
+        Only the window's bytes are downloaded, and audio already in the
+        local audio cache is cut locally instead of downloaded again.
+        """
         try:
-            yt = YouTube(self.url)
-            audio_stream = yt.streams.filter(only_audio=True).first()
-            temp_dir = Path("temp")
-            temp_dir.mkdir(exist_ok=True)
-            temp_audio = temp_dir / "temp_audio.mp4"
-            downloaded_audio = audio_stream.download(filename=str(temp_audio))
+            if start_sec is None:
+                start_sec, end_sec = self._window()
             
-            if self.end_time:
-                start_sec = self._time_to_seconds(self.start_time)
-                end_sec = self._time_to_seconds(self.end_time)
-                trimmed_audio = temp_dir / "trimmed_audio.mp4"
-                subprocess.run([
-                    'ffmpeg',
-                    '-i', downloaded_audio,
-                    '-ss', str(start_sec),
-                    '-to', str(end_sec),
-                    '-c', 'copy',
-                    str(trimmed_audio)
-                ], check=True)
-                
-                os.remove(downloaded_audio)
-                return str(trimmed_audio)
-            
-            return downloaded_audio
+            with telemetry.span("youtube.download", start=start_sec, end=end_sec) as download_span:
+                audio_path = self.fetcher.fetch(start_sec, end_sec)
+                download_span.set(
+                    input_bytes=self.fetcher.bytes_downloaded,
+                    cache="hit" if self.fetcher.from_cache else "miss"
+                )
+            self.bytes_downloaded += self.fetcher.bytes_downloaded
+            return audio_path
                 
         except Exception as e:
             raise Exception(f"Error downloading audio: {str(e)}")
     
-    def transcribe(self):
+    def _transcribe_audio(self, audio_path, duration):
         """
-        Main transcription function that:
-        1. Checks cache for existing transcription
-        2. Downloads and transcribes if not cached
-        3. Saves transcription to cache
-        4. Cleans up temporary files
+        Transcribes a local audio file.
+        Long files are split into chunks and transcribed in parallel,
+        everything else goes to the shared warm worker.
         """
-        cache_path = self._get_cache_path()
-        
-        if cache_path.exists():
-            with open(cache_path, 'r') as f:
-                return json.load(f)['text']
-        
-        try:
-            audio_path = self.download_audio()
-            result = self.model.transcribe(
-                audio_path,
-                fp16=False,
-                task='transcribe',
-                language=None  # Auto-detect language
+        with telemetry.span("whisper", audio_seconds=duration, input_bytes=os.path.getsize(audio_path)) as whisper_span:
+            chunked = ChunkedTranscriber()
+            if chunked.should_split(duration):
+                result = chunked.transcribe(audio_path, duration)
+                whisper_span.set(chunks=result['chunks'], workers=result['workers'])
+            else:
+                result = self.worker.transcribe(audio_path)
+            whisper_span.set(
+                cold=result['cold'],
+                load_seconds=result['load_seconds'],
+                transcribe_seconds=result['transcribe_seconds'],
+                output_chars=len(result['text'])
             )
+            return result
+    
+    def _transcribe_gap(self, store, gap_start, gap_end):
+        """Downloads and transcribes one uncovered gap, merging it into the store."""
+        audio_path = None
+        try:
+            audio_path = self.download_audio(gap_start, gap_end)
+            duration = probe_duration(audio_path)
+            result = self._transcribe_audio(audio_path, duration)
+            self.timing = {
+                'cold': result['cold'],
+                'load_seconds': result['load_seconds'],
+                'transcribe_seconds': result['transcribe_seconds'],
+                'total_seconds': result['total_seconds']
+            }
+            if gap_end is None:
+                # Open-ended gap: it ran to the end, which tells us the video duration
+                gap_end = gap_start + duration
+                store.duration = gap_end
             
-            if os.path.exists(audio_path):
+            segments = [
+                {'start': s['start'] + gap_start, 'end': s['end'] + gap_start, 'text': s['text']}
+                for s in result['segments']
+            ]
+            store.add(gap_start, gap_end, segments)
+        finally:
+            # Clean up this gap's temporary audio
+            if audio_path and self.fetcher.is_temporary and os.path.exists(audio_path):
                 os.remove(audio_path)
+    
+    def transcribe(self):
+        """
+        Main transcription function that:
+        1. Looks up the stored timeline for this video
+        2. Downloads and transcribes only the parts of the window never covered
+        3. Merges them into the stored timeline
+        4. Returns the text of the requested window
+        """
+        start_sec, end_sec = self._window()
+        with telemetry.span("youtube.transcript", start=start_sec, end=end_sec) as transcript_span:
+            store = TranscriptStore(self.fetcher.video_id or self.url, self.url)
             
-            with open(cache_path, 'w') as f:
-                json.dump({'url': self.url, 'text': result["text"]}, f)
-            
-            return result["text"]
+            gaps = store.missing(start_sec, end_sec)
+            for gap_start, gap_end in gaps:
+                self._transcribe_gap(store, gap_start, gap_end)
             
-        except Exception as e:
-            # Clean up on error
-            temp_dir = Path("temp")
-            if temp_dir.exists():
-                for file in temp_dir.glob("*"):
-                    file.unlink()
-            raise e
\ No newline at end of file
+            text = store.text(start_sec, end_sec)
+            transcript_span.set(
+                cache="miss" if gaps else "hit",
+                gaps=len(gaps),
+                input_bytes=self.bytes_downloaded,
+                output_chars=len(text)
+            )
+            return text
@@ -2,9 +2,10 @@
 GUI implementation for NoteGenius using CustomTkinter.
 Handles all user interactions and visual components including:
 - Input type selection (PDF, YouTube, URL, Manual)
-- Language and layout selection
+- Language and layout selection (several of each, for one note per
+  combination from a single extraction)
 - File selection and naming
-- Progress feedback
+- Job queue panel with per-job status, elapsed time and live preview
 """
 
 import customtkinter as ctk
@@ -12,8 +13,8 @@ from PIL import Image
 import os
 from pathlib import Path
 from processor import ContentProcessor
-from tkinter import messagebox, filedialog
-import threading
+from job_queue import JobQueue
+from tkinter import messagebox, filedialog, TclError
 from config import LANGUAGES, LAYOUTS, INTERFACE_SETTINGS
 
 class NoteGenius:
@@ -195,7 +196,7 @@ class NoteGenius:
         
         # 6. Language Selection
         ctk.CTkLabel(main_frame, text="Language", anchor="w").pack(fill="x", pady=(0, 5))
-        self.language = ctk.StringVar(value="")
+        self.languages = []  # Selected language keys, in the order they were picked
         self.language_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
         self.language_frame.pack(fill="x", pady=(0, 15))
         
@@ -215,7 +216,7 @@ class NoteGenius:
         
         # 7. Layout Selection
         ctk.CTkLabel(main_frame, text="Layout", anchor="w").pack(fill="x", pady=(0, 5))
-        self.layout = ctk.StringVar(value="")
+        self.layouts = []  # Selected layout keys, in the order they were picked
         self.layout_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
         self.layout_frame.pack(fill="x", pady=(0, 15))
         
@@ -233,7 +234,28 @@ class NoteGenius:
             )
             btn.pack(side="left", padx=INTERFACE_SETTINGS["button_spacing"])
         
-        # 8. Generate Button
+        # Multi-select: one note per selected layout and language, sharing one extraction
+        self.multi_select = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            main_frame,
+            text="Several layouts and languages (one extraction, a note for each)",
+            variable=self.multi_select,
+            command=self.on_multi_select_change,
+            fg_color=INTERFACE_SETTINGS["primary_color"],
+            hover_color=INTERFACE_SETTINGS["hover_color"]
+        ).pack(anchor="w", pady=(0, 15))
+        
+        # 8. Response cache bypass
+        self.fresh_sample = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            main_frame,
+            text="Fresh sample (ignore cached AI response and earlier summaries)",
+            variable=self.fresh_sample,
+            fg_color=INTERFACE_SETTINGS["primary_color"],
+            hover_color=INTERFACE_SETTINGS["hover_color"]
+        ).pack(anchor="w", pady=(0, 15))
+        
+        # 9. Generate Button
         self.generate_btn = ctk.CTkButton(
             main_frame,
             text="Generate Summary",
@@ -245,19 +267,34 @@ class NoteGenius:
         )
         self.generate_btn.pack(fill="x", pady=(0, 15))
         
-        # Progress Bar (initially hidden)
-        self.progress_bar = ctk.CTkProgressBar(main_frame)
-        self.progress_bar.pack(fill="x", pady=(0, 15))
-        self.progress_bar.pack_forget()
-        
-        # Status Label (initially hidden)
+        # Status Label (summary of the job queue)
         self.status_label = ctk.CTkLabel(
             main_frame, 
-            text="Processing...", 
+            text="No jobs yet", 
             text_color=INTERFACE_SETTINGS["primary_color"]
         )
-        self.status_label.pack(pady=(0, 15))
-        self.status_label.pack_forget()
+        self.status_label.pack(pady=(0, 5))
+        
+        # 10. Job Queue Panel
+        ctk.CTkLabel(main_frame, text="Jobs", anchor="w").pack(fill="x", pady=(0, 5))
+        self.jobs_frame = ctk.CTkScrollableFrame(main_frame, height=110)
+        self.jobs_frame.pack(fill="x", pady=(0, 15))
+        self.job_rows = {}
+        self.selected_job = None
+        self.preview_chunks = 0
+        
+        # Live preview of the selected job's note
+        self.preview = ctk.CTkTextbox(main_frame, height=200, wrap="word")
+        self.preview.pack(fill="both", expand=True, pady=(0, 15))
+        
+        self.job_queue = JobQueue(
+            processor,
+            workers=INTERFACE_SETTINGS["max_parallel_jobs"],
+            on_update=self.on_job_update
+        )
+        self.closed = False
+        self.root.after(1000, self.tick_jobs)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Initialize with PDF File
         self.on_source_type_change("PDF File")
@@ -301,82 +338,157 @@ class NoteGenius:
             self.current_file_path = filename
     
     def set_language(self, lang):
-        """Updates language selection."""
-        self.language.set(lang)
-        for btn in self.language_frame.winfo_children():
-            is_selected = btn.cget("text") == LANGUAGES[lang]
-            btn.configure(
-                fg_color=INTERFACE_SETTINGS["primary_color"] if is_selected else "white",
-                text_color="white" if is_selected else INTERFACE_SETTINGS["primary_color"]
-            )
+        """Updates language selection (toggles it in multi-select mode)."""
+        self._toggle(self.languages, lang)
+        self._paint_toggles(self.language_frame, [LANGUAGES[key] for key in self.languages])
     
     def set_layout(self, layout):
-        """Updates layout selection."""
-        self.layout.set(layout)
-        for btn in self.layout_frame.winfo_children():
-            is_selected = btn.cget("text") == LAYOUTS[layout]["name"]
+        """Updates layout selection (toggles it in multi-select mode)."""
+        self._toggle(self.layouts, layout)
+        self._paint_toggles(self.layout_frame, [LAYOUTS[key]["name"] for key in self.layouts])
+    
+    def _toggle(self, selected, key):
+        """Selects key alone, or adds/removes it in multi-select mode."""
+        if not self.multi_select.get():
+            selected[:] = [key]
+        elif key in selected:
+            selected.remove(key)
+        else:
+            selected.append(key)
+    
+    def _paint_toggles(self, frame, selected_names):
+        """Highlights the buttons of a toggle row whose text is selected."""
+        for btn in frame.winfo_children():
+            is_selected = btn.cget("text") in selected_names
             btn.configure(
                 fg_color=INTERFACE_SETTINGS["primary_color"] if is_selected else "white",
                 text_color="white" if is_selected else INTERFACE_SETTINGS["primary_color"]
             )
     
-    def show_processing(self, show=True):
-        """Shows or hides processing elements."""
-        if show:
-            self.generate_btn.configure(state="disabled")
-            self.progress_bar.pack(fill="x", pady=(0, 15))
-            self.progress_bar.set(0)
-            self.progress_bar.start()
-            self.status_label.pack(pady=(0, 15))
-        else:
-            self.generate_btn.configure(state="normal")
-            self.progress_bar.stop()
-            self.progress_bar.pack_forget()
-            self.status_label.pack_forget()
+    def on_multi_select_change(self):
+        """Leaving multi-select mode keeps the most recently picked layout and language."""
+        if not self.multi_select.get():
+            del self.languages[:-1]
+            del self.layouts[:-1]
+            self._paint_toggles(self.language_frame, [LANGUAGES[key] for key in self.languages])
+            self._paint_toggles(self.layout_frame, [LAYOUTS[key]["name"] for key in self.layouts])
     
-    def process_in_thread(self, source_type, input_value, output_filename, layout, language, instructions, page_range, start_time=None, end_time=None):
-        """Executes processing in a separate thread."""
-        try:
-            # Only convert to absolute path if it's a selected file through "Choose File"
-            # Otherwise, keep it as a simple filename
-            if hasattr(self, 'selected_markdown_file') and self.selected_markdown_file:
-                output_path = self.selected_markdown_file
-            else:
-                output_path = output_filename  # Keep the simple filename
-            
-            success, message = self.processor.process_content(
-                input_type=source_type,
-                input_value=input_value,
-                output_filename=output_path,
-                layout=layout,
-                language=language,
-                instructions=instructions,
-                page_range=page_range,
-                start_time=start_time,
-                end_time=end_time
+    def _target_filename(self, output_filename, layout, language):
+        """Output filename of one layout/language combination: the chosen name with a suffix."""
+        suffix = f" - {LAYOUTS[layout]['name']} - {LANGUAGES[language]}"
+        root, extension = os.path.splitext(output_filename)
+        if extension.lower() == ".md":
+            return root + suffix + extension
+        return output_filename + suffix
+    
+    def update_job_row(self, job):
+        """Creates or refreshes a job's row in the queue panel (main thread only)."""
+        if job.id not in self.job_rows:
+            row = ctk.CTkFrame(self.jobs_frame, fg_color="transparent")
+            row.pack(fill="x", pady=2)
+            label = ctk.CTkButton(
+                row,
+                text=job.label,
+                anchor="w",
+                height=24,
+                border_width=0,
+                fg_color="transparent",
+                command=lambda j=job: self.select_job(j)
             )
-            
-            # Return to main thread to update interface
-            self.root.after(0, lambda: self.process_complete(success, message, source_type))
-            
-        except Exception as e:
-            self.root.after(0, lambda: self.process_complete(False, str(e), source_type))
+            label.pack(side="left", fill="x", expand=True)
+            elapsed = ctk.CTkLabel(row, text="", width=150, anchor="e")
+            elapsed.pack(side="right")
+            status = ctk.CTkLabel(row, text="", width=90)
+            status.pack(side="right")
+            self.job_rows[job.id] = (label, status, elapsed)
+            self.select_job(job)
+        
+        label, status, elapsed = self.job_rows[job.id]
+        status.configure(
+            text=job.status,
+            text_color="red" if job.status == "failed" else INTERFACE_SETTINGS["primary_color"]
+        )
+        elapsed.configure(text=self._job_time(job))
+        if job.finished:
+            label.configure(text=f"{job.label} - {job.message}")
+        
+        if job is self.selected_job:
+            self.refresh_preview()
+        self.update_status_summary()
     
-    def process_complete(self, success, message, source_type):
-        """Called when processing is completed."""
-        self.show_processing(False)
-        
-        if success:
-            messagebox.showinfo("Success", message)
-            # Clear fields after success
-            if source_type != "pdf":
-                self.url_entry.delete(0, "end")
-            self.filename.delete(0, "end")
-            self.instructions.delete("1.0", "end")
-            self.instructions.insert("1.0", "Enter any specific instructions for the LLM")
-            self.instructions.configure(text_color="gray52")
-        else:
-            messagebox.showerror("Error", message)
+    def _job_time(self, job):
+        """Elapsed time text for a job row, with time to first token once known."""
+        if job.started is None:
+            return ""
+        text = f"{job.elapsed:.1f}s"
+        if job.first_chunk is not None:
+            text += f" (1st token {job.first_chunk - job.started:.1f}s)"
+        return text
+    
+    def select_job(self, job):
+        """Shows a job's streamed text in the preview pane."""
+        self.selected_job = job
+        self.preview_chunks = 0
+        self.preview.delete("1.0", "end")
+        self.refresh_preview()
+    
+    def refresh_preview(self):
+        """Appends the selected job's newly streamed text to the preview pane."""
+        chunks = self.selected_job.chunks
+        if len(chunks) > self.preview_chunks:
+            self.preview.insert("end", "".join(chunks[self.preview_chunks:]))
+            self.preview.see("end")
+            self.preview_chunks = len(chunks)
+    
+    def update_status_summary(self):
+        """Summarizes the queue in the status label."""
+        counts = {}
+        for job in self.job_queue.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        running = sum(counts.get(s, 0) for s in ("extracting", "summarizing", "writing"))
+        text = (
+            f"{running} running, {counts.get('queued', 0)} queued, "
+            f"{counts.get('done', 0)} done, {counts.get('failed', 0)} failed"
+        )
+        
+        # Stage breakdown of the most recently finished job
+        finished = [job for job in self.job_queue.jobs if job.finished and job.stages]
+        if finished:
+            last = max(finished, key=lambda job: job.finished)
+            text += f"\nLast job: {last.stages}"
+        self.status_label.configure(text=text)
+    
+    def on_job_update(self, job):
+        """
+        Called from job threads; hands the update to the Tk loop. Once the
+        window is closed, running jobs finish without updating it.
+        """
+        if self.closed:
+            return
+        try:
+            self.root.after(0, self.update_job_row, job)
+        except (TclError, RuntimeError):
+            pass  # Window destroyed (or its main loop gone) since the check
+    
+    def tick_jobs(self):
+        """Refreshes elapsed times of running jobs once per second."""
+        for job in self.job_queue.active():
+            if job.id in self.job_rows:
+                self.job_rows[job.id][2].configure(text=self._job_time(job))
+        self.root.after(1000, self.tick_jobs)
+    
+    def on_close(self):
+        """Closes the window, asking first if jobs are unfinished (queued ones are cancelled)."""
+        active = self.job_queue.active()
+        if active and not messagebox.askokcancel(
+            "Quit NoteGenius",
+            f"{len(active)} job(s) not finished. Quit anyway?\n"
+            "Queued jobs are cancelled; jobs already running finish their notes before NoteGenius exits."
+        ):
+            return
+        self.closed = True
+        self.job_queue.shutdown()
+        self.root.destroy()
     
     def handle_submit(self):
         """Processes the form submission."""
@@ -427,26 +539,54 @@ class NoteGenius:
                 start_time = self.start_time.get() or "0:00"
                 end_time = self.end_time.get() or None
             
-            # Show processing elements
-            self.show_processing()
+            # Use the selected existing markdown file if one was chosen through "Choose File",
+            # otherwise keep the simple filename
+            if getattr(self, 'selected_markdown_file', None) and self.filename.get() == self.selected_markdown_file:
+                output_filename = self.selected_markdown_file
+            else:
+                output_filename = self.filename.get()
             
-            # Start processing in separate thread
-            thread = threading.Thread(
-                target=self.process_in_thread,
-                args=(
-                    source_type,
-                    input_value,
-                    self.filename.get(),
-                    self.layout.get(),
-                    self.language.get(),
-                    self.instructions.get("1.0", "end-1c").strip(),
-                    page_range,
-                    start_time,
-                    end_time
-                )
+            # Queue the job; results are reported in the job panel
+            source_name = os.path.basename(input_value) if source_type == "file" else (input_value or "Manual Input")
+            params = dict(
+                input_type=source_type,
+                input_value=input_value,
+                instructions=self.instructions.get("1.0", "end-1c").strip(),
+                page_range=page_range,
+                start_time=start_time,
+                end_time=end_time,
+                fresh=self.fresh_sample.get(),
+                # A fresh sample also summarizes sources the ledger has seen again
+                policy="force" if self.fresh_sample.get() else None
             )
-            thread.daemon = True
-            thread.start()
+            combinations = [
+                (layout, language)
+                for layout in self.layouts or [""]
+                for language in self.languages or [""]
+            ]
+            if len(combinations) == 1:
+                layout, language = combinations[0]
+                self.job_queue.submit(
+                    f"{source_name} → {os.path.basename(output_filename)}",
+                    output_filename=output_filename,
+                    layout=layout,
+                    language=language,
+                    **params
+                )
+            else:
+                # One extraction, one note per layout and language
+                self.job_queue.submit(
+                    f"{source_name} → {len(combinations)} notes",
+                    targets=[
+                        dict(
+                            layout=layout,
+                            language=language,
+                            output_filename=self._target_filename(output_filename, layout, language)
+                        )
+                        for layout, language in combinations
+                    ],
+                    **params
+                )
                 
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -0,0 +1,105 @@
+"""
+Concurrent job queue for NoteGenius.
+Runs ContentProcessor jobs on a bounded worker pool and tracks each job's
+status (queued / extracting / summarizing / writing / done / failed),
+elapsed time, result message and streamed text. Has no GUI dependency;
+the interface subscribes through the on_update callback.
+"""
+
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+STATUSES = ("queued", "extracting", "summarizing", "writing", "done", "failed")
+
+
+class Job:
+    def __init__(self, job_id, label, params):
+        self.id = job_id
+        self.label = label
+        self.params = params
+        self.status = "queued"
+        self.message = ""
+        self.stages = ""  # Compact per-stage timing line, once finished
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+        self.first_chunk = None
+        self.chunks = []
+
+    @property
+    def elapsed(self):
+        """Seconds since the job started (or total run time once finished)."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def preview(self):
+        return "".join(self.chunks)
+
+
+class JobQueue:
+    def __init__(self, processor, workers=2, on_update=None):
+        """
+        on_update(job) is called from worker threads whenever a job's
+        status changes or new text is streamed.
+        """
+        self.processor = processor
+        self.on_update = on_update or (lambda job: None)
+        self.jobs = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="notegenius-job")
+
+    def submit(self, label, **params):
+        """
+        Queues a job with process_content keyword arguments (or
+        process_targets ones, with targets) and returns it.
+        """
+        with self._lock:
+            job = Job(next(self._ids), label, params)
+            self.jobs.append(job)
+        self.on_update(job)
+        self._pool.submit(self._run, job)
+        return job
+
+    def _set_status(self, job, status):
+        job.status = status
+        if status == "extracting" and job.started is None:
+            job.started = time.perf_counter()
+        self.on_update(job)
+
+    def _run(self, job):
+        self._set_status(job, "extracting")
+
+        def on_chunk(text):
+            if job.first_chunk is None:
+                job.first_chunk = time.perf_counter()
+            job.chunks.append(text)
+            self.on_update(job)
+
+        # Jobs with several targets share one extraction (see ContentProcessor.process_targets)
+        process = self.processor.process_targets if "targets" in job.params else self.processor.process_content
+        try:
+            success, message = process(
+                on_status=lambda status: self._set_status(job, status),
+                on_chunk=on_chunk,
+                **job.params
+            )
+        except Exception as e:
+            success, message = False, str(e)
+
+        job.message = message
+        job.stages = self.processor.last_timings.get('stages', "")
+        job.finished = time.perf_counter()
+        self._set_status(job, "done" if success else "failed")
+
+    def active(self):
+        """Jobs that are queued or running."""
+        return [job for job in self.jobs if job.status not in ("done", "failed")]
+
+    def shutdown(self):
+        """Cancels queued jobs; running ones finish, without blocking the caller."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,52 @@
+"""
+Persistent cache of LLM responses for NoteGenius.
+Responses are keyed on a hash of the fully rendered prompt, the model name
+and the generation config, so regenerating an identical note skips the
+Gemini round trip. Tracks hits, misses and seconds saved.
+"""
+
+from extractors.cache import ContentCache, make_key
+from config import LLM_CACHE_SETTINGS
+
+
+class ResponseCache:
+    def __init__(self, settings=None):
+        self.settings = settings or LLM_CACHE_SETTINGS
+        self.enabled = self.settings["enabled"]
+        self.cache = ContentCache(
+            cache_dir=self.settings["dir"],
+            max_bytes=self.settings["max_mb"] * 1024 * 1024
+        )
+
+    def _key(self, prompt, model_name, generation_config):
+        return make_key("llm", model_name, generation_config, prompt)
+
+    def get(self, prompt, model_name, generation_config):
+        """Returns the cached response text, or None on a miss."""
+        if not self.enabled:
+            return None
+        cached = self.cache.get(self._key(prompt, model_name, generation_config))
+        if cached is None:
+            return None
+        self.cache.add_stat('seconds_saved', cached['elapsed'])
+        return cached['text']
+
+    def set(self, prompt, model_name, generation_config, text, elapsed):
+        """Stores a response together with how long it took to generate."""
+        if not self.enabled:
+            return
+        self.cache.set(
+            self._key(prompt, model_name, generation_config),
+            {'model': model_name, 'text': text, 'elapsed': elapsed},
+            kind="llm",
+            ttl=self.settings["ttl"]
+        )
+
+    def summary(self):
+        """Returns hit, miss and seconds-saved counters."""
+        summary = self.cache.summary()
+        return {
+            'hits': summary['hits'],
+            'misses': summary['misses'],
+            'seconds_saved': summary.get('seconds_saved', 0.0)
+        }
@@ -0,0 +1,306 @@
+"""
+Asynchronous LLM client layer for NoteGenius.
+Features:
+- Runs all requests on one background asyncio loop, shared by every caller
+- Concurrency semaphore and token-bucket rate limiting
+- Exponential backoff with jitter on retryable errors (429, 5xx, timeouts)
+- Per-request timeouts
+- Streaming generation, delivered chunk by chunk to the calling thread
+- Pluggable backends: Gemini, or the local stub server in llm_stub.py
+"""
+
+import asyncio
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from config import LLM_MODEL, LLM_CLIENT_SETTINGS
+
+
+class RetryableError(Exception):
+    """An error worth retrying after a backoff (rate limit, overload, timeout)."""
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute, capacity=None):
+        """Allows rate_per_minute requests on average, with bursts up to capacity."""
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, rate_per_minute // 6)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Waits until a token is available and takes it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class GeminiBackend:
+    def __init__(self, model_name=LLM_MODEL):
+        import google.generativeai as genai
+        from google.api_core import exceptions
+
+        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
+        self.genai = genai
+        self.model = genai.GenerativeModel(model_name)
+        self.retryable = (
+            exceptions.ResourceExhausted,
+            exceptions.ServiceUnavailable,
+            exceptions.InternalServerError,
+            exceptions.DeadlineExceeded,
+        )
+
+    async def generate(self, prompt, generation_config, timeout):
+        try:
+            response = await self.model.generate_content_async(
+                prompt,
+                generation_config=self.genai.types.GenerationConfig(**generation_config),
+                request_options={"timeout": timeout}
+            )
+            return response.text
+        except self.retryable as e:
+            raise RetryableError(str(e)) from e
+
+    async def stream(self, prompt, generation_config, timeout):
+        """Yields response text chunks as the model produces them."""
+        try:
+            response = await self.model.generate_content_async(
+                prompt,
+                generation_config=self.genai.types.GenerationConfig(**generation_config),
+                request_options={"timeout": timeout},
+                stream=True
+            )
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+        except self.retryable as e:
+            raise RetryableError(str(e)) from e
+
+
+class StubBackend:
+    def __init__(self, url=None):
+        """Talks to the local stub server (see llm_stub.py) instead of Gemini."""
+        self.url = (url or LLM_CLIENT_SETTINGS["stub_url"]).rstrip("/")
+
+    def _post(self, path, payload, timeout):
+        request = urllib.request.Request(
+            f"{self.url}{path}",
+            data=json.dumps(payload).encode(),
+            headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                raise RetryableError(f"Stub server returned {e.code}") from e
+            raise
+
+    async def generate(self, prompt, generation_config, timeout):
+        result = await asyncio.to_thread(
+            self._post, "/generate", {'prompt': prompt, 'generation_config': generation_config}, timeout
+        )
+        return result['text']
+
+    def _read_stream(self, payload, timeout, loop, chunks):
+        """Reads newline-delimited JSON chunks in a thread and hands them to the loop."""
+        try:
+            request = urllib.request.Request(
+                f"{self.url}/stream",
+                data=json.dumps(payload).encode(),
+                headers={'Content-Type': 'application/json'}
+            )
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                for line in response:
+                    if line.strip():
+                        loop.call_soon_threadsafe(chunks.put_nowait, json.loads(line)['text'])
+            loop.call_soon_threadsafe(chunks.put_nowait, None)
+        except urllib.error.HTTPError as e:
+            error = RetryableError(f"Stub server returned {e.code}") if e.code == 429 or e.code >= 500 else e
+            loop.call_soon_threadsafe(chunks.put_nowait, error)
+        except Exception as e:
+            loop.call_soon_threadsafe(chunks.put_nowait, e)
+
+    async def stream(self, prompt, generation_config, timeout):
+        """Yields response text chunks from the stub's /stream endpoint."""
+        chunks = asyncio.Queue()
+        payload = {'prompt': prompt, 'generation_config': generation_config}
+        loop = asyncio.get_running_loop()
+        threading.Thread(
+            target=self._read_stream, args=(payload, timeout, loop, chunks), daemon=True
+        ).start()
+        while True:
+            chunk = await chunks.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+
+def create_backend(name=None):
+    """Builds the backend selected in LLM_CLIENT_SETTINGS (or by name)."""
+    name = name or LLM_CLIENT_SETTINGS["backend"]
+    if name == "gemini":
+        return GeminiBackend()
+    if name == "stub":
+        return StubBackend()
+    raise ValueError(f"Unknown LLM backend: {name}")
+
+
+class LLMClient:
+    def __init__(self, backend=None, settings=None):
+        """
+        Starts a background event loop; synchronous callers from any thread
+        submit work to it, so limits apply across all of them.
+        """
+        self.settings = settings or LLM_CLIENT_SETTINGS
+        self._backend = backend
+        self._backend_lock = threading.Lock()
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0}
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+        async def create_limits():
+            return (
+                asyncio.Semaphore(self.settings["concurrency"]),
+                TokenBucket(self.settings["requests_per_minute"])
+            )
+        self._semaphore, self._bucket = self._run(create_limits())
+
+    @property
+    def backend(self):
+        """
+        The backend, built on first use so that creating a client (at
+        startup, with the ContentProcessor) does not import the Gemini SDK.
+        """
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = create_backend()
+        return self._backend
+
+    def _run(self, coroutine):
+        """Runs a coroutine on the client loop and waits for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def _backoff(self, attempt):
+        """Exponential backoff with full jitter."""
+        ceiling = min(self.settings["backoff_max"], self.settings["backoff_base"] * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+    async def agenerate(self, prompt, generation_config):
+        """Generates one response, honouring limits, timeouts and retries."""
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                await self._bucket.acquire()
+                self.stats['requests'] += 1
+                try:
+                    return await asyncio.wait_for(
+                        self.backend.generate(prompt, generation_config, self.settings["timeout"]),
+                        timeout=self.settings["timeout"]
+                    )
+                except (RetryableError, asyncio.TimeoutError) as e:
+                    error = e
+
+            if attempt >= self.settings["max_retries"]:
+                self.stats['failures'] += 1
+                raise Exception(f"LLM request failed after {attempt + 1} attempts: {str(error) or 'timeout'}")
+            self.stats['retries'] += 1
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    async def agenerate_many(self, prompts, generation_config, limit=None):
+        """Generates responses for several prompts concurrently, at most limit at a time."""
+        local_limit = asyncio.Semaphore(limit or len(prompts) or 1)
+
+        async def bounded(prompt):
+            async with local_limit:
+                return await self.agenerate(prompt, generation_config)
+
+        return await asyncio.gather(*(bounded(prompt) for prompt in prompts))
+
+    async def astream(self, prompt, generation_config):
+        """
+        Yields response chunks, honouring limits and timeouts (per chunk).
+        Retries only happen before the first chunk has been delivered.
+        """
+        attempt = 0
+        while True:
+            delivered = False
+            async with self._semaphore:
+                await self._bucket.acquire()
+                self.stats['requests'] += 1
+                chunks = self.backend.stream(prompt, generation_config, self.settings["timeout"])
+                try:
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self.settings["timeout"])
+                        except StopAsyncIteration:
+                            return
+                        delivered = True
+                        yield chunk
+                except (RetryableError, asyncio.TimeoutError) as e:
+                    if delivered:
+                        self.stats['failures'] += 1
+                        raise Exception(f"LLM stream interrupted: {str(e) or 'timeout'}")
+                    error = e
+
+            if attempt >= self.settings["max_retries"]:
+                self.stats['failures'] += 1
+                raise Exception(f"LLM request failed after {attempt + 1} attempts: {str(error) or 'timeout'}")
+            self.stats['retries'] += 1
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def generate(self, prompt, generation_config):
+        """Synchronous wrapper around agenerate."""
+        return self._run(self.agenerate(prompt, generation_config))
+
+    def generate_many(self, prompts, generation_config, limit=None):
+        """Synchronous wrapper around agenerate_many."""
+        return self._run(self.agenerate_many(prompts, generation_config, limit))
+
+    def stream(self, prompt, generation_config, on_chunk):
+        """
+        Synchronous streaming: calls on_chunk(text) in the calling thread for
+        every chunk as it arrives and returns the full response text.
+        """
+        chunks = queue.Queue()
+
+        async def produce():
+            try:
+                async for chunk in self.astream(prompt, generation_config):
+                    chunks.put(chunk)
+                chunks.put(None)
+            except Exception as e:
+                chunks.put(e)
+
+        asyncio.run_coroutine_threadsafe(produce(), self.loop)
+        parts = []
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return "".join(parts)
+            if isinstance(chunk, Exception):
+                raise chunk
+            parts.append(chunk)
+            on_chunk(chunk)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
@@ -0,0 +1,102 @@
+"""
+Local stub LLM server for NoteGenius.
+Stands in for Gemini so the LLM client (limits, retries, timeouts) and the
+processing pipeline can be exercised without network access.
+
+Usage:
+    python llm_stub.py --port 8765 --latency 0.5 --error-rate 0.1
+and set LLM_CLIENT_SETTINGS["backend"] = "stub" in config.py.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        with server.lock:
+            server.requests += 1
+            request_number = server.requests
+
+        if self.path not in ("/generate", "/stream"):
+            self.send_error(404)
+            return
+
+        # Injected failures: the first fail_first requests, then error_rate at random
+        if request_number <= server.fail_first or random.random() < server.error_rate:
+            self.send_error(429, "Rate limit exceeded (stub)")
+            return
+
+        prompt = payload.get('prompt', "")
+        text = f"# Stub summary\n\nReceived {len(prompt)} characters of prompt.\n"
+
+        if self.path == "/stream":
+            self._stream(text, server.latency)
+            return
+
+        time.sleep(server.latency)
+        body = json.dumps({'text': text}).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, text, latency, pieces=5):
+        """Sends text as newline-delimited JSON chunks spread over latency seconds."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        size = max(1, len(text) // pieces + 1)
+        for i in range(0, len(text), size):
+            time.sleep(latency / pieces)
+            self.wfile.write(json.dumps({'text': text[i:i + size]}).encode() + b"\n")
+            self.wfile.flush()
+
+
+def start_stub_server(port=0, latency=0.0, error_rate=0.0, fail_first=0):
+    """
+    Starts the stub server on a background thread.
+    Returns the server; its URL is f"http://127.0.0.1:{server.server_port}".
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.latency = latency
+    server.error_rate = error_rate
+    server.fail_first = fail_first
+    server.requests = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stub LLM server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--fail-first", type=int, default=0, help="Answer the first N requests with 429")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.latency, args.error_rate, args.fail_first)
+    print(f"Stub LLM server listening on http://127.0.0.1:{server.server_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
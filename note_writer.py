@@ -0,0 +1,183 @@
+"""
+Concurrency-safe note writing for NoteGenius.
+Every note write goes through a NoteWriter, which:
+- serializes writes to the same note with a per-file lock, and decides
+  between creating and appending while holding it
+- writes new notes atomically (temp file in the same folder, then rename),
+  so the vault never holds a half-written note; appends are atomic too
+  unless NOTE_WRITER_SETTINGS["atomic_appends"] is off
+- coalesces entries queued for the same note while a write is in progress
+  into the next single write (group commit)
+- fsyncs according to NOTE_WRITER_SETTINGS["fsync"]: "none", "file", or
+  "full" (the file and its folder, so the rename itself is durable)
+- keeps text still being streamed in a sidecar next to the note
+  (PartialFile), so a crash mid-generation leaves what was received
+
+Locks are per process: jobs of one NoteGenius process (GUI, batch,
+pipeline, web ingestion) never interleave writes to a note.
+"""
+
+import os
+import threading
+import time
+import uuid
+from config import NOTE_WRITER_SETTINGS
+
+FSYNC_MODES = ("none", "file", "full")
+
+
+class _Entry:
+    def __init__(self, text, separator):
+        self.text = text
+        self.separator = separator
+        self.done = False
+        self.result = None
+        self.error = None
+
+
+class _NoteState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = []
+
+
+class NoteWriter:
+    def __init__(self, settings=None):
+        self.settings = dict(NOTE_WRITER_SETTINGS, **(settings or {}))
+        if self.settings["fsync"] not in FSYNC_MODES:
+            raise ValueError(f"Invalid fsync mode: {self.settings['fsync']}")
+        self._guard = threading.Lock()
+        self._notes = {}
+        self.stats = {'entries': 0, 'writes': 0}
+
+    def write(self, path, text, separator=""):
+        """
+        Adds text to a note: creates the note if it doesn't exist, or
+        appends separator + text. Returns "created" or "appended".
+        Entries other threads queue for the same note meanwhile are written
+        together with this one.
+        """
+        path = os.path.abspath(path)
+        entry = _Entry(text, separator)
+        with self._guard:
+            state = self._notes.setdefault(path, _NoteState())
+            state.pending.append(entry)
+            self.stats['entries'] += 1
+
+        with state.lock:
+            if not entry.done:
+                with self._guard:
+                    batch, state.pending = state.pending, []
+                self._flush(path, batch)
+        if entry.error is not None:
+            raise entry.error
+        return entry.result
+
+    def _flush(self, path, batch):
+        """Writes a batch of entries to one note in a single write."""
+        exists = os.path.exists(path)
+        parts = []
+        for entry in batch:
+            entry.result = "appended" if exists or parts else "created"
+            if entry.result == "appended":
+                parts.append(entry.separator)
+            parts.append(entry.text)
+        block = "".join(parts)
+
+        try:
+            if not exists:
+                self._replace(path, block)
+            elif self.settings["atomic_appends"]:
+                with open(path, "r", encoding="utf-8", newline="") as f:
+                    current = f.read()
+                self._replace(path, current + block)
+            else:
+                with open(path, "a", encoding="utf-8", newline="") as f:
+                    f.write(block)
+                    f.flush()
+                    if self.settings["fsync"] != "none":
+                        os.fsync(f.fileno())
+            with self._guard:
+                self.stats['writes'] += 1
+        except Exception as e:
+            for entry in batch:
+                entry.error = e
+        finally:
+            for entry in batch:
+                entry.done = True
+
+    def _replace(self, path, text):
+        """Writes text to a temp file next to path and renames it over path."""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        temp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            with open(temp_path, "w", encoding="utf-8", newline="") as f:
+                f.write(text)
+                f.flush()
+                if self.settings["fsync"] != "none":
+                    os.fsync(f.fileno())
+            for attempt in range(self.settings["replace_retries"] + 1):
+                try:
+                    os.replace(temp_path, path)
+                    break
+                except PermissionError:
+                    # On Windows the note may be briefly open in another program (Obsidian, a sync client)
+                    if attempt == self.settings["replace_retries"]:
+                        raise
+                    time.sleep(0.05 * 2 ** attempt)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        if self.settings["fsync"] == "full" and hasattr(os, "O_DIRECTORY"):
+            fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+
+class PartialFile:
+    def __init__(self, path, header=""):
+        """
+        A sidecar next to the note at path (note.md.<id>.partial) receiving
+        streamed text as it arrives. It is created on the first write,
+        starts with header and is flushed after every write, so a crash or
+        kill mid-generation still leaves the text received so far.
+        """
+        self.path = f"{os.path.abspath(path)}.{uuid.uuid4().hex[:8]}.partial"
+        self.header = header
+        self._file = None
+
+    def write(self, text):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "w", encoding="utf-8", newline="")
+            self._file.write(self.header)
+        self._file.write(text)
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Deletes the sidecar, once its text is safely in the note."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_note_writer():
+    """Returns the process-wide shared writer (locks only work if every job uses the same one)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = NoteWriter()
+        return _writer
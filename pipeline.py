@@ -0,0 +1,217 @@
+"""
+Stage-pipelined job execution for NoteGenius.
+Splits process_content into three stages connected by bounded queues so
+that, with several jobs pending, one job's extraction overlaps another's
+summarization:
+1. Extraction - runs extract_content on the stage threads; the heavy
+                work already has its own pools (parallel PDF pages, chunked
+                transcription, the shared Whisper worker), and the
+                extraction caches and Whisper model are shared in-process
+2. LLM        - I/O-bound; stage threads wait on the async LLM client,
+                whose event loop multiplexes the requests
+3. Writer     - writes finished summaries to their notes
+
+Jobs the source ledger settles (source or text already summarized) finish
+at the extraction or LLM stage without going further.
+
+Queue depths and stage utilization are tracked to help tune stage sizes.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from processor import extract_content
+from config import PIPELINE_SETTINGS
+
+
+class StageMetrics:
+    def __init__(self, name, workers, input_queue):
+        self.name = name
+        self.workers = workers
+        self.input_queue = input_queue
+        self.items = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+        self.depth_total = 0
+        self.depth_samples = 0
+        self._lock = threading.Lock()
+
+    def sample_depth(self):
+        """Records the current depth of the stage's input queue."""
+        depth = self.input_queue.qsize()
+        with self._lock:
+            self.max_depth = max(self.max_depth, depth)
+            self.depth_total += depth
+            self.depth_samples += 1
+
+    def record(self, seconds, success):
+        with self._lock:
+            self.items += 1
+            self.busy_seconds += seconds
+            if not success:
+                self.failures += 1
+
+    def snapshot(self, elapsed):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'items': self.items,
+                'failures': self.failures,
+                'busy_seconds': self.busy_seconds,
+                'utilization': self.busy_seconds / (self.workers * elapsed) if elapsed else 0.0,
+                'queue_depth': self.input_queue.qsize(),
+                'max_queue_depth': self.max_depth,
+                'avg_queue_depth': self.depth_total / self.depth_samples if self.depth_samples else 0.0
+            }
+
+
+class PipelineJob:
+    def __init__(self, params, on_status=None):
+        self.params = params
+        self.on_status = on_status or (lambda status: None)
+        self.future = Future()
+        self.content = None
+        self.summary = None
+        self.extract_seconds = 0.0
+        self.summarize_seconds = 0.0
+
+
+class ProcessingPipeline:
+    def __init__(self, processor, settings=None):
+        """Starts the stage threads."""
+        self.processor = processor
+        self.settings = settings or PIPELINE_SETTINGS
+        size = self.settings["queue_size"]
+
+        self.intake = queue.Queue(maxsize=size)
+        self.llm_queue = queue.Queue(maxsize=size)
+        self.write_queue = queue.Queue(maxsize=size)
+
+        self.stages = {
+            'extract': StageMetrics('extract', self.settings["extract_workers"], self.intake),
+            'llm': StageMetrics('llm', self.settings["llm_workers"], self.llm_queue),
+            'write': StageMetrics('write', self.settings["writer_workers"], self.write_queue),
+        }
+        self.started = time.perf_counter()
+
+        self._threads = {}
+        for name, target, source in (
+            ('extract', self._extract_stage, self.intake),
+            ('llm', self._llm_stage, self.llm_queue),
+            ('write', self._write_stage, self.write_queue),
+        ):
+            self._threads[name] = [
+                threading.Thread(target=self._stage_loop, args=(name, target, source), daemon=True)
+                for _ in range(self.stages[name].workers)
+            ]
+            for thread in self._threads[name]:
+                thread.start()
+
+    def submit(self, on_status=None, **params):
+        """
+        Queues a job (process_content keyword arguments). Blocks while the
+        intake queue is full. Returns a Future of (success, message).
+        """
+        job = PipelineJob(params, on_status)
+        job.on_status("queued")
+        self.intake.put(job)
+        self.stages['extract'].sample_depth()
+        return job.future
+
+    def _stage_loop(self, name, target, source):
+        """Runs one stage worker until it receives the shutdown sentinel."""
+        metrics = self.stages[name]
+        while True:
+            job = source.get()
+            if job is None:
+                return
+            start = time.perf_counter()
+            try:
+                target(job)
+                metrics.record(time.perf_counter() - start, True)
+            except Exception as e:
+                metrics.record(time.perf_counter() - start, False)
+                job.on_status("failed")
+                job.future.set_result((False, f"Error processing content: {str(e)}"))
+
+    def _settle(self, job, content=None):
+        """Finishes a job the source ledger already settles. Returns True if it did."""
+        message = self.processor.check_ledger(job.params, content)
+        if message is None:
+            return False
+        job.on_status("done")
+        job.future.set_result((True, message))
+        return True
+
+    def _extract_stage(self, job):
+        if self._settle(job):
+            return
+        job.on_status("extracting")
+        params = job.params
+        start = time.perf_counter()
+        job.content = extract_content(
+            params["input_type"],
+            params.get("input_value"),
+            params.get("page_range"),
+            params.get("start_time"),
+            params.get("end_time")
+        )
+        job.extract_seconds = time.perf_counter() - start
+        self.llm_queue.put(job)
+        self.stages['llm'].sample_depth()
+
+    def _llm_stage(self, job):
+        if job.content and self._settle(job, job.content):
+            return
+        job.on_status("summarizing")
+        params = job.params
+        start = time.perf_counter()
+        job.summary = self.processor.generate_summary(
+            job.content,
+            params["layout"],
+            params["language"],
+            params.get("instructions", ""),
+            params.get("fresh", False),
+            input_type=params["input_type"]
+        )
+        job.summarize_seconds = time.perf_counter() - start
+        self.write_queue.put(job)
+        self.stages['write'].sample_depth()
+
+    def _write_stage(self, job):
+        job.on_status("writing")
+        params = job.params
+        message = self.processor.write_note(
+            params["output_filename"],
+            job.summary,
+            params["input_type"],
+            params.get("input_value")
+        )
+        self.processor.record_ledger(params, job.content, job.extract_seconds, job.summarize_seconds)
+        job.on_status("done")
+        job.future.set_result((True, message))
+
+    def metrics(self):
+        """Returns per-stage utilization and queue-depth figures."""
+        elapsed = time.perf_counter() - self.started
+        return {name: stage.snapshot(elapsed) for name, stage in self.stages.items()}
+
+    def format_metrics(self):
+        """Returns the stage metrics as a small text table."""
+        lines = ["stage    workers  items  failed  util   queue(max/avg)"]
+        for name, m in self.metrics().items():
+            lines.append(
+                f"{name:<8} {m['workers']:>7}  {m['items']:>5}  {m['failures']:>6}  "
+                f"{m['utilization']:>4.0%}   {m['max_queue_depth']}/{m['avg_queue_depth']:.1f}"
+            )
+        return "\n".join(lines)
+
+    def close(self):
+        """Drains every stage in order and stops the workers."""
+        for name, source in (('extract', self.intake), ('llm', self.llm_queue), ('write', self.write_queue)):
+            for _ in self._threads[name]:
+                source.put(None)
+            for thread in self._threads[name]:
+                thread.join()
@@ -7,131 +7,728 @@ Manages the entire content processing pipeline:
 
 The processor coordinates between:
 - Different content extractors (PDF, YouTube, URL)
-- AI model for summary generation
+- AI model for summary generation (through the async LLM client, with a
+  persistent response cache)
 - File system for saving outputs
+- The index of existing notes (related notes, Manual Input context)
+- The ledger of summarized sources, checked before extraction and before
+  the model call
+- Prompt compaction, which strips boilerplate from extracted text before
+  it goes into a prompt
+
+One source can be summarized into several notes (layout, language and
+output file each) with a single extraction: see process_targets.
 """
 
+import logging
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from extractors.pdf_extractor import PDFExtractor
-from extractors.youtube_extractor import YouTubeExtractor
-from extractors.url_extractor import URLExtractor
-import google.generativeai as genai
 from dotenv import load_dotenv
-from config import LLM_MODEL, OUTPUT_DIR, LAYOUTS, BASE_PROMPT
+from llm_cache import ResponseCache
+from llm_client import LLMClient
+from note_writer import PartialFile, get_note_writer
+from prompt_compaction import compact
+from source_ledger import POLICIES, get_source_ledger, settings_key, source_fingerprint, text_fingerprint
+from vault_index import get_vault_index, note_link, relative_note_path
+import telemetry
+from config import (
+    LLM_MODEL, GENERATION_CONFIG, OUTPUT_DIR, LAYOUTS, BASE_PROMPT,
+    CHUNK_PROMPT, LONG_DOCUMENT_SETTINGS, LEDGER_SETTINGS, VAULT_INDEX_SETTINGS,
+    COMPACTION_SETTINGS
+)
+
+logger = logging.getLogger(__name__)
+
+# Natural boundaries to split long content on, from strongest to weakest
+PAGE_BOUNDARY = re.compile(r"(?=\n--- Page \d+ ---\n)")
+HEADING_BOUNDARY = re.compile(r"(?=\n#{1,6} )")
+PARAGRAPH_BOUNDARY = re.compile(r"(?<=\n\n)")
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?]\s)")
+
+# Written at the top of a partial summary saved after generation failed
+PARTIAL_MARKER = "<!-- NoteGenius: generation was interrupted, this summary is incomplete -->\n"
+
+# Written between a note's existing content and an appended summary
+NOTE_SEPARATOR = "\n\n---\n\n\n"
+
+
+def extract_content(input_type, input_value, page_range=None, start_time=None, end_time=None):
+    """
+    Extracts content based on input type.
+    A module-level function so it can run in a worker process.
+    Each extractor (and its heavy dependencies: PyPDF2, pytubefix,
+    trafilatura/lxml) is imported the first time its source type is used,
+    which keeps application startup fast.
+    """
+    if input_type == "Manual Input":
+        return None  # Returns None to indicate no content to extract
+    
+    elif input_type == "file":
+        from extractors.pdf_extractor import PDFExtractor
+        extractor = PDFExtractor(input_value, page_range)
+        return extractor.extract_text()
+    
+    elif input_type == "youtube":
+        from extractors.youtube_extractor import YouTubeExtractor
+        extractor = YouTubeExtractor(input_value, start_time, end_time)
+        return extractor.transcribe()
+    
+    elif input_type == "url":
+        from extractors.url_extractor import URLExtractor
+        extractor = URLExtractor(input_value)
+        return extractor.extract_content()
+    
+    else:
+        raise ValueError(f"Invalid input type: {input_type}")
+
 
 class ContentProcessor:
     def __init__(self):
         # Load environment variables from .env file
         load_dotenv()
         
-        # Configure Gemini
-        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-        self.model = genai.GenerativeModel(LLM_MODEL)
+        # LLM client (Gemini or the local stub, see LLM_CLIENT_SETTINGS)
+        self.client = LLMClient()
+        self.response_cache = ResponseCache()
+        self._local = threading.local()
+    
+    @property
+    def last_timings(self):
+        """Timings of the current thread's most recent job (jobs may run concurrently)."""
+        if not hasattr(self._local, 'timings'):
+            self._local.timings = {}
+        return self._local.timings
     
-    def process_content(self, input_type, input_value, output_filename, layout, language, instructions, page_range=None, start_time=None, end_time=None):
+    @last_timings.setter
+    def last_timings(self, value):
+        self._local.timings = value
+    
+    def process_content(self, input_type, input_value, output_filename, layout, language, instructions, page_range=None, start_time=None, end_time=None, fresh=False, on_chunk=None, on_status=None, policy=None):
         """
         Process content and generate markdown file.
+        The summary is streamed to on_chunk as it is generated and added to
+        the note in one atomic write once complete; if generation fails
+        midway, the partial summary is saved marked with PARTIAL_MARKER.
+        fresh: bypass the response cache to get a new sample from the model.
+        on_chunk: optional callback receiving each chunk of generated text.
+        on_status: optional callback receiving the current stage
+            ("extracting", "summarizing", "writing").
+        policy: what to do with a source the ledger has seen summarized with
+            the same settings ("skip", "link" or "force"); defaults to
+            LEDGER_SETTINGS["policy"].
+        """
+        target = dict(layout=layout, language=language, output_filename=output_filename)
+        return self.process_targets(
+            input_type, input_value, [target], instructions, page_range, start_time, end_time,
+            fresh, on_chunk, on_status, policy
+        )
+    
+    def process_targets(self, input_type, input_value, targets, instructions, page_range=None, start_time=None, end_time=None, fresh=False, on_chunk=None, on_status=None, policy=None):
+        """
+        Processes one source into several notes. targets is a list of dicts
+        with "layout", "language" and "output_filename". The source is
+        extracted, checked against the ledger and compacted once, then the
+        targets' summaries are generated concurrently, each added to its own
+        note as in process_content. Only the first summarized target is
+        streamed to on_chunk.
+        Returns (success, message); with several targets the message has one
+        line per target, and success is False if any of them failed.
+        """
+        report = on_status or (lambda status: None)
+        if not targets:
+            return False, "Error processing content: no layout and language to summarize into"
+        jobs = [
+            dict(
+                input_type=input_type, input_value=input_value, output_filename=target["output_filename"],
+                layout=target["layout"], language=target["language"], instructions=instructions,
+                page_range=page_range, start_time=start_time, end_time=end_time, policy=policy
+            )
+            for target in targets
+        ]
+        outcomes = [None] * len(jobs)  # (success, message) of each target
+        written = {}  # Target index -> (result, output_path, timings)
+        self.last_timings = {}
+        with telemetry.trace() as job_trace:
+            try:
+                with telemetry.span("job", input_type=input_type, targets=len(jobs)):
+                    job_start = time.perf_counter()
+                    
+                    # 1. Check whether this source was already summarized for each target
+                    for i, job in enumerate(jobs):
+                        settled = self.check_ledger(job)
+                        if settled is not None:
+                            outcomes[i] = (True, settled)
+                    pending = [i for i, outcome in enumerate(outcomes) if outcome is None]
+                    
+                    if pending:
+                        # 2. Extract content once, then check whether the same text was already summarized
+                        report("extracting")
+                        with telemetry.span("extract", input_type=input_type) as extract_span:
+                            content = self._extract_content(input_type, input_value, page_range, start_time, end_time)
+                            extract_span.set(output_chars=len(content) if content else 0)
+                        extract_seconds = time.perf_counter() - job_start
+                        if content:
+                            for i in pending:
+                                settled = self.check_ledger(jobs[i], content)
+                                if settled is not None:
+                                    outcomes[i] = (True, settled)
+                            pending = [i for i in pending if outcomes[i] is None]
+                    
+                    if pending:
+                        # 3. Generate the summaries from the compacted text, streaming each into its note
+                        report("summarizing")
+                        prompt_content = self.compact_content(content, input_type)
+                        written = self._summarize_targets(
+                            job_trace, {i: jobs[i] for i in pending}, content, prompt_content,
+                            extract_seconds, fresh, on_chunk, lambda: report("writing")
+                        )
+                self.last_timings['total_seconds'] = time.perf_counter() - job_start
+                self.last_timings['stages'] = job_trace.summary()
+                
+            except Exception as e:
+                self.last_timings['stages'] = job_trace.summary()
+                return False, f"Error processing content: {str(e)}"
+        
+        for i, outcome in written.items():
+            if isinstance(outcome, Exception):
+                outcomes[i] = (False, f"Error processing content: {str(outcome)}")
+                continue
+            result, output_path, timings = outcome
+            timings['total_seconds'] = self.last_timings['total_seconds']
+            action = "appended to" if result == "appended" else "saved to"
+            outcomes[i] = (True, f"Content {action} {output_path} ({self._timing_summary(timings)})")
+        
+        if len(jobs) == 1:
+            return outcomes[0]
+        return all(success for success, _ in outcomes), "\n".join(
+            f"{job['layout']}, {job['language']}: {message}" for job, (_, message) in zip(jobs, outcomes)
+        )
+    
+    def _summarize_targets(self, job_trace, jobs, content, prompt_content, extract_seconds, fresh, on_chunk, on_generated):
+        """
+        Summarizes content into each target of jobs ({index: job}) and
+        records it in the ledger. A single target runs on the calling thread
+        and raises its errors; several run concurrently, each failure being
+        returned in place of its result. Returns {index: (result,
+        output_path, timings)}.
+        """
+        shared = dict(self.last_timings)
+        
+        def summarize(job, stream):
+            summarize_start = time.perf_counter()
+            output_path = self._resolve_output_path(job["output_filename"])
+            result = self._stream_to_note(
+                output_path,
+                lambda write: self._generate_summary(
+                    prompt_content, job["layout"], job["language"], job["instructions"], fresh, write
+                ),
+                self._get_source_info(job["input_type"], job["input_value"]),
+                on_chunk if stream else None,
+                on_generated
+            )
+            self.record_ledger(job, content, extract_seconds, time.perf_counter() - summarize_start)
+            return result, output_path, dict(self.last_timings)
+        
+        if len(jobs) == 1:
+            (i, job), = jobs.items()
+            return {i: summarize(job, True)}
+        
+        def run(job, stream):
+            # Timings are per thread; spans still belong to the submitting job
+            self.last_timings = dict(shared)
+            with telemetry.attach(job_trace, "job"):
+                try:
+                    return summarize(job, stream)
+                except Exception as e:
+                    return e
+        
+        with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="notegenius-target") as pool:
+            futures = {
+                i: pool.submit(run, job, n == 0)
+                for n, (i, job) in enumerate(jobs.items())
+            }
+            return {i: future.result() for i, future in futures.items()}
+    
+    def check_ledger(self, job, content=None):
+        """
+        Looks a job (process_content keyword arguments) up in the source
+        ledger: by its source before extraction, or by the extracted text
+        once content is given. Returns a result message if the policy
+        settles the job (skipped, or linked to the existing note), or None if
+        it must be summarized. Ledger errors never fail a job.
         """
+        policy = job.get("policy") or LEDGER_SETTINGS["policy"]
+        if policy not in POLICIES:
+            raise ValueError(f"Invalid ledger policy: {policy}")
+        if not LEDGER_SETTINGS["enabled"] or policy == "force":
+            return None
+        
         try:
-            # 1. Extract content
-            content = self._extract_content(input_type, input_value, page_range, start_time, end_time)
-            
-            # 2. Generate summary using AI
-            summary = self._generate_summary(content, layout, language, instructions)
-            
-            # 3. Add source information
-            source_info = self._get_source_info(input_type, input_value)
-            summary = f"{summary}\n\n_Summary taken from {source_info}_\n\n---\n"
-            
-            # Determine the output path
-            if os.path.isabs(output_filename):
-                # If it's an absolute path (selected existing file), use it directly
-                output_path = output_filename
-            else:
-                # If it's just a filename, put it in OUTPUT_DIR
-                if not output_filename.endswith('.md'):
-                    output_filename += '.md'
-                output_path = os.path.join(OUTPUT_DIR, output_filename)
-            
-            # Convert to absolute path
-            output_path = os.path.abspath(output_path)
+            with telemetry.span("ledger", check="source" if content is None else "text") as ledger_span:
+                if content is None:
+                    fingerprint = source_fingerprint(
+                        job["input_type"], job.get("input_value"), job.get("page_range"),
+                        job.get("start_time"), job.get("end_time")
+                    )
+                else:
+                    fingerprint = text_fingerprint(content)
+                ledger = get_source_ledger()
+                entry = ledger.find(fingerprint, settings_key(job["layout"], job["language"], job.get("instructions")))
+                ledger_span.set(cache="hit" if entry else "miss")
+        except Exception as e:
+            # Recorded on the ledger span; a ledger failure never fails the job
+            logger.warning(f"Error checking the source ledger: {str(e)}")
+            return None
+        if entry is None:
+            return None
+        
+        output_path = self._resolve_output_path(job["output_filename"])
+        existing = entry['note']
+        if policy == "link" and existing != output_path:
+            if self._write_link(output_path, existing, self._get_source_info(job["input_type"], job.get("input_value"))):
+                ledger.count_avoided(entry, "link", content is not None)
+                return f"Already summarized in {existing}, linked from {output_path}"
+        ledger.count_avoided(entry, "skip", content is not None)
+        return f"Skipped, already summarized in {existing}"
+    
+    def record_ledger(self, job, content, extract_seconds, summarize_seconds):
+        """Records a written summary in the source ledger, with what producing it cost."""
+        if not LEDGER_SETTINGS["enabled"] or job["input_type"] == "Manual Input":
+            return
+        try:
+            with telemetry.span("ledger", check="record"):
+                source = source_fingerprint(
+                    job["input_type"], job.get("input_value"), job.get("page_range"),
+                    job.get("start_time"), job.get("end_time")
+                )
+                text_hash = text_fingerprint(content) if content else None
+                if source or text_hash:
+                    get_source_ledger().record(
+                        source,
+                        text_hash,
+                        settings_key(job["layout"], job["language"], job.get("instructions")),
+                        self._resolve_output_path(job["output_filename"]),
+                        extract_seconds,
+                        summarize_seconds,
+                        self._estimate_tokens(content) if content else 0
+                    )
+        except Exception as e:
+            logger.warning(f"Error updating the source ledger: {str(e)}")
+    
+    def _write_link(self, output_path, existing, source_info):
+        """
+        Points a note at the existing summary of the same source instead of
+        summarizing it again. Returns False if the note already has the link.
+        """
+        relative = relative_note_path(existing)
+        link = f"[[{note_link(relative)}]]" if relative else f"[{os.path.basename(existing)}](<{existing}>)"
+        line = f"Already summarized in {link}"
+        if os.path.exists(output_path):
+            with open(output_path, "r", encoding='utf-8') as f:
+                if line in f.read():
+                    return False
+        get_note_writer().write(output_path, f"{line}\n\n_Summary taken from {source_info}_\n\n---\n", NOTE_SEPARATOR)
+        self._index_note(output_path)
+        return True
+    
+    def generate_summary(self, content, layout, language, instructions, fresh=False, input_type=None):
+        """
+        Generates a summary without writing it (used by the pipeline's LLM stage).
+        With input_type, the content is compacted for that source type first.
+        """
+        self.last_timings = {}
+        if input_type:
+            content = self.compact_content(content, input_type)
+        return self._generate_summary(content, layout, language, instructions, fresh)
+    
+    def compact_content(self, content, input_type):
+        """
+        Compacts extracted text with the steps COMPACTION_SETTINGS sets for
+        input_type (see prompt_compaction.py). Estimated tokens before and
+        after are kept in last_timings['compaction'].
+        """
+        steps = COMPACTION_SETTINGS["sources"].get(input_type, ()) if COMPACTION_SETTINGS["enabled"] else ()
+        if not content or not steps:
+            return content
+        with telemetry.span("compact", input_type=input_type) as compact_span:
+            compacted, removed = compact(content, steps)
+            tokens_before = self._estimate_tokens(content)
+            tokens_after = self._estimate_tokens(compacted)
+            compact_span.set(
+                output_chars=len(compacted),
+                tokens_before=tokens_before,
+                tokens_after=tokens_after,
+                removed_chars=removed
+            )
+        self.last_timings['compaction'] = (tokens_before, tokens_after)
+        return compacted
+    
+    def write_note(self, output_filename, summary, input_type, input_value):
+        """
+        Writes an already generated summary to its note (new file or append).
+        Returns a message describing where it went.
+        """
+        output_path = self._resolve_output_path(output_filename)
+        
+        def generate(write):
+            write(summary)
+            return summary
+        
+        result = self._stream_to_note(
+            output_path,
+            generate,
+            self._get_source_info(input_type, input_value)
+        )
+        action = "appended to" if result == "appended" else "saved to"
+        return f"Content {action} {output_path}"
+    
+    def _resolve_output_path(self, output_filename):
+        """Returns the absolute note path for a filename or a selected file."""
+        if os.path.isabs(output_filename):
+            # If it's an absolute path (selected existing file), use it directly
+            output_path = output_filename
+        else:
+            # If it's just a filename, put it in OUTPUT_DIR
+            if not output_filename.endswith('.md'):
+                output_filename += '.md'
+            output_path = os.path.join(OUTPUT_DIR, output_filename)
+        
+        # Convert to absolute path
+        return os.path.abspath(output_path)
+    
+    def _stream_to_note(self, output_path, generate, source_info, on_chunk=None, on_generated=None):
+        """
+        Collects the summary generate(write) streams through write (and
+        returns), calling on_generated once generation is finished, then adds
+        it to the note with links to related notes and the source, in one
+        write through the note writer. Returns "created" or "appended".
+        If generation fails after text arrived, the partial summary is added
+        marked with PARTIAL_MARKER; before that, the note is not touched.
+        While generating, the text is also streamed to a sidecar
+        (note.md.<id>.partial, starting with PARTIAL_MARKER) removed once the
+        note is written, so a crash or kill still leaves the partial text.
+        """
+        chunks = []
+        footer = f"\n\n_Summary taken from {source_info}_\n\n---\n"
+        partial = PartialFile(output_path, PARTIAL_MARKER)
+        
+        def write(text):
+            partial.write(text)
+            chunks.append(text)
+            if on_chunk:
+                on_chunk(text)
+        
+        try:
+            try:
+                summary = generate(write)
+            except Exception:
+                if chunks:
+                    get_note_writer().write(output_path, PARTIAL_MARKER + "".join(chunks) + footer, NOTE_SEPARATOR)
+                    partial.discard()
+                raise
+            if on_generated:
+                on_generated()
+            related = self._related_notes(summary, output_path)
             
-            # Check if file exists
-            if os.path.exists(output_path):
-                mode = "a"  # append mode
-                # Add separator, paragraphs and new content
-                summary = f"\n\n---\n\n\n{summary}"
-            else:
-                mode = "w"  # write mode (new file)
-
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-            # Save content to file
-            with open(output_path, mode, encoding='utf-8') as f:
-                f.write(summary)
-
-            action = "appended to" if mode == "a" else "saved to"
-            return True, f"Content {action} {output_path}"
-
+            text = "".join(chunks)
+            with telemetry.span("write", output_chars=len(text)):
+                result = get_note_writer().write(output_path, text + related + footer, NOTE_SEPARATOR)
+            partial.discard()
+        finally:
+            # Kept on disk if the note could not be written
+            partial.close()
+        self._index_note(output_path)
+        return result
+    
+    def _related_notes(self, summary, output_path):
+        """
+        Returns a "Related notes" block linking the existing notes most
+        similar to summary (never the note itself), or "" if there are none.
+        The index is only an aid: its errors never fail a job.
+        """
+        count = VAULT_INDEX_SETTINGS["related_notes"]
+        if not VAULT_INDEX_SETTINGS["enabled"] or not count or not summary:
+            return ""
+        try:
+            with telemetry.span("related") as related_span:
+                index = get_vault_index()
+                index.refresh()
+                paths = index.related(summary, count, exclude=output_path)
+                related_span.set(notes=len(paths))
         except Exception as e:
-            return False, f"Error processing content: {str(e)}"
+            logger.warning(f"Error finding related notes: {str(e)}")
+            return ""
+        if not paths:
+            return ""
+        links = "\n".join(f"- [[{note_link(path)}]]" for path in paths)
+        return f"\n\n**Related notes**\n{links}"
+    
+    def _index_note(self, output_path):
+        """Adds a finished note to the vault index."""
+        if not VAULT_INDEX_SETTINGS["enabled"]:
+            return
+        try:
+            with telemetry.span("index"):
+                get_vault_index().update_file(output_path)
+        except Exception as e:
+            logger.warning(f"Error indexing note: {str(e)}")
+    
+    def _vault_context(self, instructions):
+        """
+        Returns a prompt section with the passages of existing notes most
+        relevant to the instructions of a Manual Input job, within
+        VAULT_INDEX_SETTINGS["context_tokens"] estimated tokens.
+        """
+        budget = VAULT_INDEX_SETTINGS["context_tokens"]
+        if not VAULT_INDEX_SETTINGS["enabled"] or not budget or not instructions.strip():
+            return ""
+        try:
+            with telemetry.span("vault_context") as context_span:
+                index = get_vault_index()
+                index.refresh()
+                section = index.context(instructions, budget, self._estimate_tokens)
+                context_span.set(output_chars=len(section), context_tokens=self._estimate_tokens(section) if section else 0)
+                return section
+        except Exception as e:
+            logger.warning(f"Error reading related passages: {str(e)}")
+            return ""
+    
+    def _timing_summary(self, timings=None):
+        """Returns a short description of prompt compaction, first-token and total time."""
+        timings = self.last_timings if timings is None else timings
+        parts = []
+        if 'compaction' in timings:
+            tokens_before, tokens_after = timings['compaction']
+            parts.append(f"content {tokens_before / 1000:.1f}k → {tokens_after / 1000:.1f}k tokens")
+        if 'ttft_seconds' in timings:
+            parts.append(f"first token {timings['ttft_seconds']:.1f}s")
+        parts.append(f"total {timings.get('total_seconds', 0):.1f}s")
+        return ", ".join(parts)
     
     def _extract_content(self, input_type, input_value, page_range=None, start_time=None, end_time=None):
         """Extracts content based on input type."""
-        if input_type == "Manual Input":
-            return None  # Returns None to indicate no content to extract
-        
-        elif input_type == "file":
-            extractor = PDFExtractor(input_value, page_range)
-            return extractor.extract_text()
+        return extract_content(input_type, input_value, page_range, start_time, end_time)
+    
+    def _generate_summary(self, content, layout, language, instructions, fresh=False, on_chunk=None):
+        """
+        Generates summary using AI, reusing a cached response for an identical prompt.
+        Content too long for a single request is summarized map-reduce style:
+        chunks are summarized concurrently, then combined with the layout prompt.
+        With on_chunk, the final response is streamed to it as it arrives.
+        """
+        with telemetry.span("summarize", input_chars=len(content) if content else 0) as summarize_span:
+            layout_info = LAYOUTS.get(layout)
+            if not layout_info:
+                raise ValueError(f"Invalid layout: {layout}")
         
-        elif input_type == "youtube":
-            extractor = YouTubeExtractor(input_value, start_time, end_time)
-            return extractor.transcribe()
+            is_long = (
+                content
+                and LONG_DOCUMENT_SETTINGS["enabled"]
+                and self._estimate_tokens(content) > LONG_DOCUMENT_SETTINGS["max_prompt_tokens"]
+            )
         
-        elif input_type == "url":
-            extractor = URLExtractor(input_value)
-            return extractor.extract_content()
+            # Prepare prompt parts
+            if is_long:
+                start = time.perf_counter()
+                partials = self._map_summaries(content, language, instructions, fresh)
+                self.last_timings['map_seconds'] = time.perf_counter() - start
+                prefix = (
+                    f"The content below is a sequence of partial summaries of consecutive parts of one long document. "
+                    f"Combine them into a single structured summary in {language}."
+                )
+                content_section = f"Partial summaries:\n{partials}"
+            elif content:
+                prefix = f"Analyze the following content and generate a structured summary in {language}."
+                content_section = f"Content:\n{content}"
+            else:
+                prefix = f"Generate a structured summary in {language} based on the instructions below."
+                content_section = self._vault_context(instructions)
         
-        else:
-            raise ValueError(f"Invalid input type: {input_type}")
-    
-    def _generate_summary(self, content, layout, language, instructions):
-        """Generates summary using AI."""
-        layout_info = LAYOUTS.get(layout)
-        if not layout_info:
-            raise ValueError(f"Invalid layout: {layout}")
-        
-        # Prepare prompt parts
-        if content:
-            prefix = f"Analyze the following content and generate a structured summary in {language}."
-            content_section = f"Content:\n{content}"
-        else:
-            prefix = f"Generate a structured summary in {language} based on the instructions below."
-            content_section = ""
-        
-        prompt = BASE_PROMPT.format(
-            prefix=prefix,
-            language=language,
-            layout_prompt=layout_info["prompt"],
-            instructions=instructions,
-            content_section=content_section
-        )
+            prompt = BASE_PROMPT.format(
+                prefix=prefix,
+                language=language,
+                layout_prompt=layout_info["prompt"],
+                instructions=instructions,
+                content_section=content_section
+            )
         
-        try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7
+            start = time.perf_counter()
+            if on_chunk:
+                summary = self._stream_model(prompt, fresh, on_chunk)
+            else:
+                summary = self._call_model(prompt, fresh)
+            self.last_timings['reduce_seconds' if is_long else 'generate_seconds'] = time.perf_counter() - start
+            if is_long:
+                summarize_span.set(
+                    chunks=self.last_timings['chunks'],
+                    map_seconds=self.last_timings['map_seconds'],
+                    reduce_seconds=self.last_timings['reduce_seconds']
                 )
+            summarize_span.set(output_chars=len(summary))
+            return summary
+    
+    def _call_model(self, prompt, fresh=False):
+        """Sends one prompt to the model, going through the response cache."""
+        return self._call_models([prompt], fresh)[0]
+    
+    def _stream_model(self, prompt, fresh, on_chunk):
+        """
+        Streams one prompt's response to on_chunk, recording time to first
+        token. A cached response is delivered as a single chunk.
+        """
+        with telemetry.span("llm", prompt_tokens=self._estimate_tokens(prompt), stream=True) as llm_span:
+            if not fresh:
+                cached = self.response_cache.get(prompt, LLM_MODEL, GENERATION_CONFIG)
+                if cached is not None:
+                    self.last_timings['ttft_seconds'] = 0.0
+                    llm_span.set(cache="hit", response_tokens=self._estimate_tokens(cached), output_chars=len(cached))
+                    on_chunk(cached)
+                    return cached
+            
+            start = time.perf_counter()
+            
+            def deliver(chunk):
+                if 'ttft_seconds' not in self.last_timings:
+                    self.last_timings['ttft_seconds'] = time.perf_counter() - start
+                on_chunk(chunk)
+            
+            try:
+                response = self.client.stream(prompt, GENERATION_CONFIG, deliver)
+            except Exception as e:
+                raise Exception(f"Error processing AI response: {str(e)}")
+            
+            llm_span.set(
+                cache="miss",
+                response_tokens=self._estimate_tokens(response),
+                output_chars=len(response),
+                ttft_seconds=self.last_timings.get('ttft_seconds')
             )
+            self.response_cache.set(prompt, LLM_MODEL, GENERATION_CONFIG, response, time.perf_counter() - start)
+            return response
+    
+    def _call_models(self, prompts, fresh=False, limit=None):
+        """
+        Sends several prompts concurrently (at most limit in flight) through
+        the LLM client. Cached responses are reused unless fresh is set.
+        """
+        with telemetry.span("llm", prompt_tokens=sum(self._estimate_tokens(p) for p in prompts), requests=len(prompts)) as llm_span:
+            results = [None] * len(prompts)
+            if not fresh:
+                for i, prompt in enumerate(prompts):
+                    results[i] = self.response_cache.get(prompt, LLM_MODEL, GENERATION_CONFIG)
+            missing = [i for i, result in enumerate(results) if result is None]
+            llm_span.set(cache_hits=len(prompts) - len(missing), cache_misses=len(missing))
             
-            return response.text
+            if missing:
+                try:
+                    start = time.perf_counter()
+                    responses = self.client.generate_many(
+                        [prompts[i] for i in missing],
+                        GENERATION_CONFIG,
+                        limit
+                    )
+                    elapsed = (time.perf_counter() - start) / len(missing)
+                    
+                    for i, response in zip(missing, responses):
+                        self.response_cache.set(prompts[i], LLM_MODEL, GENERATION_CONFIG, response, elapsed)
+                        results[i] = response
+                    
+                except Exception as e:
+                    raise Exception(f"Error processing AI response: {str(e)}")
             
-        except Exception as e:
-            raise Exception(f"Error processing AI response: {str(e)}")
+            llm_span.set(
+                response_tokens=sum(self._estimate_tokens(r) for r in results),
+                output_chars=sum(len(r) for r in results)
+            )
+            return results
+    
+    def _estimate_tokens(self, text):
+        """Rough token count (about four characters per token)."""
+        return len(text) // 4 + 1
+    
+    def _split_content(self, content, max_tokens):
+        """
+        Splits content into chunks of at most max_tokens, cutting on the
+        strongest natural boundary available: PDF page markers, headings,
+        paragraphs and finally sentences.
+        """
+        def split(text, boundaries):
+            if self._estimate_tokens(text) <= max_tokens:
+                return [text]
+            if not boundaries:
+                # No boundary left: hard cut on the character budget
+                size = max_tokens * 4
+                return [text[i:i + size] for i in range(0, len(text), size)]
+            
+            pieces = [p for p in boundaries[0].split(text) if p.strip()]
+            if len(pieces) <= 1:
+                return split(text, boundaries[1:])
+            
+            # Pack consecutive pieces into chunks under the budget
+            chunks = []
+            current = ""
+            for piece in pieces:
+                if self._estimate_tokens(piece) > max_tokens:
+                    if current:
+                        chunks.append(current)
+                        current = ""
+                    chunks.extend(split(piece, boundaries[1:]))
+                elif self._estimate_tokens(current + piece) > max_tokens:
+                    chunks.append(current)
+                    current = piece
+                else:
+                    current += piece
+            if current:
+                chunks.append(current)
+            return chunks
+        
+        return split(content, [PAGE_BOUNDARY, HEADING_BOUNDARY, PARAGRAPH_BOUNDARY, SENTENCE_BOUNDARY])
+    
+    def _map_summaries(self, content, language, instructions, fresh=False):
+        """
+        Summarizes content chunk by chunk with a bounded number of requests
+        in flight. Repeats on the joined partial summaries until they fit in
+        a single prompt, for at most LONG_DOCUMENT_SETTINGS["max_rounds"]
+        rounds, and stops as soon as a round fails to shrink the text.
+        Returns the joined partial summaries.
+        """
+        self.last_timings['chunks'] = 0
+        max_rounds = LONG_DOCUMENT_SETTINGS["max_rounds"]
+        for round_number in range(1, max_rounds + 1):
+            tokens = self._estimate_tokens(content)
+            chunks = self._split_content(content, LONG_DOCUMENT_SETTINGS["chunk_tokens"])
+            self.last_timings['chunks'] += len(chunks)
+            prompts = [
+                CHUNK_PROMPT.format(
+                    index=i + 1,
+                    total=len(chunks),
+                    language=language,
+                    instructions=instructions,
+                    content=chunk
+                )
+                for i, chunk in enumerate(chunks)
+            ]
+            partials = self._call_models(prompts, fresh, LONG_DOCUMENT_SETTINGS["concurrency"])
+            
+            content = "\n\n".join(
+                f"Part {i + 1} of {len(partials)}:\n{partial}" for i, partial in enumerate(partials)
+            )
+            reduced = self._estimate_tokens(content)
+            if reduced <= LONG_DOCUMENT_SETTINGS["max_prompt_tokens"]:
+                return content
+            if reduced >= tokens * LONG_DOCUMENT_SETTINGS["min_shrink"]:
+                raise Exception(
+                    f"Error summarizing long document: round {round_number} of partial summaries "
+                    f"only went from {tokens} to {reduced} estimated tokens"
+                )
+        raise Exception(
+            f"Error summarizing long document: partial summaries still above "
+            f"{LONG_DOCUMENT_SETTINGS['max_prompt_tokens']} estimated tokens after {max_rounds} rounds"
+        )
     
     def _save_output(self, content, filename):
         """Saves processed content to a markdown file."""
@@ -0,0 +1,179 @@
+"""
+Prompt compaction for NoteGenius.
+Shrinks extracted text before it goes into a prompt, removing only what
+carries no information for a summary:
+- whitespace     invisible characters, runs of spaces, trailing spaces and
+                 extra blank lines (indentation is kept)
+- page_edges     running headers, footers and page numbers: lines at the top
+                 or bottom of PDF pages that repeat across many pages
+                 (digits in lines with words are ignored when comparing, so
+                 "Page 3 of 90" matches; a bare number counts as a page
+                 number only if it follows the page index)
+- paragraphs     later copies of a paragraph already seen (cookie banners,
+                 repeated disclaimers, boilerplate)
+- repeats        lines or sentences repeated back to back at least
+                 min_repeats times (transcription loops); a phrase said
+                 twice, like "Yes. Yes.", is kept
+
+Which steps run is set per source type in COMPACTION_SETTINGS["sources"].
+PDF page markers are always kept.
+"""
+
+import re
+from config import COMPACTION_SETTINGS
+
+STEPS = ("whitespace", "page_edges", "paragraphs", "repeats")
+
+PAGE_MARKER = re.compile(r"(\n--- Page \d+ ---\n)")
+PAGE_LINE = re.compile(r"--- Page \d+ ---$")
+PAGE_NUMBER = re.compile(r"[^\w]*(\d+)[^\w]*$")  # "12", "- 12 -", "[12]"
+LETTERS = re.compile(r"[^\W\d_]")
+INVISIBLE = re.compile("[\u200b\u200c\u200d\u2060\ufeff\u00ad]")  # Zero-width characters, soft hyphens
+WIDE_SPACES = re.compile("[\u00a0\u2007\u202f\t\f\v]")  # Non-breaking spaces, tabs
+INNER_SPACES = re.compile(r"(?<=\S) {2,}")
+TRAILING_SPACES = re.compile(r" +$", re.MULTILINE)
+BLANK_LINES = re.compile(r"\n{3,}")
+DIGITS = re.compile(r"\d+")
+SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def _key(text):
+    """Comparison form of a line or paragraph: case and spacing ignored."""
+    return " ".join(text.split()).casefold()
+
+
+def _edge_key(line, page):
+    """
+    Comparison form of a line at a page edge. Digits are masked only in
+    lines with words; a bare number becomes its offset from the page index
+    (so printed page numbers match across pages, whatever the front
+    matter); other numeric lines, like table rows, are compared exactly.
+    """
+    key = _key(line)
+    if LETTERS.search(key):
+        return DIGITS.sub("#", key)
+    match = PAGE_NUMBER.match(key)
+    if match:
+        return f"page number {int(match.group(1)) - page:+d}"
+    return key
+
+
+def normalize_whitespace(text):
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = INVISIBLE.sub("", text)
+    # Tabs become spaces too; only runs after the indentation are collapsed
+    text = WIDE_SPACES.sub(" ", text)
+    text = INNER_SPACES.sub(" ", text)
+    text = TRAILING_SPACES.sub("", text)
+    return BLANK_LINES.sub("\n\n", text)
+
+
+def strip_page_edges(text, edge_lines, min_pages, page_ratio):
+    """
+    Removes lines repeated at the top or bottom of many pages. Works on the
+    "--- Page N ---" markers of the PDF extractor; other text is returned as is.
+    """
+    parts = PAGE_MARKER.split(text)
+    bodies = [parts[i].split("\n") for i in range(2, len(parts), 2)]
+    pages = [int(DIGITS.search(parts[i]).group()) for i in range(1, len(parts), 2)]
+    if len(bodies) < min_pages:
+        return text
+
+    def edge(lines, from_bottom):
+        """Indices of the first edge_lines non-empty lines from one end of a page."""
+        order = range(len(lines) - 1, -1, -1) if from_bottom else range(len(lines))
+        return [i for i in order if lines[i].strip()][:edge_lines]
+
+    threshold = max(min_pages, page_ratio * len(bodies))
+    for from_bottom in (False, True):
+        counts = {}
+        for lines, page in zip(bodies, pages):
+            for key in {_edge_key(lines[i], page) for i in edge(lines, from_bottom)}:
+                counts[key] = counts.get(key, 0) + 1
+        repeated = {key for key, count in counts.items() if count >= threshold}
+        if not repeated:
+            continue
+        for lines, page in zip(bodies, pages):
+            # Only a run of repeated lines at the very edge is removed
+            for i in edge(lines, from_bottom):
+                if _edge_key(lines[i], page) not in repeated:
+                    break
+                lines[i] = None
+            lines[:] = [line for line in lines if line is not None]
+
+    for n, lines in enumerate(bodies):
+        parts[2 + 2 * n] = "\n".join(lines)
+    return "".join(parts)
+
+
+def drop_repeated_paragraphs(text, min_chars):
+    """Removes later copies of paragraphs of at least min_chars, keeping the first."""
+    seen = set()
+    kept = []
+    for paragraph in text.split("\n\n"):
+        # A page marker opening the paragraph is kept whatever follows it
+        marker, body = "", paragraph
+        first, _, rest = paragraph.partition("\n")
+        if PAGE_LINE.match(first):
+            marker, body = first, rest
+        key = _key(body)
+        if len(key) >= min_chars:
+            if key in seen:
+                if marker:
+                    kept.append(marker)
+                continue
+            seen.add(key)
+        kept.append(paragraph)
+    return "\n\n".join(kept)
+
+
+def _collapse_runs(items, min_repeats):
+    """Keeps one copy of each run of at least min_repeats equal items; blank items are never collapsed."""
+    kept = []
+    run = []
+    for item in items:
+        if run and _key(item) and _key(item) == _key(run[0]):
+            run.append(item)
+            continue
+        kept.extend(run[:1] if len(run) >= min_repeats else run)
+        run = [item]
+    kept.extend(run[:1] if len(run) >= min_repeats else run)
+    return kept
+
+
+def collapse_repeats(text, min_repeats):
+    """
+    Collapses lines, and sentences within a line, repeated back to back at
+    least min_repeats times into one copy. Shorter runs are real speech.
+    """
+    lines = [" ".join(_collapse_runs(SENTENCE_END.split(line), min_repeats)) for line in text.split("\n")]
+    return "\n".join(_collapse_runs(lines, min_repeats))
+
+
+def compact(text, steps, settings=None):
+    """
+    Runs the given steps (in STEPS order) over text. Returns the compacted
+    text and {step: characters removed}.
+    """
+    settings = settings or COMPACTION_SETTINGS
+    unknown = set(steps) - set(STEPS)
+    if unknown:
+        raise ValueError(f"Invalid compaction steps: {', '.join(sorted(unknown))}")
+
+    removed = {}
+    for step in STEPS:
+        if step not in steps:
+            continue
+        before = len(text)
+        if step == "whitespace":
+            text = normalize_whitespace(text)
+        elif step == "page_edges":
+            text = strip_page_edges(
+                text, settings["edge_lines"], settings["edge_min_pages"], settings["edge_page_ratio"]
+            )
+        elif step == "paragraphs":
+            text = drop_repeated_paragraphs(text, settings["min_paragraph_chars"])
+        else:
+            text = collapse_repeats(text, settings["min_repeats"])
+        removed[step] = before - len(text)
+    return text, removed
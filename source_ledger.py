@@ -0,0 +1,244 @@
+"""
+Ledger of summarized sources for NoteGenius.
+Maps source fingerprints to the notes (and settings) they were summarized
+into, so a source seen before is not extracted and summarized again:
+- before extraction, by source: normalized URL, YouTube video id and time
+  range, or PDF content hash and page range
+- before the model call, by a hash of the extracted text (the same content
+  reached through another URL or file)
+
+A match needs the same layout, language and instructions. What happens
+then is set by the policy:
+- skip   nothing is written
+- link   the requested note gets a link to the existing note
+- force  the summary is generated again
+
+Usage:
+    python source_ledger.py list
+    python source_ledger.py forget SOURCE_OR_NOTE
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from config import LEDGER_SETTINGS
+
+POLICIES = ("skip", "link", "force")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    source TEXT,
+    text_hash TEXT,
+    settings TEXT NOT NULL,
+    note TEXT NOT NULL,
+    extract_seconds REAL NOT NULL,
+    summarize_seconds REAL NOT NULL,
+    tokens INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_source ON entries (source, settings);
+CREATE INDEX IF NOT EXISTS entries_text ON entries (text_hash, settings);
+"""
+
+# Same pattern as extractors.audio_fetcher, which can't be imported here
+# without loading pytubefix
+VIDEO_ID_PATTERN = re.compile(r"(?:v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})")
+
+# Query parameters that only track where a link was clicked
+TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|mc_cid|mc_eid|ref)$")
+
+
+def normalize_url(url):
+    """
+    Returns a canonical form of a URL: lowercase scheme and host, no
+    "www.", default port, fragment or tracking parameters, sorted query and
+    no trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "http"
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port != {"http": 80, "https": 443}.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not TRACKING_PARAMS.match(key)
+    ))
+    path = parts.path.rstrip("/")
+    # http and https serve the same page for the sources we take
+    return urlunsplit(("https" if scheme == "http" else scheme, host, path, query, ""))
+
+
+def _seconds(value, default):
+    """MM:SS (or None) as seconds, for comparing time ranges."""
+    if not value:
+        return default
+    try:
+        minutes, seconds = map(int, str(value).split(":"))
+        return minutes * 60 + seconds
+    except ValueError:
+        return value
+
+
+def source_fingerprint(input_type, input_value, page_range=None, start_time=None, end_time=None):
+    """
+    Returns the fingerprint of a source before extraction, or None for
+    Manual Input (and sources that can't be fingerprinted, like a missing file).
+    """
+    if input_type == "url":
+        return f"url:{normalize_url(input_value)}"
+    if input_type == "youtube":
+        match = VIDEO_ID_PATTERN.search(input_value)
+        video = match.group(1) if match else input_value.strip()
+        return f"youtube:{video}:{_seconds(start_time, 0)}-{_seconds(end_time, 'end')}"
+    if input_type == "file":
+        from extractors.page_store import get_page_store
+        try:
+            # Re-hashes only if the file's size or mtime changed
+            content_hash = get_page_store().fingerprint(input_value)
+        except OSError:
+            return None
+        first, last = page_range or ("1", "end")
+        return f"pdf:{content_hash}:{first}-{last}"
+    return None
+
+
+def text_fingerprint(content):
+    """Returns the fingerprint of extracted text (ignoring whitespace differences)."""
+    return "text:" + hashlib.sha256(" ".join(content.split()).encode("utf-8")).hexdigest()
+
+
+def settings_key(layout, language, instructions):
+    """Identifies the settings a summary was made with."""
+    return json.dumps([layout, language, " ".join((instructions or "").split())])
+
+
+class SourceLedger:
+    def __init__(self, db_path=None):
+        self.db_path = str(db_path or LEDGER_SETTINGS["path"])
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        # Work avoided by this process, for batch reports
+        self.avoided = {
+            'skipped': 0,
+            'linked': 0,
+            'extractions': 0,
+            'extract_seconds': 0.0,
+            'summaries': 0,
+            'summarize_seconds': 0.0,
+            'tokens': 0
+        }
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def count_avoided(self, entry, action, extracted):
+        """
+        Adds a match to the avoided work: the extraction (unless the job got
+        as far as extracting) and the summary, at what they cost originally.
+        """
+        with self._lock:
+            self.avoided['linked' if action == "link" else 'skipped'] += 1
+            if not extracted:
+                self.avoided['extractions'] += 1
+                self.avoided['extract_seconds'] += entry['extract_seconds']
+            self.avoided['summaries'] += 1
+            self.avoided['summarize_seconds'] += entry['summarize_seconds']
+            self.avoided['tokens'] += entry['tokens']
+
+    def avoided_snapshot(self):
+        with self._lock:
+            return dict(self.avoided)
+
+    def find(self, fingerprint, settings):
+        """
+        Returns the most recent entry (a dict) for a source or text
+        fingerprint summarized with these settings, or None. Entries whose
+        note no longer exists are dropped.
+        """
+        if not fingerprint:
+            return None
+        column = "text_hash" if fingerprint.startswith("text:") else "source"
+        with self._lock, self._connect() as db:
+            db.row_factory = sqlite3.Row
+            rows = db.execute(
+                f"SELECT * FROM entries WHERE {column} = ? AND settings = ? ORDER BY created DESC",
+                (fingerprint, settings)
+            ).fetchall()
+            for row in rows:
+                if os.path.exists(row['note']):
+                    return dict(row)
+                db.execute("DELETE FROM entries WHERE id = ?", (row['id'],))
+        return None
+
+    def record(self, source, text_hash, settings, note, extract_seconds, summarize_seconds, tokens):
+        """Records that a source (and its text) was summarized into note."""
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT INTO entries (source, text_hash, settings, note, extract_seconds, "
+                "summarize_seconds, tokens, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (source, text_hash, settings, os.path.abspath(note), extract_seconds,
+                 summarize_seconds, tokens, time.time())
+            )
+
+    def entries(self):
+        with self._connect() as db:
+            db.row_factory = sqlite3.Row
+            return [dict(row) for row in db.execute("SELECT * FROM entries ORDER BY created")]
+
+    def forget(self, value):
+        """Removes the entries of a source fingerprint or a note path. Returns how many."""
+        with self._lock, self._connect() as db:
+            cursor = db.execute(
+                "DELETE FROM entries WHERE source = ? OR note = ?", (value, os.path.abspath(value))
+            )
+            return cursor.rowcount
+
+    def clear(self):
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM entries")
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_source_ledger():
+    """Returns the process-wide shared ledger."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = SourceLedger()
+        return _ledger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the ledger of summarized sources.")
+    parser.add_argument("command", choices=["list", "forget"])
+    parser.add_argument("value", nargs="?", help="Source fingerprint or note path (for forget)")
+    args = parser.parse_args()
+
+    ledger = get_source_ledger()
+    if args.command == "forget":
+        if not args.value:
+            parser.error("forget needs a source fingerprint or a note path")
+        print(f"Removed {ledger.forget(args.value)} entries")
+        return
+
+    for entry in ledger.entries():
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry['created']))
+        print(f"{created}  {entry['source'] or entry['text_hash'][:21]}  ->  {entry['note']}")
+
+
+if __name__ == "__main__":
+    main()
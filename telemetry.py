@@ -0,0 +1,293 @@
+"""
+Stage instrumentation for NoteGenius.
+Every stage of a job (extraction, downloads, transcription, model calls,
+note writing) runs inside a span. A finished span is an event with the
+stage name, duration, input bytes, output characters, estimated prompt and
+response tokens and cache hit/miss, which is:
+- appended to a JSONL log (TELEMETRY_SETTINGS["log_path"])
+- added to the in-memory metrics registry
+- collected into the current job's trace, for a one-line summary
+
+The registry renders as Prometheus text; the CLI rebuilds it from the log:
+    python telemetry.py prometheus [--log PATH]
+    python telemetry.py summary [--log PATH]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import threading
+import time
+import uuid
+from config import TELEMETRY_SETTINGS
+
+# Upper bounds (seconds) of the stage duration histogram
+BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+class Span:
+    def __init__(self, stage, attributes):
+        self.stage = stage
+        self.attributes = dict(attributes)
+
+    def set(self, **attributes):
+        """Adds attributes known only once the stage has run (sizes, cache result...)."""
+        self.attributes.update(attributes)
+
+
+class JobTrace:
+    def __init__(self, job_id=None):
+        """The spans of one job, recorded on the thread running it."""
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.events = []
+
+    def summary(self):
+        """
+        One compact line: time per top-level stage, token estimates, cache
+        hits and failed stages, e.g. "extract 3.2s, summarize 12.0s, write
+        0.0s; tokens 4.1k in / 0.6k out; cache 1/2 hits; errors in related".
+        """
+        stages = {}
+        for event in self.events:
+            if event['parent'] == "job":
+                stages[event['stage']] = stages.get(event['stage'], 0.0) + event['seconds']
+        parts = [", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in stages.items())]
+
+        prompt_tokens = sum(event.get('prompt_tokens', 0) for event in self.events)
+        response_tokens = sum(event.get('response_tokens', 0) for event in self.events)
+        if prompt_tokens or response_tokens:
+            parts.append(f"tokens {_compact(prompt_tokens)} in / {_compact(response_tokens)} out")
+
+        hits = sum(_cache_counts(event)[0] for event in self.events)
+        lookups = hits + sum(_cache_counts(event)[1] for event in self.events)
+        if lookups:
+            parts.append(f"cache {hits}/{lookups} hits")
+
+        # Stages that failed, including the ones a job recovers from (ledger, index)
+        failed = sorted({event['stage'] for event in self.events if event.get('error') and event['stage'] != "job"})
+        if failed:
+            parts.append(f"errors in {', '.join(failed)}")
+        return "; ".join(part for part in parts if part)
+
+
+def _compact(number):
+    return f"{number / 1000:.1f}k" if number >= 1000 else str(number)
+
+
+def _cache_counts(event):
+    """Returns (hits, misses) of an event: a single 'cache' result or batch counts."""
+    if 'cache_hits' in event or 'cache_misses' in event:
+        return event.get('cache_hits', 0), event.get('cache_misses', 0)
+    cache = event.get('cache')
+    return (1 if cache == "hit" else 0), (1 if cache == "miss" else 0)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """Per-stage counters and a duration histogram."""
+        self._lock = threading.Lock()
+        self.stages = {}
+
+    def record(self, event):
+        with self._lock:
+            stage = self.stages.setdefault(event['stage'], {
+                'count': 0,
+                'errors': 0,
+                'seconds': 0.0,
+                'buckets': [0] * len(BUCKETS),
+                'input_bytes': 0,
+                'output_chars': 0,
+                'prompt_tokens': 0,
+                'response_tokens': 0,
+                'cache_hits': 0,
+                'cache_misses': 0
+            })
+            stage['count'] += 1
+            stage['seconds'] += event['seconds']
+            if event.get('error'):
+                stage['errors'] += 1
+            for i, bound in enumerate(BUCKETS):
+                if event['seconds'] <= bound:
+                    stage['buckets'][i] += 1
+            for name in ('input_bytes', 'output_chars', 'prompt_tokens', 'response_tokens'):
+                stage[name] += event.get(name, 0)
+            hits, misses = _cache_counts(event)
+            stage['cache_hits'] += hits
+            stage['cache_misses'] += misses
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(stage, buckets=list(stage['buckets'])) for name, stage in self.stages.items()}
+
+    def prometheus(self):
+        """Renders the registry in the Prometheus text exposition format."""
+        stages = self.snapshot()
+        lines = [
+            "# HELP notegenius_stage_duration_seconds Time spent per stage.",
+            "# TYPE notegenius_stage_duration_seconds histogram",
+        ]
+        for name, stage in sorted(stages.items()):
+            for bound, count in zip(BUCKETS, stage['buckets']):
+                lines.append(f'notegenius_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'notegenius_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {stage["count"]}')
+            lines.append(f'notegenius_stage_duration_seconds_sum{{stage="{name}"}} {stage["seconds"]:.6f}')
+            lines.append(f'notegenius_stage_duration_seconds_count{{stage="{name}"}} {stage["count"]}')
+
+        counters = (
+            ("stage_errors_total", "Stages that raised.", lambda s: [("", s['errors'])]),
+            ("stage_input_bytes_total", "Bytes read or downloaded per stage.", lambda s: [("", s['input_bytes'])]),
+            ("stage_output_chars_total", "Characters produced per stage.", lambda s: [("", s['output_chars'])]),
+            ("tokens_total", "Estimated model tokens.", lambda s: [
+                (',kind="prompt"', s['prompt_tokens']), (',kind="response"', s['response_tokens'])
+            ]),
+            ("cache_lookups_total", "Cache lookups per stage.", lambda s: [
+                (',result="hit"', s['cache_hits']), (',result="miss"', s['cache_misses'])
+            ]),
+        )
+        for metric, help_text, values in counters:
+            lines.append(f"# HELP notegenius_{metric} {help_text}")
+            lines.append(f"# TYPE notegenius_{metric} counter")
+            for name, stage in sorted(stages.items()):
+                for labels, value in values(stage):
+                    lines.append(f'notegenius_{metric}{{stage="{name}"{labels}}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+@contextlib.contextmanager
+def span(stage, **attributes):
+    """
+    Times a stage. Attributes (input_bytes, output_chars, prompt_tokens,
+    response_tokens, cache="hit"/"miss", or anything else) can be passed
+    here or added with span.set() while it runs.
+    """
+    current = Span(stage, attributes)
+    stack = _stack()
+    parent = stack[-1].stage if stack else None
+    stack.append(current)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        stack.pop()
+        event = {
+            'ts': time.time(),
+            'stage': stage,
+            'parent': parent,
+            'seconds': time.perf_counter() - start,
+            'error': error
+        }
+        event.update(current.attributes)
+        record(event)
+
+
+@contextlib.contextmanager
+def trace(job_id=None):
+    """Collects the spans recorded on this thread into a JobTrace."""
+    previous = getattr(_local, 'trace', None)
+    _local.trace = JobTrace(job_id)
+    try:
+        yield _local.trace
+    finally:
+        _local.trace = previous
+        if TELEMETRY_SETTINGS["enabled"] and TELEMETRY_SETTINGS["prometheus_path"]:
+            write_prometheus(TELEMETRY_SETTINGS["prometheus_path"])
+
+
+@contextlib.contextmanager
+def attach(job_trace, parent=None):
+    """
+    Collects the spans recorded on this thread into another thread's
+    JobTrace, as children of the parent stage (work a job hands to a pool).
+    """
+    previous_trace = getattr(_local, 'trace', None)
+    previous_stack = _stack()
+    _local.trace = job_trace
+    _local.stack = [Span(parent, {})] if parent else []
+    try:
+        yield job_trace
+    finally:
+        _local.trace = previous_trace
+        _local.stack = previous_stack
+
+
+def record(event):
+    """Sends a finished span to the job trace, the registry and the log."""
+    if not TELEMETRY_SETTINGS["enabled"]:
+        return
+    current = getattr(_local, 'trace', None)
+    if current is not None:
+        event['job'] = current.id
+        current.events.append(event)
+    registry.record(event)
+
+    log_path = TELEMETRY_SETTINGS["log_path"]
+    if log_path:
+        line = json.dumps(event, default=str) + "\n"
+        with _log_lock:
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            if os.path.exists(log_path) and os.path.getsize(log_path) > TELEMETRY_SETTINGS["max_log_mb"] * 1024 * 1024:
+                os.replace(log_path, f"{log_path}.1")
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+def write_prometheus(path, source=None):
+    """Writes a registry's Prometheus text to path atomically."""
+    text = (source or registry).prometheus()
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+def load_log(path):
+    """Rebuilds a registry from a JSONL span log."""
+    rebuilt = MetricsRegistry()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                rebuilt.record(json.loads(line))
+    return rebuilt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect NoteGenius stage metrics.")
+    parser.add_argument("command", choices=["prometheus", "summary"])
+    parser.add_argument("--log", default=str(TELEMETRY_SETTINGS["log_path"]), help="JSONL span log")
+    args = parser.parse_args()
+
+    rebuilt = load_log(args.log)
+    if args.command == "prometheus":
+        print(rebuilt.prometheus(), end="")
+        return
+
+    print(f"{'stage':<22} {'count':>6} {'errors':>6} {'avg s':>8} {'total s':>9} {'in MB':>8} {'out kchars':>10} {'cache hit':>9}")
+    for name, stage in sorted(rebuilt.snapshot().items(), key=lambda item: -item[1]['seconds']):
+        lookups = stage['cache_hits'] + stage['cache_misses']
+        hit_rate = f"{stage['cache_hits'] / lookups:.0%}" if lookups else "-"
+        print(
+            f"{name:<22} {stage['count']:>6} {stage['errors']:>6} {stage['seconds'] / stage['count']:>8.2f} "
+            f"{stage['seconds']:>9.1f} {stage['input_bytes'] / 1_000_000:>8.1f} "
+            f"{stage['output_chars'] / 1000:>10.1f} {hit_rate:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,10 @@ from pathlib import Path
 from config import INTERFACE_SETTINGS
 
 def generate_theme():
-    """Generates theme.json file with primary color from config."""
+    """
+    Generates theme.json file with primary color from config.
+    Returns True if the file was (re)written, False if it was up to date.
+    """
     primary_color = INTERFACE_SETTINGS["primary_color"]
     
     theme = {
@@ -105,7 +108,15 @@ def generate_theme():
     theme_dir = Path(__file__).parent
     theme_dir.mkdir(exist_ok=True)
     
-    # Save theme
+    # Save theme, unless the file already matches (INTERFACE_SETTINGS unchanged),
+    # so a normal start doesn't rewrite it
     theme_path = theme_dir / "theme.json"
+    text = json.dumps(theme, indent=2)
+    try:
+        if theme_path.read_text() == text:
+            return False
+    except OSError:
+        pass
     with open(theme_path, "w") as f:
-        json.dump(theme, f, indent=2)
\ No newline at end of file
+        f.write(text)
+    return True
\ No newline at end of file
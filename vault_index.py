@@ -0,0 +1,373 @@
+"""
+Full-text index of the notes under OUTPUT_DIR for NoteGenius.
+Notes are split into passages kept in an SQLite FTS5 table and ranked with
+BM25. The index is maintained incrementally: a refresh only stats the
+notes and re-reads those whose size or modification time changed, and
+notes written by NoteGenius are indexed as soon as they are finished.
+
+Used to:
+- link a few related existing notes under each generated summary
+- add the most relevant passages to Manual Input prompts, within a strict
+  token budget
+
+Usage:
+    python vault_index.py refresh
+    python vault_index.py search "query terms" [--limit 10]
+"""
+
+import argparse
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter
+from config import OUTPUT_DIR, VAULT_INDEX_SETTINGS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS passages (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    title TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS passages_path ON passages (path);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    passages INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5 (
+    title, text, content='passages', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS passages_insert AFTER INSERT ON passages BEGIN
+    INSERT INTO passages_fts (rowid, title, text) VALUES (new.id, new.title, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS passages_delete AFTER DELETE ON passages BEGIN
+    INSERT INTO passages_fts (passages_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+END;
+"""
+
+# Column weights for bm25(): a match in the note title counts double
+TITLE_WEIGHT = 2.0
+TEXT_WEIGHT = 1.0
+
+# Passages fetched before grouping them into related notes
+CANDIDATE_PASSAGES = 200
+
+TERM = re.compile(r"\w+")
+COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+HEADING = re.compile(r"^#{1,6} ")
+
+# Frequent English, Portuguese and Spanish words left out of queries
+STOPWORDS = frozenset("""
+the and for are but not you all any can had her was one our out has have this that with from they
+will would there their what about which when make like than then them these some into more other
+also been were such only its may each most over
+que para com uma por mais como dos das nas nos mas foi ele ela seu sua entre quando muito
+tambem pelo pela isso esta este sao ser tem pode
+los las del una con por para como mas pero sus les esta este son ser tiene puede
+""".split())
+
+
+def term_counts(text):
+    """
+    Counts the meaningful terms of text, folded like the FTS5 tokenizer does
+    (lowercase, without diacritics).
+    """
+    text = text.lower()
+    if not text.isascii():
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return Counter(
+        term for term in TERM.findall(text)
+        if len(term) > 2 and not term.isdigit() and term not in STOPWORDS
+    )
+
+
+def query_terms(text, limit=None):
+    """Returns the most frequent meaningful terms of text, most frequent first."""
+    return [term for term, _ in term_counts(text).most_common(limit)]
+
+
+def match_expression(terms):
+    """Builds an FTS5 query matching any of the terms (each quoted, so no operators leak in)."""
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+def split_passages(text, passage_tokens):
+    """
+    Splits a note into passages of about passage_tokens (four characters
+    per token), on paragraph boundaries. A heading starts a new passage.
+    """
+    size = passage_tokens * 4
+    passages = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", COMMENT.sub("", text)):
+        paragraph = paragraph.strip()
+        if not paragraph or paragraph == "---":
+            continue
+        if current and (HEADING.match(paragraph) or len(current) + len(paragraph) > size):
+            passages.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        passages.append(current)
+    return passages
+
+
+def note_link(path):
+    """Returns the wikilink target of a vault-relative note path."""
+    return path[:-3] if path.endswith(".md") else path
+
+
+def relative_note_path(path, root=None):
+    """Returns path relative to the vault (with forward slashes), or None if outside it."""
+    try:
+        relative = os.path.relpath(os.path.abspath(path), os.path.abspath(root or OUTPUT_DIR))
+    except ValueError:
+        return None  # On another drive (Windows)
+    if relative.startswith(os.pardir):
+        return None
+    return relative.replace(os.sep, "/")
+
+
+class VaultIndex:
+    def __init__(self, root=None, db_path=None, settings=None):
+        self.settings = settings or VAULT_INDEX_SETTINGS
+        self.root = os.path.abspath(root or OUTPUT_DIR)
+        self.db_path = str(db_path or self.settings["path"])
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._scanned = None
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _relative(self, path):
+        return relative_note_path(path, self.root)
+
+    def _scan(self):
+        """Yields (relative path, size, mtime) of every note, skipping hidden folders like .obsidian."""
+        for directory, folders, files in os.walk(self.root):
+            folders[:] = [name for name in folders if not name.startswith(".")]
+            for name in files:
+                if not name.endswith(".md"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # Deleted while scanning
+                yield self._relative(path), stat.st_size, stat.st_mtime
+
+    def refresh(self, force=False):
+        """
+        Brings the index up to date with the vault: new and modified notes
+        are (re)indexed, deleted ones removed. Unless forced, does nothing if
+        the vault was scanned less than rescan_interval seconds ago.
+        Returns counts of what changed, or None if skipped.
+        """
+        with self._lock:
+            if not force and self._scanned and time.monotonic() - self._scanned < self.settings["rescan_interval"]:
+                return None
+            start = time.perf_counter()
+            stats = {'notes': 0, 'added': 0, 'updated': 0, 'removed': 0}
+            with self._connect() as db:
+                known = {path: (size, mtime) for path, size, mtime in db.execute("SELECT path, size, mtime FROM notes")}
+                if os.path.isdir(self.root):
+                    for path, size, mtime in self._scan():
+                        stats['notes'] += 1
+                        previous = known.pop(path, None)
+                        if previous == (size, mtime):
+                            continue
+                        self._index_note(db, path, size, mtime)
+                        stats['updated' if previous else 'added'] += 1
+                for path in known:
+                    self._remove_note(db, path)
+                stats['removed'] = len(known)
+            self._scanned = time.monotonic()
+            stats['seconds'] = time.perf_counter() - start
+            return stats
+
+    def update_file(self, path):
+        """Indexes (or removes) a single note right after it was written, without a vault scan."""
+        relative = self._relative(path)
+        if relative is None or not relative.endswith(".md"):
+            return
+        with self._lock, self._connect() as db:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                self._remove_note(db, relative)
+                return
+            self._index_note(db, relative, stat.st_size, stat.st_mtime)
+
+    def _index_note(self, db, path, size, mtime):
+        try:
+            with open(os.path.join(self.root, path), "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        except OSError:
+            return
+        title = os.path.splitext(os.path.basename(path))[0]
+        passages = split_passages(text, self.settings["passage_tokens"])
+        self._remove_passages(db, path)
+        db.executemany(
+            "INSERT INTO passages (path, title, text) VALUES (?, ?, ?)",
+            ((path, title, passage) for passage in passages)
+        )
+        self._count_terms(db, passages, 1)
+        db.execute("INSERT OR REPLACE INTO notes (path, size, mtime) VALUES (?, ?, ?)", (path, size, mtime))
+
+    def _remove_note(self, db, path):
+        self._remove_passages(db, path)
+        db.execute("DELETE FROM notes WHERE path = ?", (path,))
+
+    def _remove_passages(self, db, path):
+        old = [text for text, in db.execute("SELECT text FROM passages WHERE path = ?", (path,))]
+        if old:
+            self._count_terms(db, old, -1)
+            db.execute("DELETE FROM passages WHERE path = ?", (path,))
+
+    def _count_terms(self, db, passages, sign):
+        """Adds (sign 1) or removes (sign -1) passages to the per-term passage counts."""
+        counts = Counter()
+        for passage in passages:
+            counts.update(term_counts(passage).keys())
+        db.executemany(
+            "INSERT INTO terms (term, passages) VALUES (?, ?) "
+            "ON CONFLICT (term) DO UPDATE SET passages = passages + excluded.passages",
+            ((term, sign * count) for term, count in counts.items())
+        )
+        if sign < 0:
+            db.executemany(
+                "DELETE FROM terms WHERE term = ? AND passages <= 0",
+                ((term,) for term in counts)
+            )
+
+    def _distinctive_terms(self, text, limit):
+        """
+        Returns up to limit terms of text ranked by tf-idf against the index,
+        so a long text is looked up by what sets it apart rather than by the
+        words every note uses. Terms absent from the index are dropped.
+        """
+        counts = term_counts(text)
+        if not counts:
+            return []
+        terms = list(counts)
+        with self._connect() as db:
+            total = db.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+            frequencies = {}
+            for i in range(0, len(terms), 500):  # Stay under SQLite's variable limit
+                batch = terms[i:i + 500]
+                frequencies.update(db.execute(
+                    f"SELECT term, passages FROM terms WHERE term IN ({','.join('?' * len(batch))})", batch
+                ))
+        # Common terms are weighted down rather than dropped, so a small vault or
+        # a note's main topic still finds related notes. Only in a large vault are
+        # terms in most passages left out, as they say little and are costly to match
+        common = total * self.settings["common_term_ratio"] if total >= self.settings["common_term_min_passages"] else total
+        weights = {
+            term: counts[term] * math.log(total / found)
+            for term, found in frequencies.items() if found <= common
+        }
+        return sorted(weights, key=weights.get, reverse=True)[:limit]
+
+    def search(self, terms, limit=10):
+        """Returns the best passages for a list of terms as dicts (path, title, text, score), best first."""
+        if not terms:
+            return []
+        with self._connect() as db:
+            rows = db.execute(
+                f"""
+                SELECT passages.path, passages.title, passages.text,
+                       bm25(passages_fts, {TITLE_WEIGHT}, {TEXT_WEIGHT}) AS score
+                FROM passages_fts JOIN passages ON passages.id = passages_fts.rowid
+                WHERE passages_fts MATCH ?
+                ORDER BY score LIMIT ?
+                """,
+                (match_expression(terms), limit)
+            ).fetchall()
+        # FTS5's bm25() is negative, lower being more relevant
+        return [{'path': path, 'title': title, 'text': text, 'score': -score} for path, title, text, score in rows]
+
+    def related(self, text, limit=5, exclude=None):
+        """
+        Returns the vault-relative paths of up to limit notes most similar
+        to text (queried with its most distinctive terms), excluding a note path.
+        """
+        excluded = self._relative(exclude) if exclude else None
+        scores = {}
+        for passage in self.search(self._distinctive_terms(text, self.settings["query_terms"]), CANDIDATE_PASSAGES):
+            if passage['path'] != excluded:
+                scores[passage['path']] = max(scores.get(passage['path'], 0.0), passage['score'])
+        return sorted(scores, key=scores.get, reverse=True)[:limit]
+
+    def context(self, query, max_tokens, estimate_tokens):
+        """
+        Returns a prompt section with the passages most relevant to query,
+        best first, whose estimated size (estimate_tokens of the whole
+        section) never exceeds max_tokens. Empty if nothing fits or matches.
+        """
+        header = "Relevant passages from existing notes:"
+        section = ""
+        terms = self._distinctive_terms(query, self.settings["query_terms"])
+        for passage in self.search(terms, self.settings["context_passages"]):
+            candidate = f"{section or header}\n\n[[{note_link(passage['path'])}]]\n{passage['text']}"
+            if estimate_tokens(candidate) <= max_tokens:
+                section = candidate
+        return section
+
+    def clear(self):
+        """Removes every indexed note."""
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM passages")
+            db.execute("DELETE FROM terms")
+            db.execute("DELETE FROM notes")
+        self._scanned = None
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_vault_index():
+    """Returns the process-wide shared index of OUTPUT_DIR."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = VaultIndex()
+        return _index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain and query the index of the notes in OUTPUT_DIR.")
+    parser.add_argument("command", choices=["refresh", "search"])
+    parser.add_argument("query", nargs="?", default="")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    index = get_vault_index()
+    stats = index.refresh(force=True)
+    if args.command == "refresh":
+        print(
+            f"{stats['notes']} notes: {stats['added']} added, {stats['updated']} updated, "
+            f"{stats['removed']} removed in {stats['seconds']:.2f}s"
+        )
+        return
+
+    for passage in index.search(query_terms(args.query), args.limit):
+        preview = " ".join(passage['text'].split())[:100]
+        print(f"{passage['score']:>7.2f}  [[{note_link(passage['path'])}]]  {preview}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Bulk web ingestion for NoteGenius.
+Ingests a reading list or a whole documentation site in one run:
+1. URLs come from a text file (one per line) or a sitemap.xml (local path
+   or URL; sitemap indexes are followed)
+2. Pages are fetched concurrently on an asyncio loop, with a limit on
+   requests in flight per host and a minimum delay between requests to the
+   same host
+3. Downloaded HTML is parsed in a process pool
+4. Each page is summarized and written to its own note in the output folder
+
+Fetching goes through URLExtractor, so unchanged pages cost a 304 and are
+not parsed again. Pages the source ledger has already seen summarized are
+not fetched at all. Pages/second and failures per host are reported.
+
+Usage:
+    python web_ingest.py reading_list.txt --output "Reading List" --layout Article --language english
+    python web_ingest.py https://docs.example.com/sitemap.xml --output Docs --per-host 4
+    python web_ingest.py sitemap.xml --no-summary   # fetch and extract only
+"""
+
+import argparse
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlparse
+from xml.etree import ElementTree
+from extractors.url_extractor import URLExtractor, get_session, parse_html
+from config import HTTP_SETTINGS, INGEST_SETTINGS, LANGUAGES, LAYOUTS
+
+
+def load_urls(source):
+    """Returns the unique URLs of a sitemap or of a one-URL-per-line text file, in order."""
+    if source.startswith(("http://", "https://")) or source.lower().endswith(".xml"):
+        urls = sitemap_urls(source)
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return list(dict.fromkeys(urls))
+
+
+def sitemap_urls(source):
+    """Reads the page URLs of a sitemap, following sitemap indexes."""
+    if source.startswith(("http://", "https://")):
+        response = get_session().get(
+            source, timeout=(HTTP_SETTINGS["connect_timeout"], HTTP_SETTINGS["read_timeout"])
+        )
+        response.raise_for_status()
+        data = response.content
+    else:
+        with open(source, "rb") as f:
+            data = f.read()
+
+    root = ElementTree.fromstring(data)
+    locations = [
+        element.text.strip() for element in root.iter()
+        if element.tag.endswith("loc") and element.text
+    ]
+    if root.tag.endswith("sitemapindex"):
+        return [url for sitemap in locations for url in sitemap_urls(sitemap)]
+    return locations
+
+
+def note_name(url):
+    """Builds a note filename from a URL's path (or host for the site root)."""
+    parsed = urlparse(url)
+    path = os.path.splitext(parsed.path.strip("/"))[0]
+    name = " - ".join(part for part in path.split("/") if part) or parsed.netloc
+    return re.sub(r'[<>:"/\\|?*#^\[\]]', "_", name)[:120]
+
+
+class HostLimiter:
+    def __init__(self, per_host, delay):
+        """Bounds concurrent requests per host and spaces their start times."""
+        self.per_host = per_host
+        self.delay = delay
+        self._semaphores = {}
+        self._next_start = {}
+
+    @contextlib.asynccontextmanager
+    async def slot(self, host):
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            # Reserve the next start time for this host (no await in between, so no race)
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.delay
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+class WebIngestor:
+    def __init__(self, processor=None, settings=None):
+        """
+        processor: a ContentProcessor to summarize pages with, or None to
+            only fetch and extract.
+        """
+        self.processor = processor
+        self.settings = dict(INGEST_SETTINGS, **(settings or {}))
+        self.hosts = {}
+        self.fetch_status = {}
+        self.notes = []
+        self.settled = []  # Pages the source ledger had already seen summarized
+        self.extract_elapsed = 0.0
+
+    def _host(self, host):
+        if host not in self.hosts:
+            self.hosts[host] = {'pages': 0, 'failed': 0, 'fetch_seconds': 0.0, 'errors': []}
+        return self.hosts[host]
+
+    def run(self, urls, output="", layout="", language="", instructions="", policy=None):
+        """
+        Ingests every URL and returns a summary dict.
+        policy: ledger policy for pages already summarized (default: LEDGER_SETTINGS).
+        """
+        start = time.perf_counter()
+        parse_pool = ProcessPoolExecutor(
+            max_workers=self.settings["parse_workers"],
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        # Blocking downloads and summaries run here; the loop's default
+        # executor is too small to keep every allowed request in flight
+        threads = ThreadPoolExecutor(
+            max_workers=self.settings["concurrency"] + self.settings["summary_workers"]
+        )
+        try:
+            asyncio.run(self._ingest(urls, parse_pool, threads, output, layout, language, instructions, policy))
+        finally:
+            parse_pool.shutdown()
+            threads.shutdown()
+
+        pages = sum(host['pages'] for host in self.hosts.values())
+        elapsed = time.perf_counter() - start
+        return {
+            'urls': len(urls),
+            'pages': pages,
+            'failed': sum(host['failed'] for host in self.hosts.values()),
+            'elapsed': elapsed,
+            'extract_elapsed': self.extract_elapsed,
+            'pages_per_second': pages / self.extract_elapsed if self.extract_elapsed else 0.0,
+            'fetch_status': dict(self.fetch_status),
+            'hosts': self.hosts,
+            'notes': len(self.notes),
+            'already_summarized': len(self.settled)
+        }
+
+    async def _ingest(self, urls, parse_pool, threads, output, layout, language, instructions, policy):
+        loop = asyncio.get_running_loop()
+        limiter = HostLimiter(self.settings["per_host"], self.settings["host_delay"])
+        in_flight = asyncio.Semaphore(self.settings["concurrency"])
+        summarizing = asyncio.Semaphore(self.settings["summary_workers"])
+        names = set()
+        started = time.perf_counter()
+
+        async def ingest(url):
+            host = self._host(urlparse(url).netloc)
+            job = None
+            if self.processor is not None:
+                name = note_name(url)
+                base, counter = name, 2
+                while name in names:
+                    name, counter = f"{base} ({counter})", counter + 1
+                names.add(name)
+                job = dict(
+                    input_type="url", input_value=url, output_filename=os.path.join(output, name),
+                    layout=layout, language=language, instructions=instructions, policy=policy
+                )
+                # Pages summarized before are settled without downloading them
+                settled = await loop.run_in_executor(threads, self.processor.check_ledger, job)
+                if settled is not None:
+                    self.settled.append(settled)
+                    print(f"[ledger] {url}: {settled}")
+                    return
+
+            try:
+                extractor = URLExtractor(url)
+                async with limiter.slot(urlparse(url).netloc), in_flight:
+                    fetch_start = time.perf_counter()
+                    content, response = await loop.run_in_executor(threads, extractor.fetch)
+                    host['fetch_seconds'] += time.perf_counter() - fetch_start
+                if content is None:
+                    content = await loop.run_in_executor(parse_pool, parse_html, response.content)
+                    await loop.run_in_executor(threads, extractor.store, response, content)
+                extract_seconds = time.perf_counter() - fetch_start
+                self.fetch_status[extractor.fetch_status] = self.fetch_status.get(extractor.fetch_status, 0) + 1
+                host['pages'] += 1
+                self.extract_elapsed = time.perf_counter() - started
+            except Exception as e:
+                host['failed'] += 1
+                host['errors'].append(f"{url}: {str(e)}")
+                return
+
+            if job is None:
+                return
+
+            try:
+                async with summarizing:
+                    message = await loop.run_in_executor(threads, self._summarize, job, content, extract_seconds)
+                print(f"[ok] {url}: {message}")
+            except Exception as e:
+                host['failed'] += 1
+                host['errors'].append(f"{url}: summary failed: {str(e)}")
+
+        await asyncio.gather(*(ingest(url) for url in urls))
+
+    def _summarize(self, job, content, extract_seconds):
+        """Summarizes a page into its note, unless the ledger has its text already. Returns a message."""
+        settled = self.processor.check_ledger(job, content)
+        if settled is not None:
+            self.settled.append(settled)
+            return settled
+        start = time.perf_counter()
+        summary = self.processor.generate_summary(
+            content, job["layout"], job["language"], job["instructions"], input_type="url"
+        )
+        message = self.processor.write_note(job["output_filename"], summary, "url", job["input_value"])
+        self.processor.record_ledger(job, content, extract_seconds, time.perf_counter() - start)
+        self.notes.append(message)
+        return message
+
+
+def print_report(summary):
+    print()
+    print(f"URLs:        {summary['urls']} ({summary['pages']} extracted, {summary['failed']} failed)")
+    statuses = ", ".join(f"{count} {status}" for status, count in sorted(summary['fetch_status'].items()))
+    if statuses:
+        print(f"Fetches:     {statuses}")
+    print(f"Extraction:  {summary['pages_per_second']:.1f} pages/s ({summary['extract_elapsed']:.1f}s)")
+    print(f"Elapsed:     {summary['elapsed']:.1f}s, {summary['notes']} note(s) written")
+    if summary['already_summarized']:
+        print(f"Ledger:      {summary['already_summarized']} page(s) already summarized, not summarized again")
+    print()
+    print(f"{'host':<40} {'pages':>6} {'failed':>7} {'avg fetch':>10}")
+    for name, host in sorted(summary['hosts'].items()):
+        fetches = host['pages'] + host['failed']
+        average = host['fetch_seconds'] / fetches if fetches else 0.0
+        print(f"{name:<40} {host['pages']:>6} {host['failed']:>7} {average:>9.2f}s")
+        for error in host['errors'][:5]:
+            print(f"    {error}")
+        if len(host['errors']) > 5:
+            print(f"    ... and {len(host['errors']) - 5} more")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize many web pages from a URL list or a sitemap.")
+    parser.add_argument("source", help="Text file with one URL per line, or a sitemap.xml path/URL")
+    parser.add_argument("--output", default="", help="Folder (relative to OUTPUT_DIR) for the notes")
+    parser.add_argument("--layout", choices=list(LAYOUTS), default="Article")
+    parser.add_argument("--language", choices=list(LANGUAGES), default="english")
+    parser.add_argument("--instructions", default="")
+    parser.add_argument("--per-host", type=int, help="Requests in flight per host")
+    parser.add_argument("--delay", type=float, help="Minimum seconds between requests to one host")
+    parser.add_argument("--no-summary", action="store_true", help="Only fetch and extract the pages")
+    parser.add_argument("--policy", choices=["skip", "link", "force"],
+                        help="For pages already summarized with the same settings (default: LEDGER_SETTINGS)")
+    args = parser.parse_args()
+
+    settings = {}
+    if args.per_host:
+        settings['per_host'] = args.per_host
+    if args.delay is not None:
+        settings['host_delay'] = args.delay
+
+    processor = None
+    if not args.no_summary:
+        from processor import ContentProcessor
+        processor = ContentProcessor()
+
+    urls = load_urls(args.source)
+    print(f"{len(urls)} URL(s) to ingest")
+    summary = WebIngestor(processor, settings).run(
+        urls, args.output, args.layout, args.language, args.instructions, args.policy
+    )
+    print_report(summary)
+    sys.exit(1 if summary['failed'] else 0)
+
+
+if __name__ == "__main__":
+    main()